@@ -1,6 +1,6 @@
 """Core agent implementations."""
 
-from .agent import Agent, ModelConfig
+from .agent import Agent, ModelConfig, RunResult
 from .tools.base import Tool
 
-__all__ = ["Agent", "ModelConfig", "Tool"]
+__all__ = ["Agent", "ModelConfig", "RunResult", "Tool"]
@@ -1,17 +1,42 @@
 """Agent implementation with Claude API and tools."""
 
 import asyncio
+import copy
+import itertools
+import json
 import os
-from contextlib import AsyncExitStack
+import random
+import time
 from dataclasses import dataclass
-from typing import Any
+from typing import Any, AsyncIterator, Callable, Iterable, Iterator
 
-from anthropic import Anthropic
+from anthropic import (
+    Anthropic,
+    APIConnectionError,
+    APIStatusError,
+    AsyncAnthropic,
+    RateLimitError,
+)
 
 from .tools.base import Tool
-from .utils.connections import setup_mcp_connections
+from .tools.read_spilled import ReadSpilledTool
+from .utils.batches import run_batch
+from .utils.cache_policy import CachePolicy
 from .utils.history_util import MessageHistory
-from .utils.tool_util import execute_tools
+from .utils.mcp_pool import MCPConnectionPool, get_default_pool
+from .utils.rate_limit import RateLimitGovernor, get_default_governor
+from .utils.result_cache import ToolResultCache
+from .utils.spill_store import SpillStore
+from .utils.tool_selection import ToolSelector
+from .utils.token_count import estimate_tokens
+from .utils.tool_util import ToolScheduler
+from .utils.tracing import (
+    Span,
+    Tracer,
+    trace_span,
+    usage_attributes,
+    use_tracer,
+)
 
 
 @dataclass
@@ -28,6 +53,69 @@ class ModelConfig:
     max_tokens: int = 4096
     temperature: float = 1.0
     context_window_tokens: int = 180000
+    # Summarize the oldest history in the background once usage passes
+    # this fraction of the context window (None keeps plain truncation)
+    compaction_threshold: float | None = None
+    compaction_model: str = "claude-haiku-4-5-20251001"
+
+
+class _SyncRunner:
+    """Event loop kept open across an agent's synchronous calls.
+
+    The async client's pooled connections, and background work such as
+    history compaction, belong to the loop they were started on, so
+    run() reuses one loop instead of creating one per call.
+    """
+
+    def __init__(self):
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def run(self, coro: Any) -> Any:
+        """Run a coroutine to completion on the persistent loop."""
+        if self._loop is None or self._loop.is_closed():
+            self._loop = asyncio.new_event_loop()
+        return self._loop.run_until_complete(coro)
+
+    def close(self) -> None:
+        """Cancel leftover tasks and close the loop."""
+        loop, self._loop = self._loop, None
+        if loop is None or loop.is_closed():
+            return
+        tasks = asyncio.all_tasks(loop)
+        for task in tasks:
+            task.cancel()
+
+        async def wait_cancelled() -> None:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        loop.run_until_complete(wait_cancelled())
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.close()
+
+    def __del__(self) -> None:
+        if self._loop is not None and not self._loop.is_running():
+            self._loop.close()
+
+
+def _is_retryable(error: Exception) -> bool:
+    """Whether the SDK would have retried a failed request."""
+    if isinstance(error, APIConnectionError):
+        return True
+    should_retry = error.response.headers.get("x-should-retry")
+    if should_retry in ("true", "false"):
+        return should_retry == "true"
+    status = error.status_code
+    return status in (408, 409) or status >= 500
+
+
+@dataclass
+class RunResult:
+    """Outcome of one input processed by Agent.run_many."""
+
+    index: int
+    input: str
+    response: Any = None
+    error: BaseException | None = None
 
 
 class Agent:
@@ -41,8 +129,15 @@ class Agent:
         mcp_servers: list[dict[str, Any]] | None = None,
         config: ModelConfig | None = None,
         verbose: bool = False,
-        client: Anthropic | None = None,
+        client: AsyncAnthropic | Anthropic | None = None,
         message_params: dict[str, Any] | None = None,
+        mcp_pool: MCPConnectionPool | None = None,
+        result_cache: ToolResultCache | None = None,
+        tracer: Tracer | None = None,
+        tool_selector: ToolSelector | None = None,
+        rate_limiter: RateLimitGovernor | None = None,
+        spill_store: SpillStore | None = None,
+        cache_policy: CachePolicy | None = None,
     ):
         """Initialize an Agent.
         
@@ -53,9 +148,29 @@ class Agent:
             mcp_servers: MCP server configurations
             config: Model configuration with defaults
             verbose: Enable detailed logging
-            client: Anthropic client instance
+            client: Anthropic client instance. An AsyncAnthropic client
+                    (the default) streams responses; a sync client is run
+                    in a worker thread without streaming.
             message_params: Additional parameters for client.messages.create().
                            These override any conflicting parameters from config.
+            mcp_pool: Pool that keeps MCP server sessions warm between runs.
+                      Defaults to the process-wide pool.
+            result_cache: Opt-in cache for results of cacheable tools such
+                          as file reads; its hits/misses show the savings.
+            tracer: Receives spans for each run, turn, tool call and MCP
+                    call, with API latency, time to first token and usage.
+            tool_selector: Sends only the tools relevant to the recent
+                           conversation, plus pinned ones, instead of every
+                           tool on every turn.
+            rate_limiter: Governor pacing requests and input tokens per
+                          minute. Defaults to the process-wide governor
+                          shared by all agents.
+            spill_store: Moves tool outputs over its size threshold to disk,
+                         leaving a preview and a handle in the history; a
+                         read_spilled tool is added to page through them.
+            cache_policy: Where cache breakpoints go (tools, system prompt
+                          and a ladder on the messages) and the record of
+                          per-turn cache reads. Defaults to CachePolicy().
         """
         self.name = name
         self.system = system
@@ -64,18 +179,53 @@ class Agent:
         self.config = config or ModelConfig()
         self.mcp_servers = mcp_servers or []
         self.message_params = message_params or {}
-        self.client = client or Anthropic(
+        self.mcp_pool = mcp_pool or get_default_pool()
+        self.result_cache = result_cache
+        self.tracer = tracer
+        self.tool_selector = tool_selector
+        self.rate_limiter = rate_limiter or get_default_governor()
+        self.spill_store = spill_store
+        self.cache_policy = cache_policy or CachePolicy()
+        if spill_store is not None and not any(
+            isinstance(tool, ReadSpilledTool) for tool in self.tools
+        ):
+            self.tools.append(ReadSpilledTool(spill_store))
+        self.client = client or AsyncAnthropic(
             api_key=os.environ.get("ANTHROPIC_API_KEY", "")
         )
-        self.history = MessageHistory(
+        # Messages calls leave retrying to the rate-limit governor
+        self._api_client = self.client.with_options(max_retries=0)
+        self.history = self._new_history()
+        # Shared with forks, which share the client
+        self._runner = _SyncRunner()
+
+        if self.verbose:
+            print(f"\n[{self.name}] Agent initialized")
+
+    def _new_history(self) -> MessageHistory:
+        return MessageHistory(
             model=self.config.model,
             system=self.system,
             context_window_tokens=self.config.context_window_tokens,
             client=self.client,
+            compaction_threshold=self.config.compaction_threshold,
+            compaction_model=self.config.compaction_model,
         )
 
-        if self.verbose:
-            print(f"\n[{self.name}] Agent initialized")
+    def fork(self, name: str | None = None) -> "Agent":
+        """Return a copy with an empty history.
+
+        The copy shares this agent's client, tools, MCP pool and result
+        cache, so forks are cheap and reuse the same connections.
+        """
+        forked = copy.copy(self)
+        forked.name = name or self.name
+        forked.tools = list(self.tools)
+        forked.history = forked._new_history()
+        if self.tool_selector is not None:
+            forked.tool_selector = self.tool_selector.fork()
+        forked.cache_policy = self.cache_policy.fork()
+        return forked
 
     def _prepare_message_params(self) -> dict[str, Any]:
         """Prepare parameters for client.messages.create() call.
@@ -83,91 +233,468 @@ class Agent:
         Returns a dict with base parameters from config, with any
         message_params overriding conflicting keys.
         """
+        tools = self.tools
+        if self.tool_selector is not None:
+            tools = self.tool_selector.select(tools, self.history.messages)
+        tool_dicts, system, breakpoints = self.cache_policy.mark_prefix(
+            [tool.to_dict() for tool in tools], self.system
+        )
+        self.history.cache_breakpoints = breakpoints
         return {
             "model": self.config.model,
             "max_tokens": self.config.max_tokens,
             "temperature": self.config.temperature,
-            "system": self.system,
+            "system": system,
             "messages": self.history.format_for_api(),
-            "tools": [tool.to_dict() for tool in self.tools],
+            "tools": tool_dicts,
             **self.message_params,
         }
 
-    async def _agent_loop(self, user_input: str) -> list[dict[str, Any]]:
-        """Process user input and handle tool calls in a loop"""
-        if self.verbose:
-            print(f"\n[{self.name}] Received: {user_input}")
-        await self.history.add_message("user", user_input, None)
+    def _estimate_input_tokens(self, params: dict[str, Any]) -> int:
+        """Cheap upper estimate of a request's input tokens.
+
+        Last turn's context size plus the newest message, without
+        serializing the whole history.
+        """
+        estimate = self.history.total_tokens
+        if self.history.system_tokens is None:
+            estimate += estimate_tokens(self.system)
+        if params["messages"]:
+            estimate += estimate_tokens(
+                json.dumps(params["messages"][-1], default=str)
+            )
+        return estimate
 
-        tool_dict = {tool.name: tool for tool in self.tools}
+    async def _create_message(
+        self,
+        params: dict[str, Any],
+        headers: dict[str, str],
+        on_tool_use: Callable[[Any], None],
+        span: Span,
+    ) -> Any:
+        """Call the Messages API, paced by the rate-limit governor.
 
-        while True:
-            self.history.truncate()
-            params = self._prepare_message_params()
+        The SDK's own retries are turned off for these calls, so every 429
+        reaches the governor, which pauses all agents sharing it until the
+        server's retry-after has passed before the call is retried. Other
+        retryable failures (overload, server errors, dropped connections)
+        are retried here with the SDK's backoff, up to the client's
+        max_retries.
+        """
+        estimate = self._estimate_input_tokens(params)
+        started_tools = []
+
+        def track_tool_use(block: Any) -> None:
+            started_tools.append(block)
+            on_tool_use(block)
+
+        failures = 0
+        for attempt in itertools.count():
+            await self.rate_limiter.acquire(estimate)
+            try:
+                response, response_headers = await self._send_message(
+                    params, headers, track_tool_use, span
+                )
+            except RateLimitError as e:
+                self.rate_limiter.rate_limited(e.response.headers)
+                if attempt >= self.rate_limiter.max_retries:
+                    raise
+                if self.verbose:
+                    print(f"\n[{self.name}] Rate limited, retrying")
+                continue
+            except (APIConnectionError, APIStatusError) as e:
+                # Tools already started from a partial stream can't be
+                # taken back, so that response isn't retried
+                if (
+                    not _is_retryable(e)
+                    or started_tools
+                    or failures >= getattr(self.client, "max_retries", 0)
+                ):
+                    raise
+                failures += 1
+                delay = min(0.5 * 2 ** (failures - 1), 8.0)
+                if self.verbose:
+                    print(f"\n[{self.name}] API error ({e}), retrying")
+                await asyncio.sleep(delay * (1 - 0.25 * random.random()))
+                continue
+            self.rate_limiter.update(response_headers)
+            usage = response.usage
+            self.rate_limiter.settle(
+                estimate,
+                usage.input_tokens
+                + (getattr(usage, "cache_creation_input_tokens", 0) or 0),
+            )
+            return response
 
-            # Merge headers properly - default beta header can be overridden by message_params
-            default_headers = {"anthropic-beta": "code-execution-2025-05-22"}
-            if "extra_headers" in params:
-                # Pop extra_headers from params and merge with defaults
-                custom_headers = params.pop("extra_headers")
-                merged_headers = {**default_headers, **custom_headers}
-            else:
-                merged_headers = default_headers
+    async def _send_message(
+        self,
+        params: dict[str, Any],
+        headers: dict[str, str],
+        on_tool_use: Callable[[Any], None],
+        span: Span,
+    ) -> tuple[Any, Any]:
+        """Make one Messages API call; return the message and its headers.
 
-            response = self.client.messages.create(
+        With an async client the response is streamed and on_tool_use is
+        called as soon as each tool_use block is complete, so tools run
+        while the rest of the response is still being generated. API
+        latency and, when streaming, time to first token are recorded on
+        the turn's span.
+        """
+        start = time.perf_counter()
+        client = self._api_client
+        if not isinstance(client, AsyncAnthropic):
+            raw = await asyncio.to_thread(
+                client.messages.with_raw_response.create,
                 **params,
-                extra_headers=merged_headers
+                extra_headers=headers,
             )
-            tool_calls = [
-                block for block in response.content if block.type == "tool_use"
-            ]
+            span.attributes["api_latency"] = time.perf_counter() - start
+            return raw.parse(), raw.headers
 
-            if self.verbose:
-                for block in response.content:
-                    if block.type == "text":
-                        print(f"\n[{self.name}] Output: {block.text}")
-                    elif block.type == "tool_use":
-                        params_str = ", ".join(
-                            [f"{k}={v}" for k, v in block.input.items()]
-                        )
-                        print(
-                            f"\n[{self.name}] Tool call: "
-                            f"{block.name}({params_str})"
-                        )
-
-            await self.history.add_message(
-                "assistant", response.content, response.usage
+        async with client.messages.stream(
+            **params, extra_headers=headers
+        ) as stream:
+            async for event in stream:
+                if (
+                    event.type == "content_block_delta"
+                    and "ttft" not in span.attributes
+                ):
+                    span.attributes["ttft"] = time.perf_counter() - start
+                elif (
+                    event.type == "content_block_stop"
+                    and event.content_block.type == "tool_use"
+                ):
+                    on_tool_use(event.content_block)
+            response = await stream.get_final_message()
+        span.attributes["api_latency"] = time.perf_counter() - start
+        return response, stream.response.headers
+
+    def _prepare_request(self) -> tuple[dict[str, Any], dict[str, str]]:
+        """Truncate history and return (params, headers) for the next turn."""
+        self.history.truncate()
+        params = self._prepare_message_params()
+
+        # Merge headers properly - default beta header can be overridden by message_params
+        default_headers = {"anthropic-beta": "code-execution-2025-05-22"}
+        if "extra_headers" in params:
+            # Pop extra_headers from params and merge with defaults
+            custom_headers = params.pop("extra_headers")
+            merged_headers = {**default_headers, **custom_headers}
+        else:
+            merged_headers = default_headers
+        return params, merged_headers
+
+    async def _complete_turn(
+        self,
+        response: Any,
+        scheduler: ToolScheduler,
+        tool_tasks: dict[str, asyncio.Task],
+    ) -> bool:
+        """Record a response and its tool results.
+
+        Tool calls not already started by the caller are submitted here.
+        Returns True when the response ends the agent loop.
+        """
+        tool_calls = [
+            block for block in response.content if block.type == "tool_use"
+        ]
+        for block in tool_calls:
+            if block.id not in tool_tasks:
+                tool_tasks[block.id] = scheduler.submit(block)
+
+        if self.verbose:
+            for block in response.content:
+                if block.type == "text":
+                    print(f"\n[{self.name}] Output: {block.text}")
+                elif block.type == "tool_use":
+                    params_str = ", ".join(
+                        [f"{k}={v}" for k, v in block.input.items()]
+                    )
+                    print(
+                        f"\n[{self.name}] Tool call: "
+                        f"{block.name}({params_str})"
+                    )
+
+        await self.history.add_message(
+            "assistant", response.content, response.usage
+        )
+        cache_turn = self.cache_policy.record(response.usage)
+        if self.verbose:
+            print(
+                f"\n[{self.name}] Cache: {cache_turn.cache_read} read, "
+                f"{cache_turn.cache_write} written, "
+                f"{cache_turn.uncached} uncached "
+                f"({cache_turn.read_ratio:.0%} read)"
             )
 
-            if tool_calls:
-                tool_results = await execute_tools(
-                    tool_calls,
-                    tool_dict,
+        if not tool_calls:
+            return True
+
+        tool_results = await asyncio.gather(
+            *[tool_tasks[block.id] for block in tool_calls]
+        )
+        if self.verbose:
+            for block in tool_results:
+                print(
+                    f"\n[{self.name}] Tool result: "
+                    f"{block.get('content')}"
                 )
-                if self.verbose:
-                    for block in tool_results:
-                        print(
-                            f"\n[{self.name}] Tool result: "
-                            f"{block.get('content')}"
-                        )
-                await self.history.add_message("user", tool_results)
-            else:
-                return response
+        await self.history.add_message("user", tool_results)
+        return False
 
-    async def run_async(self, user_input: str) -> list[dict[str, Any]]:
-        """Run agent with MCP tools asynchronously."""
-        async with AsyncExitStack() as stack:
-            original_tools = list(self.tools)
+    async def _agent_loop(self, user_input: str) -> list[dict[str, Any]]:
+        """Process user input and handle tool calls in a loop"""
+        with use_tracer(self.tracer), trace_span(
+            "agent.run", agent=self.name
+        ) as run_span:
+            if self.verbose:
+                print(f"\n[{self.name}] Received: {user_input}")
+            await self.history.add_message("user", user_input, None)
+
+            tool_dict = {tool.name: tool for tool in self.tools}
+
+            for turn in itertools.count():
+                run_span.attributes["turns"] = turn + 1
+                response = await self._run_turn(tool_dict, turn)
+                if response is not None:
+                    return response
+
+    async def _run_turn(self, tool_dict: dict[str, Tool], turn: int) -> Any:
+        """Make one API call and run its tools.
+
+        Returns the final response when it ends the loop, otherwise None.
+        """
+        params, merged_headers = self._prepare_request()
+
+        scheduler = ToolScheduler(
+            tool_dict, cache=self.result_cache, spill_store=self.spill_store
+        )
+        tool_tasks: dict[str, asyncio.Task] = {}
+
+        def start_tool(block: Any) -> None:
+            if block.id not in tool_tasks:
+                tool_tasks[block.id] = scheduler.submit(block)
 
+        with trace_span(
+            "agent.turn", agent=self.name, model=params["model"], turn=turn
+        ) as span:
             try:
-                mcp_tools = await setup_mcp_connections(
-                    self.mcp_servers, stack
+                response = await self._create_message(
+                    params, merged_headers, start_tool, span
                 )
-                self.tools.extend(mcp_tools)
-                return await self._agent_loop(user_input)
-            finally:
-                self.tools = original_tools
+                span.attributes.update(usage_attributes(response.usage))
+                # Blocks cut off mid-stream never see content_block_stop,
+                # so _complete_turn submits whatever wasn't started
+                if await self._complete_turn(
+                    response, scheduler, tool_tasks
+                ):
+                    return response
+                return None
+            except BaseException:
+                for task in tool_tasks.values():
+                    task.cancel()
+                raise
+
+    async def run_async(self, user_input: str) -> list[dict[str, Any]]:
+        """Run agent with MCP tools asynchronously.
+
+        MCP sessions come from the connection pool, so servers started by
+        an earlier run are reused instead of being spawned again. History
+        compaction started by a run finishes in the background on the
+        running loop, so later runs should use the same loop.
+        """
+        original_tools = list(self.tools)
+
+        try:
+            mcp_tools = await self.mcp_pool.get_tools(self.mcp_servers)
+            self.tools.extend(mcp_tools)
+            return await self._agent_loop(user_input)
+        finally:
+            self.tools = original_tools
 
     def run(self, user_input: str) -> list[dict[str, Any]]:
-        """Run agent synchronously"""
-        return asyncio.run(self.run_async(user_input))
+        """Run agent synchronously.
+
+        Every call runs on the same event loop, so the client's
+        connections are reused from one run to the next.
+        """
+        return self._runner.run(self.run_async(user_input))
+
+    def close(self) -> None:
+        """Close the event loop used by run, run_many and run_batch."""
+        self._runner.close()
+
+    async def _template(self) -> "Agent":
+        """Return a fork with MCP tools loaded, for forking per input."""
+        mcp_tools = await self.mcp_pool.get_tools(self.mcp_servers)
+        template = self.fork()
+        template.tools.extend(mcp_tools)
+        template.mcp_servers = []
+        return template
+
+    async def run_many_async(
+        self, inputs: Iterable[str], concurrency: int = 8
+    ) -> AsyncIterator[RunResult]:
+        """Run independent inputs in parallel, yielding in completion order.
+
+        Each input gets its own fork of this agent, so histories stay
+        isolated while the client and MCP sessions are shared. MCP tools
+        are loaded once for the whole batch. An input that fails yields a
+        RunResult with error set instead of stopping the others.
+
+        Args:
+            inputs: User inputs; consumed lazily, so this may be a generator
+            concurrency: Maximum number of inputs in flight at once
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+
+        template = await self._template()
+
+        async def run_one(index: int, user_input: str) -> RunResult:
+            agent = template.fork(f"{self.name}[{index}]")
+            try:
+                response = await agent._agent_loop(user_input)
+                return RunResult(index, user_input, response)
+            except Exception as e:
+                return RunResult(index, user_input, error=e)
+
+        pending: set[asyncio.Task] = set()
+        queued = enumerate(inputs)
+        try:
+            while True:
+                for index, user_input in queued:
+                    pending.add(
+                        asyncio.create_task(run_one(index, user_input))
+                    )
+                    if len(pending) >= concurrency:
+                        break
+                if not pending:
+                    return
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    def run_many(
+        self, inputs: Iterable[str], concurrency: int = 8
+    ) -> Iterator[RunResult]:
+        """Run independent inputs in parallel on the agent's event loop.
+
+        Synchronous counterpart of run_many_async: results are yielded in
+        completion order as they finish.
+        """
+        results = self.run_many_async(inputs, concurrency)
+        try:
+            while True:
+                try:
+                    yield self._runner.run(results.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            self._runner.run(results.aclose())
+
+    async def run_batch_async(
+        self,
+        inputs: list[str],
+        poll_interval: float = 5.0,
+        max_poll_interval: float = 60.0,
+    ) -> list[RunResult]:
+        """Run inputs through the Message Batches API, turn by turn.
+
+        Every agent's next request goes into one batch. When the batch
+        ends, each agent runs its tool calls and the agents that still
+        have work form the next batch. Slower than run_many but billed at
+        the batch discount, for workloads where latency doesn't matter.
+
+        Args:
+            inputs: User inputs, one fork of this agent per input
+            poll_interval: Initial delay between batch status checks
+            max_poll_interval: Upper bound on the backed-off delay
+
+        Returns:
+            One RunResult per input, in input order
+        """
+        template = await self._template()
+        tool_dict = {tool.name: tool for tool in template.tools}
+        results = [
+            RunResult(i, user_input) for i, user_input in enumerate(inputs)
+        ]
+        active = {}
+        for i, user_input in enumerate(inputs):
+            agent = template.fork(f"{self.name}[{i}]")
+            await agent.history.add_message("user", user_input, None)
+            active[str(i)] = agent
+
+        for wave in itertools.count():
+            if not active:
+                break
+            requests, headers = [], None
+            for custom_id, agent in active.items():
+                params, headers = agent._prepare_request()
+                requests.append({"custom_id": custom_id, "params": params})
+            try:
+                outcomes = await run_batch(
+                    self.client,
+                    requests,
+                    headers,
+                    poll_interval=poll_interval,
+                    max_poll_interval=max_poll_interval,
+                )
+            except Exception as e:
+                for custom_id in active:
+                    results[int(custom_id)].error = e
+                return results
+
+            async def advance(custom_id: str, agent: "Agent") -> bool:
+                outcome = outcomes.get(custom_id)
+                if outcome is None:
+                    raise RuntimeError("Request missing from batch results")
+                if outcome.type != "succeeded":
+                    raise RuntimeError(
+                        f"Batch request {outcome.type}: "
+                        f"{getattr(outcome, 'error', '')}"
+                    )
+                message = outcome.message
+                scheduler = ToolScheduler(
+                    tool_dict,
+                    cache=self.result_cache,
+                    spill_store=self.spill_store,
+                )
+                with use_tracer(self.tracer), trace_span(
+                    "agent.turn",
+                    agent=agent.name,
+                    model=message.model,
+                    turn=wave,
+                    batch=True,
+                    **usage_attributes(message.usage),
+                ):
+                    done = await agent._complete_turn(message, scheduler, {})
+                if done:
+                    results[int(custom_id)].response = message
+                return done
+
+            finished = await asyncio.gather(
+                *[advance(*item) for item in active.items()],
+                return_exceptions=True,
+            )
+            for custom_id, done in zip(list(active), finished):
+                if isinstance(done, BaseException):
+                    results[int(custom_id)].error = done
+                if done is not False:
+                    del active[custom_id]
+
+        return results
+
+    def run_batch(self, inputs: list[str], **kwargs: Any) -> list[RunResult]:
+        """Run inputs through the Message Batches API synchronously.
+
+        Accepts the same keyword arguments as run_batch_async.
+        """
+        return self._runner.run(self.run_batch_async(inputs, **kwargs))
@@ -0,0 +1,6 @@
+"""Benchmarks for the agents package.
+
+- history_truncate: MessageHistory.truncate on long histories
+- agent_loop: per-turn overhead against a stub Messages API, history
+  formatting, tool fan-out and MCP startup
+"""
@@ -0,0 +1,227 @@
+"""Benchmark the agent loop, history formatting, tool fan-out and MCP startup.
+
+Run with: python -m agents.benchmarks.agent_loop [--json results.json]
+
+The agent talks to a local stub of the Messages API, so the numbers
+reflect this package's own overhead rather than model latency. Every
+result is printed as "name value unit"; --json also writes them to a file
+for tracking trends in CI.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Any
+
+from anthropic import AsyncAnthropic
+
+from ..agent import Agent, ModelConfig
+from ..tools.base import Tool
+from ..tools.think import ThinkTool
+from ..utils.mcp_pool import MCPConnectionPool, _tool_catalogs
+from ..utils.tool_util import execute_tools
+from ..utils.tracing import Tracer
+from .history_truncate import build_history
+from .stub_server import StubMessagesServer, tool_loop_responder
+
+# A model name of its own keeps stub token counts out of real cache entries
+STUB_CONFIG = ModelConfig(model="benchmark-stub")
+
+Result = tuple[str, float, str]
+
+
+class SleepTool(Tool):
+    """Tool that waits a fixed time, standing in for I/O-bound tools."""
+
+    def __init__(self, seconds: float):
+        super().__init__(
+            name="sleep",
+            description="Wait for a while.",
+            input_schema={"type": "object", "properties": {}},
+        )
+        self.seconds = seconds
+
+    async def execute(self) -> str:
+        await asyncio.sleep(self.seconds)
+        return "done"
+
+
+class _Call:
+    """Minimal stand-in for a tool_use block."""
+
+    def __init__(self, call_id: str, name: str):
+        self.id = call_id
+        self.name = name
+        self.input = {}
+
+
+class _TurnRecorder:
+    """Span exporter keeping (turn duration, API latency) per turn."""
+
+    def __init__(self):
+        self.turns: list[tuple[float, float]] = []
+
+    def export(self, span: Any) -> None:
+        if span.name == "agent.turn":
+            self.turns.append((span.duration, span.attributes["api_latency"]))
+
+
+async def bench_turns(url: str, turns: int) -> list[Result]:
+    """Time full agent turns and the share spent outside the API call.
+
+    API latency includes the SDK's request building, which grows with the
+    history, so the last turn is reported alongside the mean.
+    """
+    recorder = _TurnRecorder()
+    agent = Agent(
+        name="bench",
+        system="Benchmark agent.",
+        tools=[ThinkTool()],
+        config=STUB_CONFIG,
+        client=AsyncAnthropic(api_key="stub", base_url=url, max_retries=0),
+        tracer=Tracer([recorder]),
+        mcp_pool=MCPConnectionPool(),
+    )
+    await agent.run_async("Start.")
+
+    per_turn = sum(d for d, _ in recorder.turns) / len(recorder.turns)
+    per_call = sum(a for _, a in recorder.turns) / len(recorder.turns)
+    return [
+        (f"agent.turn_ms[{turns} turns]", per_turn * 1000, "ms"),
+        (f"agent.api_call_ms[{turns} turns]", per_call * 1000, "ms"),
+        (
+            f"agent.last_api_call_ms[{turns} turns]",
+            recorder.turns[-1][1] * 1000,
+            "ms",
+        ),
+        (
+            f"agent.overhead_ms[{turns} turns]",
+            (per_turn - per_call) * 1000,
+            "ms",
+        ),
+    ]
+
+
+async def bench_formatting(num_turns: int, repeat: int = 200) -> list[Result]:
+    """Time building request params and encoding them on a long history."""
+    agent = Agent(
+        name="bench",
+        system="Benchmark agent.",
+        tools=[ThinkTool()],
+        config=STUB_CONFIG,
+        client=AsyncAnthropic(api_key="stub"),
+        mcp_pool=MCPConnectionPool(),
+    )
+    agent.history = await build_history(2 * num_turns, tokens_per_pair=20)
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        params = agent._prepare_message_params()
+    prepare = (time.perf_counter() - start) / repeat
+
+    start = time.perf_counter()
+    json.dumps(params["messages"])
+    encode = time.perf_counter() - start
+
+    return [
+        (f"history.prepare_params_us[{num_turns} turns]", prepare * 1e6, "us"),
+        (f"history.json_encode_ms[{num_turns} turns]", encode * 1000, "ms"),
+    ]
+
+
+async def bench_fan_out(calls: int, seconds: float = 0.02) -> list[Result]:
+    """Time many I/O-bound tool calls in one turn, parallel vs sequential."""
+    tool_dict = {"sleep": SleepTool(seconds)}
+    tool_calls = [_Call(f"call_{i}", "sleep") for i in range(calls)]
+
+    start = time.perf_counter()
+    await execute_tools(tool_calls, tool_dict, parallel=True)
+    parallel = time.perf_counter() - start
+
+    start = time.perf_counter()
+    await execute_tools(tool_calls, tool_dict, parallel=False)
+    sequential = time.perf_counter() - start
+
+    return [
+        (f"tools.parallel_ms[{calls} calls]", parallel * 1000, "ms"),
+        (f"tools.sequential_ms[{calls} calls]", sequential * 1000, "ms"),
+        (f"tools.speedup[{calls} calls]", sequential / parallel, "x"),
+    ]
+
+
+async def bench_mcp_startup(servers: int) -> list[Result]:
+    """Time loading tools from stdio calculator servers, cold and warm."""
+    configs = [
+        {
+            "type": "stdio",
+            "command": sys.executable,
+            "args": ["-m", "agents.tools.calculator_mcp"],
+            # Distinct env makes each config its own pooled server
+            "env": {**os.environ, "BENCHMARK_SERVER": str(i)},
+        }
+        for i in range(servers)
+    ]
+    pool = MCPConnectionPool()
+    for config in configs:
+        _tool_catalogs.pop(pool.key_for(config), None)
+    try:
+        start = time.perf_counter()
+        await pool.get_tools(configs)
+        cold = time.perf_counter() - start
+
+        start = time.perf_counter()
+        await pool.get_tools(configs)
+        warm = time.perf_counter() - start
+    finally:
+        await asyncio.to_thread(pool.close)
+
+    return [
+        (f"mcp.cold_start_ms[{servers} servers]", cold * 1000, "ms"),
+        (f"mcp.warm_start_ms[{servers} servers]", warm * 1000, "ms"),
+    ]
+
+
+async def run_all(turns: int, skip_mcp: bool) -> list[Result]:
+    results = []
+    with StubMessagesServer(tool_loop_responder(turns)) as server:
+        results += await bench_turns(server.url, turns)
+    for num_turns in (1_000, 10_000):
+        results += await bench_formatting(num_turns)
+    for calls in (1, 32):
+        results += await bench_fan_out(calls)
+    if not skip_mcp:
+        for servers in (1, 3):
+            results += await bench_mcp_startup(servers)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=50)
+    parser.add_argument("--json", help="Also write results to this file")
+    parser.add_argument(
+        "--skip-mcp", action="store_true", help="Skip MCP startup timing"
+    )
+    args = parser.parse_args()
+
+    results = asyncio.run(run_all(args.turns, args.skip_mcp))
+    for name, value, unit in results:
+        print(f"{name:<44} {value:>12.3f} {unit}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(
+                [
+                    {"name": name, "value": value, "unit": unit}
+                    for name, value, unit in results
+                ],
+                f,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
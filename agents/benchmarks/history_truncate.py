@@ -0,0 +1,87 @@
+"""Benchmark MessageHistory.truncate on long histories.
+
+Run with: python -m agents.benchmarks.history_truncate
+"""
+
+import asyncio
+import copy
+import time
+from types import SimpleNamespace
+
+from ..utils.history_util import (
+    TRUNCATION_NOTICE,
+    TRUNCATION_NOTICE_TOKENS,
+    MessageHistory,
+)
+
+CONTEXT_WINDOW = 180_000
+
+
+async def build_history(num_messages: int, tokens_per_pair: int) -> MessageHistory:
+    """Build a history of user/assistant pairs with synthetic usage."""
+    history = MessageHistory(
+        model="benchmark",
+        system="",
+        context_window_tokens=CONTEXT_WINDOW,
+        client=None,
+    )
+    running_input = 0
+    for i in range(num_messages // 2):
+        await history.add_message("user", f"question {i}")
+        running_input += tokens_per_pair - 10
+        usage = SimpleNamespace(input_tokens=running_input, output_tokens=10)
+        await history.add_message("assistant", f"answer {i}", usage)
+        running_input += 10
+    return history
+
+
+def legacy_truncate(history: MessageHistory) -> None:
+    """The previous pop(0)-per-pair implementation, for comparison."""
+    tokens = list(history.message_tokens)
+    while (
+        tokens
+        and len(history.messages) >= 2
+        and history.total_tokens > history.context_window_tokens
+    ):
+        history.messages.pop(0)
+        history.messages.pop(0)
+        input_tokens, output_tokens = tokens.pop(0)
+        history.total_tokens -= input_tokens + output_tokens
+        if history.messages and tokens:
+            original_input, original_output = tokens[0]
+            history.messages[0] = {
+                "role": "user",
+                "content": [{"type": "text", "text": TRUNCATION_NOTICE}],
+            }
+            tokens[0] = (TRUNCATION_NOTICE_TOKENS, original_output)
+            history.total_tokens += TRUNCATION_NOTICE_TOKENS - original_input
+
+
+def time_truncate(history: MessageHistory, truncate) -> tuple[float, int]:
+    """Time one truncation and return (milliseconds, messages kept)."""
+    start = time.perf_counter()
+    truncate(history)
+    elapsed = (time.perf_counter() - start) * 1000
+    return elapsed, len(history.messages)
+
+
+def main() -> None:
+    for num_messages in (1_000, 10_000):
+        # A huge tool result pushes the history far over the window
+        tokens_per_pair = 2 * CONTEXT_WINDOW // num_messages + 5
+        base = asyncio.run(build_history(num_messages, tokens_per_pair))
+        base.total_tokens += CONTEXT_WINDOW // 2
+        legacy = copy.deepcopy(base)
+
+        new_ms, new_kept = time_truncate(base, MessageHistory.truncate)
+        old_ms, old_kept = time_truncate(legacy, legacy_truncate)
+        assert new_kept == old_kept and base.total_tokens == legacy.total_tokens
+
+        print(
+            f"{num_messages:>6} messages: bisect {new_ms:8.3f} ms, "
+            f"pop(0) loop {old_ms:8.3f} ms, kept {new_kept} messages"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,316 @@
+"""Local stand-in for the Messages API that serves scripted responses.
+
+Point a client at it with base_url=server.url. It answers /v1/messages
+(streamed as server-sent events or as plain JSON) and
+/v1/messages/count_tokens, so an Agent runs end to end without network
+access or API costs. A responder raises StubError to send an API error.
+
+Message Batches are supported too: creating a batch answers every
+request with the responder right away (a StubError becomes an errored
+result), and the batch reports itself ended from its second retrieve on.
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable
+
+# Maps a request body to the content blocks of the reply
+Responder = Callable[[dict[str, Any]], list[dict[str, Any]]]
+
+
+class StubError(Exception):
+    """Raised by a responder to answer with an API error instead."""
+
+    def __init__(
+        self,
+        status: int,
+        error_type: str,
+        headers: dict[str, str] | None = None,
+    ):
+        super().__init__(error_type)
+        self.status = status
+        self.error_type = error_type
+        self.headers = headers or {}
+
+
+def tool_loop_responder(turns: int, tools_per_turn: int = 1) -> Responder:
+    """Reply with think tool calls until a conversation has `turns` turns.
+
+    The turn number is derived from the request's message count, so one
+    responder can serve many conversations at once.
+    """
+
+    def respond(body: dict[str, Any]) -> list[dict[str, Any]]:
+        turn = len(body["messages"]) // 2
+        if turn + 1 >= turns:
+            return [{"type": "text", "text": "Done."}]
+        return [
+            {
+                "type": "tool_use",
+                "id": f"toolu_{turn}_{i}",
+                "name": "think",
+                "input": {"thought": f"step {turn}.{i}"},
+            }
+            for i in range(tools_per_turn)
+        ]
+
+    return respond
+
+
+def _message(body: dict[str, Any], content: list[dict[str, Any]]) -> dict:
+    uses_tools = any(block["type"] == "tool_use" for block in content)
+    return {
+        "id": "msg_stub",
+        "type": "message",
+        "role": "assistant",
+        "model": body.get("model", "stub"),
+        "content": content,
+        "stop_reason": "tool_use" if uses_tools else "end_turn",
+        "stop_sequence": None,
+        "usage": {
+            "input_tokens": 10 * (len(body["messages"]) + 1),
+            "output_tokens": 10,
+        },
+    }
+
+
+def _sse_events(message: dict[str, Any]) -> bytes:
+    """Encode a message as the event stream the API would send."""
+    events = [
+        (
+            "message_start",
+            {
+                "type": "message_start",
+                "message": {**message, "content": [], "stop_reason": None},
+            },
+        )
+    ]
+    for index, block in enumerate(message["content"]):
+        if block["type"] == "text":
+            start = {"type": "text", "text": ""}
+            delta = {"type": "text_delta", "text": block["text"]}
+        else:
+            start = {**block, "input": {}}
+            delta = {
+                "type": "input_json_delta",
+                "partial_json": json.dumps(block["input"]),
+            }
+        events += [
+            (
+                "content_block_start",
+                {
+                    "type": "content_block_start",
+                    "index": index,
+                    "content_block": start,
+                },
+            ),
+            (
+                "content_block_delta",
+                {
+                    "type": "content_block_delta",
+                    "index": index,
+                    "delta": delta,
+                },
+            ),
+            (
+                "content_block_stop",
+                {"type": "content_block_stop", "index": index},
+            ),
+        ]
+    events += [
+        (
+            "message_delta",
+            {
+                "type": "message_delta",
+                "delta": {"stop_reason": message["stop_reason"]},
+                "usage": {"output_tokens": message["usage"]["output_tokens"]},
+            },
+        ),
+        ("message_stop", {"type": "message_stop"}),
+    ]
+    return "".join(
+        f"event: {name}\ndata: {json.dumps(data)}\n\n" for name, data in events
+    ).encode()
+
+
+def _batch_result(
+    responder: Responder, params: dict[str, Any]
+) -> dict[str, Any]:
+    try:
+        content = responder(params)
+    except StubError as e:
+        return {
+            "type": "errored",
+            "error": {
+                "type": "error",
+                "error": {"type": e.error_type, "message": "stub error"},
+            },
+        }
+    return {"type": "succeeded", "message": _message(params, content)}
+
+
+def _batch(batch_id: str, ended: bool, results_url: str) -> dict[str, Any]:
+    return {
+        "id": batch_id,
+        "type": "message_batch",
+        "processing_status": "ended" if ended else "in_progress",
+        "request_counts": {
+            "processing": 0,
+            "succeeded": 0,
+            "errored": 0,
+            "canceled": 0,
+            "expired": 0,
+        },
+        "created_at": "2025-01-01T00:00:00Z",
+        "expires_at": "2025-01-02T00:00:00Z",
+        "ended_at": "2025-01-01T00:00:01Z" if ended else None,
+        "archived_at": None,
+        "cancel_initiated_at": None,
+        "results_url": results_url if ended else None,
+    }
+
+
+class StubMessagesServer:
+    """Threaded HTTP server answering Messages API calls from a responder."""
+
+    def __init__(self, responder: Responder):
+        self.responder = responder
+        self.requests = 0
+        # Requests of each created batch, in creation order
+        self.batches: list[list[dict[str, Any]]] = []
+        # Per batch id: its result lines and how often it was retrieved
+        self._batch_results: dict[str, list[dict[str, Any]]] = {}
+        self._batch_polls: dict[str, int] = {}
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are written separately; without this the
+            # body waits on a delayed ACK and every call gains ~40 ms
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args: Any) -> None:
+                pass
+
+            def do_POST(self) -> None:
+                length = int(self.headers.get("content-length", 0))
+                body = json.loads(self.rfile.read(length))
+                stub.requests += 1
+                if self.path.endswith("/batches"):
+                    self._create_batch(body)
+                    return
+                if self.path.endswith("/count_tokens"):
+                    payload = json.dumps({"input_tokens": 100}).encode()
+                    content_type = "application/json"
+                else:
+                    try:
+                        content = stub.responder(body)
+                    except StubError as e:
+                        self._send_error(e)
+                        return
+                    message = _message(body, content)
+                    if body.get("stream"):
+                        payload = _sse_events(message)
+                        content_type = "text/event-stream"
+                    else:
+                        payload = json.dumps(message).encode()
+                        content_type = "application/json"
+                self._send(payload, content_type)
+
+            def do_GET(self) -> None:
+                path = self.path.split("?")[0].rstrip("/")
+                prefix = "/v1/messages/batches/"
+                batch_id = path.removeprefix(prefix).split("/")[0]
+                if (
+                    not path.startswith(prefix)
+                    or batch_id not in stub._batch_results
+                ):
+                    self._send_error(StubError(404, "not_found_error"))
+                    return
+                if path.endswith("/results"):
+                    payload = "".join(
+                        json.dumps(line) + "\n"
+                        for line in stub._batch_results[batch_id]
+                    ).encode()
+                    self._send(payload, "application/x-jsonl")
+                    return
+                stub._batch_polls[batch_id] += 1
+                self._send_batch(batch_id)
+
+            def _create_batch(self, body: dict[str, Any]) -> None:
+                batch_id = f"msgbatch_stub_{len(stub.batches)}"
+                stub.batches.append(body["requests"])
+                stub._batch_results[batch_id] = [
+                    {
+                        "custom_id": request["custom_id"],
+                        "result": _batch_result(
+                            stub.responder, request["params"]
+                        ),
+                    }
+                    for request in body["requests"]
+                ]
+                stub._batch_polls[batch_id] = 0
+                self._send_batch(batch_id)
+
+            def _send_batch(self, batch_id: str) -> None:
+                ended = stub._batch_polls[batch_id] >= 2
+                results_url = (
+                    f"{stub.url}/v1/messages/batches/{batch_id}/results"
+                )
+                payload = json.dumps(_batch(batch_id, ended, results_url))
+                self._send(payload.encode(), "application/json")
+
+            def _send(
+                self,
+                payload: bytes,
+                content_type: str,
+                status: int = 200,
+                headers: dict[str, str] | None = None,
+            ) -> None:
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("content-type", content_type)
+                self.send_header("content-length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _send_error(self, error: StubError) -> None:
+                payload = json.dumps(
+                    {
+                        "type": "error",
+                        "error": {
+                            "type": error.error_type,
+                            "message": "stub error",
+                        },
+                    }
+                ).encode()
+                self._send(
+                    payload, "application/json", error.status, error.headers
+                )
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, daemon=True
+        )
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubMessagesServer":
+        self._thread.start()
+        return self
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StubMessagesServer":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
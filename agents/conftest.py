@@ -0,0 +1,14 @@
+"""Shared pytest fixtures for the agents package."""
+
+import pytest
+
+from .utils import token_count
+
+
+@pytest.fixture(autouse=True)
+def isolated_token_cache(tmp_path, monkeypatch):
+    """Keep token counts made by tests out of the user's cache."""
+    monkeypatch.setattr(
+        token_count, "TOKEN_CACHE_FILE", tmp_path / "token_counts.json"
+    )
+    monkeypatch.setattr(token_count, "_counts", None)
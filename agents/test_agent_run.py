@@ -0,0 +1,114 @@
+"""Tests for running an Agent synchronously against the stub API."""
+
+from anthropic import AsyncAnthropic
+
+from .agent import Agent, ModelConfig
+from .benchmarks.stub_server import (
+    StubError,
+    StubMessagesServer,
+    tool_loop_responder,
+)
+from .tools.think import ThinkTool
+from .utils.history_util import SUMMARY_PROMPT
+
+STUB_CONFIG = ModelConfig(model="test-stub")
+
+
+def make_agent(url: str, **kwargs) -> Agent:
+    # Without retries a failed request surfaces instead of being re-sent
+    client = AsyncAnthropic(api_key="test", base_url=url, max_retries=0)
+    kwargs.setdefault("tools", [ThinkTool()])
+    kwargs.setdefault("config", STUB_CONFIG)
+    return Agent(
+        name="test", system="You are a test agent.", client=client, **kwargs
+    )
+
+
+def test_run_twice_reuses_event_loop():
+    with StubMessagesServer(tool_loop_responder(turns=2)) as server:
+        agent = make_agent(server.url)
+        try:
+            first = agent.run("first")
+            second = agent.run("second")
+        finally:
+            agent.close()
+
+    assert first.content[0].text == "Done."
+    assert second.content[0].text == "Done."
+
+
+def test_fork_runs_on_shared_loop():
+    with StubMessagesServer(tool_loop_responder(turns=2)) as server:
+        agent = make_agent(server.url)
+        try:
+            agent.run("parent")
+            response = agent.fork("child").run("child")
+            results = list(agent.run_many(["a", "b"], concurrency=2))
+            agent.run("parent again")
+        finally:
+            agent.close()
+
+    assert response.content[0].text == "Done."
+    assert [result.error for result in results] == [None, None]
+
+
+def test_compaction_survives_between_runs():
+    summaries = []
+
+    def respond(body):
+        if body.get("system") == SUMMARY_PROMPT:
+            summaries.append(body)
+            return [{"type": "text", "text": "The user said hello."}]
+        return [{"type": "text", "text": "Done."}]
+
+    config = ModelConfig(
+        model="test-stub", context_window_tokens=300, compaction_threshold=0.5
+    )
+    with StubMessagesServer(respond) as server:
+        agent = make_agent(server.url, tools=[], config=config)
+        try:
+            for i in range(12):
+                agent.run(f"hello {i}")
+        finally:
+            agent.close()
+
+    first = agent.history.messages[0]["content"][0]["text"]
+    assert len(summaries) == 1
+    assert first.startswith("[Summary of earlier conversation]")
+    assert "The user said hello." in first
+
+
+def test_run_batch_through_tool_waves():
+    def respond(body):
+        first = body["messages"][0]["content"]
+        if not isinstance(first, str):
+            first = first[0]["text"]
+        if first == "fail":
+            raise StubError(400, "invalid_request_error")
+        turn = len(body["messages"]) // 2
+        if turn < int(first):
+            return [
+                {
+                    "type": "tool_use",
+                    "id": f"toolu_{turn}",
+                    "name": "think",
+                    "input": {"thought": f"step {turn}"},
+                }
+            ]
+        return [{"type": "text", "text": f"Done after {turn} tools."}]
+
+    with StubMessagesServer(respond) as server:
+        agent = make_agent(server.url)
+        try:
+            results = agent.run_batch(
+                ["2", "fail", "0"], poll_interval=0.01
+            )
+        finally:
+            agent.close()
+        batch_sizes = [len(requests) for requests in server.batches]
+
+    assert results[0].response.content[0].text == "Done after 2 tools."
+    assert "errored" in str(results[1].error)
+    assert results[2].response.content[0].text == "Done after 0 tools."
+    # Every wave is one batch of the agents that still have work
+    assert batch_sizes == [3, 1, 1]
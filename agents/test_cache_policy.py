@@ -0,0 +1,226 @@
+"""Tests for where cache breakpoints are placed in each request."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from .agent import ModelConfig
+from .benchmarks.stub_server import StubMessagesServer
+from .test_agent_run import make_agent
+from .tools.base import Tool
+from .tools.think import ThinkTool
+from .utils.cache_policy import MAX_BREAKPOINTS, CachePolicy
+from .utils.history_util import SUMMARY_PROMPT, MessageHistory
+from .utils.tool_selection import ToolSelector
+
+TTL_ORDER = ["1h", "5m"]
+
+
+def markers(value):
+    """TTLs of the cache_control markers in value, in request order."""
+    found = []
+    if isinstance(value, dict):
+        if "cache_control" in value:
+            found.append(value["cache_control"].get("ttl", "5m"))
+        for item in value.values():
+            found += markers(item)
+    elif isinstance(value, list):
+        for item in value:
+            found += markers(item)
+    return found
+
+
+def request_markers(body):
+    # Tools, then system, then messages is the order the API reads them
+    return (
+        markers(body.get("tools"))
+        + markers(body.get("system"))
+        + markers(body["messages"])
+    )
+
+
+def make_history(cache_breakpoints, window=100_000):
+    return MessageHistory(
+        model="test",
+        system="",
+        context_window_tokens=window,
+        client=None,
+        cache_breakpoints=cache_breakpoints,
+    )
+
+
+def add_turns(history, count, start=0):
+    """Add question/answer pairs, formatting a request before each answer."""
+
+    async def add():
+        for i in range(start, start + count):
+            await history.add_message("user", f"question {i}")
+            history.format_for_api()
+            usage = SimpleNamespace(
+                input_tokens=history.total_tokens + 100, output_tokens=10
+            )
+            history.system_tokens = 0
+            await history.add_message("assistant", f"answer {i}", usage)
+
+    asyncio.run(add())
+
+
+def test_mark_prefix_marks_tools_and_system():
+    tools = [{"name": "a"}, {"name": "b"}]
+    policy = CachePolicy()
+
+    marked, system, remaining = policy.mark_prefix(tools, "Be brief.")
+
+    assert marked[:1] == tools[:1]
+    assert marked[-1]["cache_control"] == {"type": "ephemeral"}
+    assert "cache_control" not in tools[-1]
+    assert system[0]["text"] == "Be brief."
+    assert remaining == MAX_BREAKPOINTS - 2
+
+
+def test_mark_prefix_leaves_unused_breakpoints_to_messages():
+    policy = CachePolicy(cache_system=False)
+
+    assert policy.mark_prefix([], "Be brief.") == ([], "Be brief.", 4)
+    assert policy.mark_prefix([{"name": "a"}], "")[2] == 3
+
+
+def test_prefix_ttl_is_set_on_prefix_markers_only():
+    policy = CachePolicy(prefix_ttl="1h")
+
+    tools, system, _ = policy.mark_prefix([{"name": "a"}], "Be brief.")
+
+    assert markers(tools) + markers(system) == ["1h", "1h"]
+    assert markers(policy.fork().mark_prefix([], "x")[1]) == ["1h"]
+    with pytest.raises(ValueError):
+        CachePolicy(prefix_ttl="10m")
+
+
+def test_summary_totals_recorded_turns():
+    policy = CachePolicy()
+    assert policy.summary()["read_ratio"] == 0.0
+
+    policy.record(
+        SimpleNamespace(
+            input_tokens=10,
+            cache_read_input_tokens=None,
+            cache_creation_input_tokens=90,
+        )
+    )
+    turn = policy.record(
+        SimpleNamespace(
+            input_tokens=10,
+            cache_read_input_tokens=90,
+            cache_creation_input_tokens=0,
+        )
+    )
+
+    assert turn.read_ratio == 0.9
+    assert policy.summary() == {
+        "turns": 2,
+        "cache_read": 90,
+        "cache_write": 90,
+        "uncached": 20,
+        "read_ratio": 90 / 200,
+    }
+    assert policy.fork().summary()["turns"] == 0
+
+
+def test_ladder_marks_the_tails_of_recent_requests():
+    history = make_history(cache_breakpoints=2)
+    add_turns(history, 4)
+
+    messages = history.format_for_api()
+
+    marked = [
+        block["text"]
+        for message in messages
+        for block in message["content"]
+        if "cache_control" in block
+    ]
+    # The newest block and the tail of the request before it
+    assert marked == ["question 3", "answer 3"]
+
+
+def test_ladder_shrinks_when_fewer_breakpoints_are_left():
+    history = make_history(cache_breakpoints=4)
+    add_turns(history, 5)
+    assert len(markers(history.messages)) == 4
+
+    history.cache_breakpoints = 2
+    assert len(markers(history.format_for_api())) == 2
+
+
+def test_truncation_and_compaction_drop_dropped_markers():
+    history = make_history(cache_breakpoints=3, window=10_000)
+    add_turns(history, 6)
+
+    history.context_window_tokens = 300
+    history.truncate()
+    history._drop_pairs(1, "[Summary of earlier conversation]\nhi", 5)
+    add_turns(history, 2, start=6)
+    messages = history.format_for_api()
+
+    assert len(markers(messages)) <= 3
+    live = {id(block) for message in messages for block in message["content"]}
+    assert all(id(block) in live for block in history._cached_blocks)
+    assert markers(messages[-1]) == ["5m"]
+
+
+@pytest.mark.parametrize("prefix_ttl", [None, "1h"])
+def test_requests_never_exceed_breakpoint_limit(prefix_ttl):
+    requests = []
+
+    def respond(body):
+        if body.get("system") == SUMMARY_PROMPT:
+            return [{"type": "text", "text": "Earlier turns said hello."}]
+        requests.append(body)
+        tool_names = [tool["name"] for tool in body.get("tools", [])]
+        last = body["messages"][-1]["content"][-1]
+        if "think" in tool_names and last["type"] == "text":
+            return [
+                {
+                    "type": "tool_use",
+                    "id": f"toolu_{len(body['messages'])}",
+                    "name": "think",
+                    "input": {"thought": "step"},
+                }
+            ]
+        return [{"type": "text", "text": "Done."}]
+
+    tools = [ThinkTool()] + [
+        Tool(name, f"{name} things", {"type": "object", "properties": {}})
+        for name in ("weather", "email", "calendar")
+    ]
+    config = ModelConfig(
+        model="test-stub", context_window_tokens=600, compaction_threshold=0.5
+    )
+    inputs = ["hello", "think about it", "check the weather", "hello"] * 3
+    with StubMessagesServer(respond) as server:
+        agent = make_agent(
+            server.url,
+            tools=tools,
+            config=config,
+            tool_selector=ToolSelector(top_k=2),
+            cache_policy=CachePolicy(prefix_ttl=prefix_ttl),
+        )
+        try:
+            for user_input in inputs:
+                agent.run(user_input)
+        finally:
+            agent.close()
+
+    # The run covered every case: no tools, new tools, a full ladder
+    # across tool calls, and compaction or truncation of the history
+    assert not requests[0].get("tools")
+    assert any(len(request.get("tools", [])) > 1 for request in requests)
+    assert agent.history.messages[0]["content"][0]["text"].startswith("[")
+    assert max(map(len, map(request_markers, requests))) == MAX_BREAKPOINTS
+    for request in requests:
+        ttls = request_markers(request)
+        assert 1 <= len(ttls) <= MAX_BREAKPOINTS
+        # Longer TTLs must come before shorter ones
+        assert ttls == sorted(ttls, key=TTL_ORDER.index)
+        assert markers(request["messages"][-1]["content"][-1]) == ["5m"]
+    assert request_markers(requests[-1])[0] == (prefix_ttl or "5m")
@@ -0,0 +1,91 @@
+"""Tests for the calculator MCP server's expression compiler."""
+
+import pytest
+
+from .tools.calculator_mcp import (
+    MAX_EXPRESSION_LENGTH,
+    _evaluate,
+    _format,
+    calculate_batch,
+    compile_expression,
+)
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        "__import__('os')",
+        "(1).__class__",
+        "x.real",
+        "'a' * 3",
+        "[1, 2][0]",
+        "lambda: 1",
+        "1 < 2",
+        "x if x else 1",
+        "sqrt(x=4)",
+        "abs(1)(2)",
+        "print(1)",
+        "True + 1",
+        "1j",
+        "x := 1",
+        "_pow",
+        "_pow(2, 3)",
+        "_x + 1",
+    ],
+)
+def test_compiler_rejects_non_arithmetic(source):
+    with pytest.raises((ValueError, SyntaxError)):
+        compile_expression(source)
+
+
+def test_compiler_rejects_long_expressions():
+    with pytest.raises(ValueError, match="too long"):
+        compile_expression("1+" * MAX_EXPRESSION_LENGTH + "1")
+
+
+def test_compiler_returns_variable_names():
+    _, names = compile_expression("sqrt(x) ^ 2 + y * pi")
+
+    assert names == {"x", "y", "pi"}
+
+
+def test_batch_reports_errors_per_expression():
+    result = calculate_batch(
+        expressions=[
+            "2 ^ 10",
+            "9 ** 9 ** 9",
+            "open('x')",
+            "1 / 0",
+            "z",
+            "_pow",
+        ],
+        variables={"_pow": 2},
+    )
+
+    assert result.splitlines() == [
+        "[0] 2 ^ 10 = 1024",
+        "[1] 9 ** 9 ** 9: Error: Result too large",
+        "[2] open('x'): Error: Only math functions may be called",
+        "[3] 1 / 0: Error: division by zero",
+        "[4] z: Error: Unknown name(s): z",
+        "[5] _pow: Error: Unsupported name: _pow",
+    ]
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        "2**70 + x",
+        "x * 10**20",
+        "x * 2**-1",
+        "y ** x + 7 // x - (-7 % x)",
+        "sqrt(x) * pi + floor(y / x)",
+    ],
+)
+def test_vector_and_scalar_paths_agree(source):
+    xs, y = [1, 2, 3], 5
+
+    vector = _evaluate(source, {"x": xs, "y": y})
+    scalars = [_evaluate(source, {"x": x, "y": y}) for x in xs]
+
+    assert _format(vector) == pytest.approx([_format(v) for v in scalars])
@@ -0,0 +1,89 @@
+"""Tests for MCP connections and replicated stdio servers."""
+
+import asyncio
+import sys
+
+import pytest
+
+from .utils.connections import (
+    MCPConnection,
+    MCPConnectionHTTP,
+    MCPConnectionReplicas,
+    MCPConnectionSSE,
+    MCPConnectionStdio,
+    MCPTransportConnection,
+    create_mcp_connection,
+)
+
+CALCULATOR = {
+    "command": sys.executable,
+    "args": ["-m", "agents.tools.calculator_mcp"],
+}
+
+
+def test_transport_without_rw_context_fails_at_construction():
+    class NoTransport(MCPTransportConnection):
+        pass
+
+    with pytest.raises(TypeError, match="_create_rw_context"):
+        NoTransport()
+
+
+def test_only_single_server_connections_are_transports():
+    for transport in (MCPConnectionStdio, MCPConnectionSSE, MCPConnectionHTTP):
+        assert issubclass(transport, MCPTransportConnection)
+    assert issubclass(MCPConnectionReplicas, MCPConnection)
+    assert not issubclass(MCPConnectionReplicas, MCPTransportConnection)
+
+    class NoLifecycle(MCPConnection):
+        pass
+
+    with pytest.raises(TypeError, match="__aenter__"):
+        NoLifecycle()
+
+
+@pytest.mark.parametrize("replicas", ["2", 0, -1, 1.5, True])
+def test_replicas_must_be_positive_integer(replicas):
+    with pytest.raises(ValueError, match="replicas"):
+        create_mcp_connection({**CALCULATOR, "replicas": replicas})
+
+
+def test_replicas_spread_calls_and_close():
+    connection = create_mcp_connection({**CALCULATOR, "replicas": 2})
+    assert isinstance(connection, MCPConnectionReplicas)
+
+    async def main():
+        async with connection:
+            results = await asyncio.gather(
+                *[
+                    connection.call_tool(
+                        "calculator",
+                        {"number1": i, "number2": 1, "operator": "+"},
+                    )
+                    for i in range(6)
+                ]
+            )
+            assert connection.in_flight == [0, 0]
+        return [result.content[0].text for result in results]
+
+    texts = asyncio.run(main())
+
+    assert texts == [f"Result: {i + 1}" for i in range(6)]
+    assert all(replica.session is None for replica in connection.replicas)
+
+
+def test_hung_replica_shuts_down_the_others():
+    healthy = MCPConnectionStdio(CALCULATOR["command"], CALCULATOR["args"])
+    hung = MCPConnectionStdio(
+        sys.executable, ["-c", "import time; time.sleep(60)"]
+    )
+    connection = MCPConnectionReplicas([healthy, hung])
+
+    async def main():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(connection.__aenter__(), timeout=3)
+
+    asyncio.run(main())
+
+    assert healthy.session is None
+    assert hung.session is None
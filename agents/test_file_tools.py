@@ -0,0 +1,252 @@
+"""Tests for the file tools and the caching of their results."""
+
+import asyncio
+import os
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from .tools.file_tools import FileReadTool, FileWriteTool
+from .utils import dir_listing
+from .utils.result_cache import ToolResultCache
+from .utils.tool_util import execute_tools
+
+
+def call(call_id: str, name: str, **tool_input) -> SimpleNamespace:
+    return SimpleNamespace(id=call_id, name=name, input=tool_input)
+
+
+def run_calls(calls, tools, cache=None):
+    tool_dict = {tool.name: tool for tool in tools}
+    return asyncio.run(execute_tools(calls, tool_dict, cache=cache))
+
+
+def test_recursive_list_sees_new_file_in_subdirectory(tmp_path):
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "a.py").write_text("a\n")
+    tools = [FileReadTool(), FileWriteTool()]
+    cache = ToolResultCache()
+    listing = {
+        "operation": "list",
+        "path": str(tmp_path),
+        "pattern": "**/*.py",
+    }
+
+    first = run_calls([call("1", "file_read", **listing)], tools, cache)
+    run_calls(
+        [
+            call(
+                "2",
+                "file_write",
+                operation="write",
+                path=str(tmp_path / "sub" / "b.py"),
+                content="b\n",
+            )
+        ],
+        tools,
+        cache,
+    )
+    second = run_calls([call("3", "file_read", **listing)], tools, cache)
+
+    assert "b.py" not in first[0]["content"]
+    assert "b.py" in second[0]["content"]
+
+
+def test_file_reads_are_still_cached(tmp_path):
+    path = tmp_path / "a.txt"
+    path.write_text("hello\n")
+    cache = ToolResultCache()
+    read = {"operation": "read", "path": str(path)}
+
+    for call_id in ("1", "2"):
+        run_calls(
+            [call(call_id, "file_read", **read)], [FileReadTool()], cache
+        )
+
+    assert cache.hits == 1
+
+
+def write(path, content: str) -> str:
+    return asyncio.run(
+        FileWriteTool().execute(
+            operation="write", path=str(path), content=content
+        )
+    )
+
+
+def test_write_goes_through_symlink(tmp_path):
+    target = tmp_path / "target.txt"
+    target.write_text("hello\n")
+    link = tmp_path / "link.txt"
+    link.symlink_to(target)
+
+    write(link, "changed\n")
+
+    assert link.is_symlink()
+    assert target.read_text() == "changed\n"
+
+
+def test_write_keeps_mode_and_honors_umask(tmp_path):
+    existing = tmp_path / "script.sh"
+    existing.write_text("echo hi\n")
+    existing.chmod(0o750)
+    mask = os.umask(0o027)
+    try:
+        write(existing, "echo bye\n")
+        write(tmp_path / "new.txt", "new\n")
+    finally:
+        os.umask(mask)
+
+    assert existing.stat().st_mode & 0o777 == 0o750
+    assert (tmp_path / "new.txt").stat().st_mode & 0o777 == 0o640
+    assert not list(tmp_path.glob(".*.tmp"))
+
+
+def list_files(path, **options) -> str:
+    return asyncio.run(
+        FileReadTool().execute(operation="list", path=str(path), **options)
+    )
+
+
+def test_list_pages_resume_after_cursor(tmp_path):
+    for name in ("a", "b", "c"):
+        (tmp_path / name).mkdir()
+        for i in range(3):
+            (tmp_path / name / f"{i}.txt").write_text("x\n")
+
+    pages, cursor = [], ""
+    while True:
+        page = list_files(tmp_path, pattern="**/*.txt", limit=4, cursor=cursor)
+        lines = page.splitlines()
+        if lines[-1].startswith("[More entries"):
+            cursor = lines.pop().split('cursor="')[1].rstrip('"]')
+        else:
+            cursor = ""
+        pages.append(lines)
+        if not cursor:
+            break
+
+    assert [len(lines) for lines in pages] == [4, 4, 1]
+    assert sum(pages, []) == [
+        f"📄 {name}/{i}.txt" for name in ("a", "b", "c") for i in range(3)
+    ]
+
+
+def test_list_skips_gitignored_paths(tmp_path):
+    (tmp_path / ".gitignore").write_text("build/\n*.log\n!keep.log\n")
+    (tmp_path / "build").mkdir()
+    (tmp_path / "build" / "out.py").write_text("x\n")
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / ".gitignore").write_text("/generated.py\n")
+    for name in ("src/main.py", "src/generated.py", "debug.log", "keep.log"):
+        (tmp_path / name).write_text("x\n")
+
+    listing = list_files(tmp_path, pattern="**").splitlines()
+
+    assert sorted(listing) == [
+        "📁 src/",
+        "📄 keep.log",
+        "📄 src/main.py",
+    ]
+
+
+def edit(path, edits) -> str:
+    return asyncio.run(
+        FileWriteTool().execute(operation="edit", path=str(path), edits=edits)
+    )
+
+
+def test_multi_edit_applies_all_edits_to_original(tmp_path):
+    path = tmp_path / "a.py"
+    path.write_text("alpha beta gamma\n")
+
+    result = edit(
+        path,
+        [
+            {"old_text": "alpha", "new_text": "beta"},
+            {"old_text": "beta", "new_text": "gamma"},
+        ],
+    )
+
+    assert result == f"Successfully applied 2 edits to {path}"
+    # Edits don't see each other's output
+    assert path.read_text() == "beta gamma gamma\n"
+
+
+def test_multi_edit_with_missing_text_changes_nothing(tmp_path):
+    path = tmp_path / "a.py"
+    path.write_text("alpha beta\n")
+
+    result = edit(
+        path,
+        [
+            {"old_text": "alpha", "new_text": "one"},
+            {"old_text": "delta", "new_text": "four"},
+        ],
+    )
+
+    assert result.startswith("Error: 1 of 2 edits not found")
+    assert "'delta'" in result
+    assert path.read_text() == "alpha beta\n"
+
+
+def test_multi_edit_conflicts_are_rejected(tmp_path):
+    path = tmp_path / "a.py"
+    path.write_text("abcd\n")
+
+    duplicate = edit(
+        path,
+        [
+            {"old_text": "ab", "new_text": "x"},
+            {"old_text": "ab", "new_text": "y"},
+        ],
+    )
+    # "bcd" overlaps the "abc" match, so it is never found
+    overlapping = edit(
+        path,
+        [
+            {"old_text": "abc", "new_text": "x"},
+            {"old_text": "bcd", "new_text": "y"},
+        ],
+    )
+
+    assert duplicate == "Error: edits contains the same old_text twice"
+    assert overlapping.startswith("Error: 1 of 2 edits not found")
+    assert path.read_text() == "abcd\n"
+
+
+def test_concurrent_listings_share_bounded_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(dir_listing, "MAX_CACHED_SNAPSHOTS", 3)
+    monkeypatch.setattr(dir_listing, "_snapshots", OrderedDict())
+    for i in range(10):
+        (tmp_path / f"d{i}").mkdir()
+        (tmp_path / f"d{i}" / "f.txt").write_text("x\n")
+
+    def list_tree(_) -> list:
+        return list(dir_listing.walk(str(tmp_path), "**"))
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        listings = list(pool.map(list_tree, range(200)))
+
+    assert all(listing == listings[0] for listing in listings)
+    assert len(listings[0]) == 20
+    assert len(dir_listing._snapshots) <= 3
+
+
+def test_list_skips_unreadable_directories(tmp_path, monkeypatch):
+    for name in ("a", "b", "c"):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "f.txt").write_text("x\n")
+    # chmod 000 doesn't stop root, so make the scan itself fail
+    scandir = os.scandir
+
+    def failing_scandir(path):
+        if os.path.basename(path) == "b":
+            raise PermissionError(13, "Permission denied", path)
+        return scandir(path)
+
+    monkeypatch.setattr(dir_listing.os, "scandir", failing_scandir)
+
+    listing = list_files(tmp_path, pattern="**/*.txt").splitlines()
+
+    assert listing == ["📄 a/f.txt", "📄 c/f.txt"]
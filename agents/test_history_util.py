@@ -0,0 +1,114 @@
+"""Tests for truncating message history."""
+
+import asyncio
+import copy
+import random
+from types import SimpleNamespace
+
+from .benchmarks.history_truncate import legacy_truncate
+from .utils.history_util import TRUNCATION_NOTICE, MessageHistory
+
+
+def build_history(pair_tokens: list[tuple[int, int]], window: int):
+    """Build a history whose pairs report the given (input, output) usage."""
+    history = MessageHistory(
+        model="test",
+        system="",
+        context_window_tokens=window,
+        client=None,
+        enable_caching=False,
+    )
+
+    async def add_pairs():
+        running = 0
+        for i, (input_tokens, output_tokens) in enumerate(pair_tokens):
+            await history.add_message("user", f"question {i}")
+            running += input_tokens
+            usage = SimpleNamespace(
+                input_tokens=running, output_tokens=output_tokens
+            )
+            await history.add_message("assistant", f"answer {i}", usage)
+            running += output_tokens
+
+    asyncio.run(add_pairs())
+    return history
+
+
+def test_truncate_matches_legacy_loop():
+    rng = random.Random(0)
+    for _ in range(200):
+        pair_tokens = [
+            (rng.randint(1, 500), rng.randint(1, 200))
+            for _ in range(rng.randint(1, 40))
+        ]
+        total = sum(map(sum, pair_tokens))
+        history = build_history(pair_tokens, rng.randint(1, total + 100))
+        # Sometimes a huge tool result pushes far past the window
+        history.total_tokens += rng.choice([0, 0, total])
+        legacy = copy.deepcopy(history)
+
+        history.truncate()
+        legacy_truncate(legacy)
+
+        assert history.messages == legacy.messages
+        assert history.total_tokens == legacy.total_tokens
+
+
+def test_truncate_twice_keeps_token_index_consistent():
+    history = build_history([(100, 10)] * 10, window=1_000)
+
+    for window in (600, 300):
+        history.context_window_tokens = window
+        history.truncate()
+
+        assert history.total_tokens <= window
+        assert history.total_tokens == sum(map(sum, history.message_tokens))
+        assert len(history.messages) == 2 * len(history.message_tokens)
+        assert history.messages[0]["content"][0]["text"] == TRUNCATION_NOTICE
+
+
+def test_format_for_api_moves_marker_without_rebuilding():
+    history = MessageHistory(
+        model="test", system="", context_window_tokens=1_000, client=None
+    )
+    asyncio.run(history.add_message("user", "question 0"))
+
+    first = history.format_for_api()
+    blocks = [message["content"][0] for message in first]
+    assert first is history.messages
+    assert first[0]["content"][0]["cache_control"] == {"type": "ephemeral"}
+    # Formatting again without new messages changes nothing
+    assert history.format_for_api() == [
+        {
+            "role": "user",
+            "content": [
+                {
+                    "type": "text",
+                    "text": "question 0",
+                    "cache_control": {"type": "ephemeral"},
+                }
+            ],
+        }
+    ]
+
+    asyncio.run(history.add_message("assistant", "answer 0"))
+    second = history.format_for_api()
+
+    # Same list and same blocks: only the marker moved to the newest one
+    assert second is first
+    assert second[0]["content"][0] is blocks[0]
+    assert "cache_control" not in second[0]["content"][0]
+    assert second[1]["content"][0]["cache_control"] == {"type": "ephemeral"}
+
+
+def test_format_for_api_without_caching_leaves_blocks_unmarked():
+    history = build_history([(100, 10)] * 3, window=1_000)
+
+    messages = history.format_for_api()
+
+    assert messages is history.messages
+    assert not any(
+        "cache_control" in block
+        for message in messages
+        for block in message["content"]
+    )
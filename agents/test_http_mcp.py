@@ -0,0 +1,109 @@
+"""Tests for MCP over streamable HTTP against an in-process server."""
+
+import asyncio
+import socket
+import threading
+import time
+
+import httpcore
+import pytest
+import uvicorn
+from mcp.server.fastmcp import FastMCP
+
+from .utils.connections import _http_pools, create_mcp_connection
+
+
+@pytest.fixture(scope="module")
+def mcp_url():
+    server_mcp = FastMCP("test")
+
+    @server_mcp.tool()
+    async def echo(x: int) -> str:
+        return f"x={x}"
+
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    server = uvicorn.Server(
+        uvicorn.Config(server_mcp.streamable_http_app(), log_level="error")
+    )
+    thread = threading.Thread(
+        target=server.run, kwargs={"sockets": [sock]}, daemon=True
+    )
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    yield f"http://127.0.0.1:{port}/mcp"
+    server.should_exit = True
+    thread.join(timeout=5)
+
+
+class PoolSpy:
+    """Records the pooled HTTP connections that POST requests went out on.
+
+    GETs have a connection of their own; only the POSTs share the pool.
+    """
+
+    def __init__(self):
+        self.connections = set()
+        self.most_open = 0
+
+
+@pytest.fixture
+def pool_spy(monkeypatch):
+    spy = PoolSpy()
+    handle = httpcore.AsyncConnectionPool.handle_async_request
+
+    async def record(self, request):
+        response = await handle(self, request)
+        if request.method == b"POST":
+            spy.connections.update(self.connections)
+            spy.most_open = max(spy.most_open, len(self.connections))
+        return response
+
+    monkeypatch.setattr(
+        httpcore.AsyncConnectionPool, "handle_async_request", record
+    )
+    return spy
+
+
+def test_sequential_calls_reuse_connections(mcp_url, pool_spy):
+    async def main():
+        connection = create_mcp_connection({"type": "http", "url": mcp_url})
+        async with connection:
+            return [
+                (await connection.call_tool("echo", {"x": i})).content[0].text
+                for i in range(20)
+            ]
+
+    texts = asyncio.run(main())
+
+    assert texts == [f"x={i}" for i in range(20)]
+    # Each reply is drained, so its connection goes back to the pool
+    # instead of every call opening a new one
+    assert len(pool_spy.connections) <= 3
+
+
+def test_sessions_share_pool_until_last_closes(mcp_url, pool_spy):
+    async def main():
+        config = {"type": "http", "url": mcp_url, "max_connections": 2}
+        first = create_mcp_connection(config)
+        second = create_mcp_connection(
+            {**config, "type": "streamable_http"}
+        )
+        async with first, second:
+            loop = asyncio.get_running_loop()
+            users = [entry[1] for entry in _http_pools[loop].values()]
+            await asyncio.gather(
+                *[
+                    (first if i % 2 else second).call_tool("echo", {"x": i})
+                    for i in range(20)
+                ]
+            )
+        return users, dict(_http_pools.get(loop, {}))
+
+    users, pools_after = asyncio.run(main())
+
+    assert users == [2]
+    assert pool_spy.most_open <= 2
+    assert pools_after == {}
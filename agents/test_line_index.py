@@ -0,0 +1,36 @@
+"""Tests for ranged reads through the line-offset index."""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from .utils import line_index
+from .utils.line_index import read_lines
+
+
+def test_read_lines_windows(tmp_path):
+    path = tmp_path / "a.txt"
+    path.write_text("".join(f"line {i}\n" for i in range(1000)))
+
+    assert read_lines(str(path), 998, 5) == "line 998\nline 999\n"
+    assert read_lines(str(path), 10, 2) == "line 10\nline 11\n"
+    assert read_lines(str(path), 2000, 1) == ""
+
+
+def test_concurrent_reads_share_bounded_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(line_index, "MAX_CACHED_INDEXES", 2)
+    monkeypatch.setattr(line_index, "_indexes", type(line_index._indexes)())
+    paths = []
+    for i in range(8):
+        path = tmp_path / f"{i}.txt"
+        path.write_text("".join(f"{i}:{n}\n" for n in range(200)))
+        paths.append(str(path))
+
+    def read(n: int) -> str:
+        return read_lines(paths[n % len(paths)], n % 200, 1)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(read, range(2000)))
+
+    assert results == [
+        f"{n % len(paths)}:{n % 200}\n" for n in range(2000)
+    ]
+    assert len(line_index._indexes) <= 2
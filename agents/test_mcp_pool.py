@@ -0,0 +1,58 @@
+"""Tests for the MCP connection pool."""
+
+import asyncio
+import sys
+import time
+
+import pytest
+
+from .utils.mcp_pool import MCPConnectionPool
+
+# A "server" that starts but never answers the initialize request
+HUNG_SERVER = {
+    "type": "stdio",
+    "command": sys.executable,
+    "args": ["-c", "import time; time.sleep(60)"],
+}
+
+
+@pytest.fixture
+def pool():
+    pool = MCPConnectionPool(startup_timeout=0.5)
+    yield pool
+    pool.close()
+
+
+async def wait_for_entries_to_clear(pool, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while pool._entries and time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+
+
+def test_hung_startup_is_discarded_and_retried(pool):
+    async def main():
+        for _ in range(2):
+            started = time.monotonic()
+            assert await pool.get_tools([HUNG_SERVER]) == []
+            # Each attempt waits out its own timeout, not a stale entry's
+            assert time.monotonic() - started < 2
+            await wait_for_entries_to_clear(pool)
+            assert pool._entries == {}
+
+    asyncio.run(main())
+
+
+def test_discard_releases_waiters_on_unready_entry(pool):
+    async def main():
+        key = pool.key_for(HUNG_SERVER)
+
+        async def acquire_then_discard():
+            waiter = asyncio.create_task(pool._acquire(key))
+            await asyncio.sleep(0.2)
+            await pool._discard(pool._entries[key])
+            return await asyncio.wait_for(waiter, timeout=5)
+
+        with pytest.raises(ConnectionError):
+            await pool._submit(acquire_then_discard())
+
+    asyncio.run(main())
@@ -0,0 +1,49 @@
+"""Tests for converting MCP tool results."""
+
+import asyncio
+import re
+from types import SimpleNamespace
+
+from .tools.mcp_tool import MAX_TEXT_CHARS, MCPTool
+from .utils.spill_store import SpillStore
+from .utils.tool_util import execute_tools
+
+
+class TextConnection:
+    """Stands in for an MCP connection that returns one text item."""
+
+    def __init__(self, text: str):
+        self.text = text
+
+    async def call_tool(self, name, arguments):
+        return SimpleNamespace(
+            content=[SimpleNamespace(type="text", text=self.text)]
+        )
+
+
+def run_tool(text: str, spill_store=None) -> str:
+    tool = MCPTool("fetch", "", {"type": "object"}, TextConnection(text))
+    call = SimpleNamespace(id="1", name="fetch", input={})
+    results = asyncio.run(
+        execute_tools([call], {"fetch": tool}, spill_store=spill_store)
+    )
+    return results[0]["content"]
+
+
+def test_long_text_is_cut_without_spill_store():
+    content = run_tool("x" * (MAX_TEXT_CHARS + 10))
+
+    assert content.startswith("x" * MAX_TEXT_CHARS)
+    assert content.endswith("[... 10 more characters truncated]")
+
+
+def test_spill_store_keeps_full_text(tmp_path):
+    text = "".join(f"line {i}\n" for i in range(20_000))
+    assert len(text) > MAX_TEXT_CHARS
+    store = SpillStore(tmp_path, threshold=1_000, preview_chars=100)
+
+    content = run_tool(text, spill_store=store)
+
+    handle = re.search(r'handle="([^"]+)"', content).group(1)
+    stored, _, _ = store.read(handle)
+    assert stored == text
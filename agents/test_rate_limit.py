@@ -0,0 +1,59 @@
+"""Tests for pacing Messages API calls with the rate-limit governor."""
+
+from anthropic import AsyncAnthropic
+
+from .agent import Agent, ModelConfig
+from .benchmarks.stub_server import StubError, StubMessagesServer
+from .utils.rate_limit import RateLimitGovernor
+
+
+def failing_responder(errors: list[StubError]):
+    calls = []
+
+    def respond(body):
+        calls.append(body)
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return [{"type": "text", "text": "Done."}]
+
+    return respond, calls
+
+
+def run_agent(responder, **client_options) -> tuple[Agent, object]:
+    with StubMessagesServer(responder) as server:
+        client = AsyncAnthropic(
+            api_key="test", base_url=server.url, **client_options
+        )
+        agent = Agent(
+            name="test",
+            system="You are a test agent.",
+            client=client,
+            config=ModelConfig(model="test-stub"),
+            rate_limiter=RateLimitGovernor(),
+        )
+        try:
+            response = agent.run("hello")
+        finally:
+            agent.close()
+    return agent, response
+
+
+def test_429s_go_to_the_governor_not_sdk_retries():
+    rate_limited = StubError(429, "rate_limit_error", {"retry-after": "0.1"})
+    respond, calls = failing_responder([rate_limited, rate_limited])
+
+    agent, response = run_agent(respond, max_retries=2)
+
+    # One request per governor attempt; the SDK retried none of them
+    assert len(calls) == 3
+    assert response.content[0].text == "Done."
+
+
+def test_server_errors_are_retried_up_to_client_max_retries():
+    overloaded = StubError(529, "overloaded_error")
+    respond, calls = failing_responder([overloaded])
+
+    agent, response = run_agent(respond, max_retries=1)
+
+    assert len(calls) == 2
+    assert response.content[0].text == "Done."
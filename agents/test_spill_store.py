@@ -0,0 +1,68 @@
+"""Tests for the spill store and paging through it with read_spilled."""
+
+import asyncio
+import json
+import os
+import re
+
+from .tools.read_spilled import ReadSpilledTool
+from .utils.spill_store import SpillStore
+
+
+def read_all_pages(tool: ReadSpilledTool, handle: str, offset: int = 0):
+    """Follow read_spilled's continuation offsets to the end."""
+    pages = []
+    while True:
+        result = asyncio.run(tool.execute(handle=handle, offset=offset))
+        page, status = result.rsplit("\n[", 1)
+        pages.append(page)
+        resume = re.search(r"continue with offset=(\d+)", status)
+        if not resume:
+            return pages
+        offset = int(resume.group(1))
+
+
+def test_one_line_output_is_paged_in_bounded_pages(tmp_path):
+    store = SpillStore(tmp_path, threshold=20_000, preview_chars=100)
+    rows = [{"id": i, "name": "é" * 5} for i in range(50_000)]
+    text = json.dumps({"rows": rows})
+    assert "\n" not in text
+
+    notice = store.spill_text(text)
+    handle = re.search(r'handle="([^"]+)"', notice).group(1)
+    resume = int(re.search(r"offset=(\d+)", notice).group(1))
+    pages = read_all_pages(ReadSpilledTool(store), handle, resume)
+
+    assert max(len(page) for page in pages) <= store.threshold
+    assert text[: store.preview_chars] + "".join(pages) == text
+
+
+def test_pages_split_only_on_newlines(tmp_path):
+    store = SpillStore(tmp_path)
+    # Characters str.splitlines() treats as line breaks, but \n doesn't
+    lines = [f"row {i}\r\x0c {'x' * 50}\n" for i in range(2_000)]
+    text = "".join(lines)
+    handle = store.put(text)
+
+    pages = read_all_pages(ReadSpilledTool(store), handle)
+
+    assert len(pages) > 1
+    assert all(page.endswith("\n") for page in pages)
+    assert "".join(pages) == text
+
+
+def test_store_evicts_least_recently_used(tmp_path):
+    store = SpillStore(tmp_path, max_store_bytes=25_000)
+    old = store.put("a" * 10_000)
+    used = store.put("b" * 10_000)
+    # Reading marks an output as recently used
+    for handle, age in ((old, 200), (used, 100)):
+        path = store._path(handle)
+        os.utime(path, (0, os.stat(path).st_mtime - age))
+    store.read(used, 0, 10)
+
+    new = store.put("c" * 10_000)
+
+    assert not store._path(old).exists()
+    assert store._path(used).exists()
+    assert store._path(new).exists()
@@ -0,0 +1,38 @@
+"""Tests for counting system prompt tokens."""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+from .utils.token_count import count_system_tokens
+
+
+class SlowSyncMessages:
+    """Sync count_tokens that blocks like a real HTTP round trip."""
+
+    def count_tokens(self, **kwargs):
+        time.sleep(0.2)
+        return SimpleNamespace(input_tokens=43)
+
+
+def test_sync_client_count_does_not_block_loop():
+    client = SimpleNamespace(messages=SlowSyncMessages())
+    ticks = []
+
+    async def tick():
+        while True:
+            ticks.append(time.monotonic())
+            await asyncio.sleep(0.01)
+
+    async def main():
+        ticker = asyncio.create_task(tick())
+        try:
+            return await count_system_tokens(client, "test", "system")
+        finally:
+            ticker.cancel()
+
+    tokens = asyncio.run(main())
+
+    assert tokens == 42
+    # The loop kept running while the count was in flight
+    assert len(ticks) > 5
@@ -0,0 +1,165 @@
+"""Tests for relevance-based tool selection."""
+
+from .tools.base import Tool
+from .utils.tool_selection import ToolIndex, ToolSelector
+
+
+def make_tool(name, description, **properties):
+    return Tool(
+        name=name,
+        description=description,
+        input_schema={
+            "type": "object",
+            "properties": {
+                key: {"type": "string", "description": value}
+                for key, value in properties.items()
+            },
+        },
+    )
+
+
+TOOLS = [
+    make_tool("read_file", "Read a file from disk", path="File path"),
+    make_tool("write_file", "Write text to a file", path="File path"),
+    make_tool("web_search", "Search the web for pages", query="Query"),
+    make_tool("calculator", "Evaluate a math expression", expr="Formula"),
+    make_tool("send_email", "Send an email message", to="Recipient"),
+    make_tool("list_directory", "List entries in a folder", path="Folder"),
+]
+
+
+def text(message, role="user"):
+    return {"role": role, "content": [{"type": "text", "text": message}]}
+
+
+def tool_call(name, tool_input=None, tool_id="call_1"):
+    return [
+        {
+            "role": "assistant",
+            "content": [
+                {
+                    "type": "tool_use",
+                    "id": tool_id,
+                    "name": name,
+                    "input": tool_input or {},
+                }
+            ],
+        },
+        {
+            "role": "user",
+            "content": [
+                {"type": "tool_result", "tool_use_id": tool_id, "content": ""}
+            ],
+        },
+    ]
+
+
+def names(tools):
+    return [tool.name for tool in tools]
+
+
+def test_index_ranks_name_matches_first():
+    index = ToolIndex(TOOLS)
+
+    # Both file tools mention files; the name match decides the order
+    assert index.rank("please write the file", 2) == [
+        "write_file",
+        "read_file",
+    ]
+    assert index.rank("search the web", 1) == ["web_search"]
+    # Identifiers in the query are split like tool names
+    assert index.rank("sendEmail", 3) == ["send_email"]
+
+
+def test_index_ignores_stopwords_and_unknown_terms():
+    index = ToolIndex(TOOLS)
+
+    assert index.rank("what is the", 5) == []
+    assert index.rank("zebra", 5) == []
+
+
+def test_index_matches_schema_descriptions():
+    index = ToolIndex(TOOLS)
+
+    assert index.rank("recipient", 3) == ["send_email"]
+
+
+def test_small_tool_sets_are_sent_whole():
+    selector = ToolSelector(top_k=len(TOOLS))
+
+    assert selector.select(TOOLS, [text("zebra")]) == TOOLS
+
+
+def test_pinned_tools_are_always_sent_first():
+    selector = ToolSelector(top_k=1, pinned=["calculator"])
+
+    assert names(selector.select(TOOLS, [text("zebra")])) == ["calculator"]
+    assert names(selector.select(TOOLS, [text("send an email")])) == [
+        "calculator",
+        "send_email",
+    ]
+
+
+def test_selection_is_sticky_in_first_chosen_order():
+    selector = ToolSelector(top_k=1, window=1)
+    messages = [text("search the web")]
+
+    first = names(selector.select(TOOLS, messages))
+    messages.append(text("now write the file", "assistant"))
+    second = names(selector.select(TOOLS, messages))
+    messages.append(text("zebra"))
+    third = names(selector.select(TOOLS, messages))
+
+    # Earlier tools keep their place, so the cached prefix still matches
+    assert first == ["web_search"]
+    assert second == ["web_search", "write_file"]
+    assert third == second
+
+
+def test_selection_rebuilds_past_max_tools():
+    selector = ToolSelector(top_k=1, max_tools=2, window=3)
+    messages = [text("search the web")]
+    selector.select(TOOLS, messages)
+    messages = [text("write the text to a file")]
+    assert names(selector.select(TOOLS, messages)) == [
+        "web_search",
+        "write_file",
+    ]
+    messages += tool_call("write_file", {"path": "a.txt"})
+    messages.append(text("send an email"))
+
+    # A third tool overflows: keep the one just called plus the new top_k
+    assert names(selector.select(TOOLS, messages)) == [
+        "write_file",
+        "send_email",
+    ]
+
+
+def test_fork_shares_index_but_not_selection():
+    selector = ToolSelector(top_k=1)
+    selector.select(TOOLS, [text("search the web")])
+
+    forked = selector.fork()
+
+    assert forked._index is selector._index
+    assert forked.select(TOOLS, [text("zebra")]) == []
+
+
+def test_no_match_keeps_tools_the_conversation_called():
+    selector = ToolSelector(top_k=1, window=1)
+    messages = [text("zebra")] + tool_call("calculator") + [text("ok")]
+
+    # Tool blocks in a request without tools would be rejected
+    assert names(selector.select(TOOLS, messages)) == ["calculator"]
+    messages.append(text("search the web", "assistant"))
+    assert names(selector.select(TOOLS, messages)) == [
+        "calculator",
+        "web_search",
+    ]
+
+
+def test_no_match_sends_every_tool_when_called_tools_are_gone():
+    selector = ToolSelector(top_k=1, window=1)
+    messages = tool_call("removed_tool") + [text("zebra")]
+
+    assert selector.select(TOOLS, messages) == TOOLS
@@ -0,0 +1,170 @@
+"""Tests for scheduling tool calls by their concurrency hints."""
+
+import asyncio
+from types import SimpleNamespace
+
+from .tools.base import Tool
+from .utils import tool_util
+from .utils.tool_util import ToolScheduler, execute_tools
+
+
+class RecordingTool(Tool):
+    """Sleeps for a while and records when each call starts and ends."""
+
+    def __init__(self, name: str, log: list, **hints):
+        super().__init__(name=name, description="", input_schema={})
+        self.log = log
+        for hint, value in hints.items():
+            setattr(self, hint, value)
+        self.running = 0
+        self.most_running = 0
+
+    def resource_key(self, path: str = "", **kwargs) -> str | None:
+        return path or None
+
+    async def execute(self, label: str, delay: float = 0.02, **kwargs):
+        self.log.append(("start", label))
+        self.running += 1
+        self.most_running = max(self.most_running, self.running)
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            self.running -= 1
+        self.log.append(("end", label))
+        return label
+
+
+def call(call_id: str, name: str, **tool_input) -> SimpleNamespace:
+    return SimpleNamespace(id=call_id, name=name, input=tool_input)
+
+
+def run_calls(calls, tools):
+    tool_dict = {tool.name: tool for tool in tools}
+    return asyncio.run(execute_tools(calls, tool_dict))
+
+
+def test_exclusive_call_waits_for_earlier_reads_and_blocks_later_ones():
+    log = []
+    read = RecordingTool("read", log)
+    write = RecordingTool("write", log, concurrency="exclusive")
+
+    results = run_calls(
+        [
+            call("1", "read", label="read 1", path="a"),
+            call("2", "read", label="read 2", path="a"),
+            call("3", "write", label="write", path="a", delay=0.01),
+            call("4", "read", label="read 3", path="a"),
+            call("5", "read", label="other", path="b"),
+        ],
+        [read, write],
+    )
+
+    assert [result["content"] for result in results] == [
+        "read 1",
+        "read 2",
+        "write",
+        "read 3",
+        "other",
+    ]
+    order = log.index
+    assert order(("start", "write")) > order(("end", "read 1"))
+    assert order(("start", "write")) > order(("end", "read 2"))
+    assert order(("start", "read 3")) > order(("end", "write"))
+    # Reads of the same resource, and other resources, run in parallel
+    assert order(("start", "read 2")) < order(("end", "read 1"))
+    assert order(("start", "other")) < order(("end", "read 1"))
+
+
+def test_exclusive_calls_on_same_resource_run_in_order():
+    log = []
+    write = RecordingTool("write", log, concurrency="exclusive")
+
+    run_calls(
+        [
+            call("1", "write", label="first", path="a", delay=0.03),
+            call("2", "write", label="second", path="a", delay=0.01),
+            call("3", "write", label="elsewhere", path="b", delay=0.01),
+        ],
+        [write],
+    )
+
+    assert log.index(("start", "second")) > log.index(("end", "first"))
+    assert log.index(("end", "elsewhere")) < log.index(("end", "first"))
+
+
+def test_max_parallel_limits_concurrent_calls():
+    tool = RecordingTool("limited", [], max_parallel=2)
+
+    results = run_calls(
+        [call(str(i), "limited", label=str(i)) for i in range(6)], [tool]
+    )
+
+    assert [result["content"] for result in results] == [
+        str(i) for i in range(6)
+    ]
+    assert tool.most_running == 2
+
+
+def test_timed_out_call_is_cancelled_and_reported():
+    log = []
+    slow = RecordingTool("slow", log, timeout=0.05)
+
+    results = run_calls(
+        [
+            call("1", "slow", label="hangs", delay=10),
+            call("2", "slow", label="quick"),
+        ],
+        [slow],
+    )
+
+    assert results[0]["is_error"]
+    assert "timed out after 0.05s" in results[0]["content"]
+    assert results[1]["content"] == "quick"
+    assert ("end", "hangs") not in log
+    assert slow.running == 0
+
+
+def run_in_two_schedulers(calls_a, calls_b, tools):
+    """Run two batches of calls as two agents on one loop would."""
+    tool_dict = {tool.name: tool for tool in tools}
+
+    async def main():
+        first, second = ToolScheduler(tool_dict), ToolScheduler(tool_dict)
+        tasks = [first.submit(call) for call in calls_a]
+        tasks += [second.submit(call) for call in calls_b]
+        results = await asyncio.gather(*tasks)
+        return results, tool_util._loop_state()
+
+    return asyncio.run(main())
+
+
+def test_limits_apply_across_schedulers_on_one_loop():
+    log = []
+    serial = RecordingTool("serial", log, concurrency="serial")
+    limited = RecordingTool("limited", log, max_parallel=2)
+
+    run_in_two_schedulers(
+        [call("1", "serial", label="s1"), call("2", "limited", label="l1")]
+        + [call("3", "limited", label="l2")],
+        [call("4", "serial", label="s2"), call("5", "limited", label="l3")]
+        + [call("6", "limited", label="l4")],
+        [serial, limited],
+    )
+
+    assert serial.most_running == 1
+    assert limited.most_running == 2
+
+
+def test_writes_from_two_schedulers_are_ordered():
+    log = []
+    write = RecordingTool("write", log, concurrency="exclusive")
+
+    _, state = run_in_two_schedulers(
+        [call("1", "write", label="first", path="a", delay=0.03)],
+        [call("2", "write", label="second", path="a", delay=0.01)],
+        [write],
+    )
+
+    assert log.index(("start", "second")) > log.index(("end", "first"))
+    # Finished calls are forgotten
+    assert state.last_write == {} and state.reads == {}
@@ -0,0 +1,198 @@
+"""Tests for tracing spans, exporters and the latency summary."""
+
+import asyncio
+import json
+
+import pytest
+
+from .benchmarks.stub_server import StubMessagesServer, tool_loop_responder
+from .test_agent_run import make_agent
+from .utils.tracing import (
+    JSONLExporter,
+    Span,
+    SpanAggregator,
+    Tracer,
+    trace_span,
+    use_tracer,
+)
+
+
+class ListExporter:
+    def __init__(self):
+        self.spans = []
+
+    def export(self, span):
+        self.spans.append(span)
+
+
+def test_nested_spans_are_parented_and_exported_innermost_first():
+    exporter = ListExporter()
+    tracer = Tracer([exporter])
+
+    with tracer.span("outer", kind="run") as outer:
+        with tracer.span("first"):
+            pass
+        with tracer.span("second") as second:
+            second.attributes["rows"] = 3
+
+    first, second, outer = exporter.spans
+    assert [span.name for span in exporter.spans] == [
+        "first",
+        "second",
+        "outer",
+    ]
+    assert outer.parent_id is None
+    assert first.parent_id == second.parent_id == outer.span_id
+    assert first.span_id != second.span_id
+    assert outer.attributes == {"kind": "run"}
+    assert second.attributes == {"rows": 3}
+    assert outer.duration >= first.duration + second.duration
+
+
+def test_span_records_error_and_reraises():
+    exporter = ListExporter()
+
+    with pytest.raises(ValueError):
+        with Tracer([exporter]).span("failing"):
+            raise ValueError("bad input")
+
+    assert exporter.spans[0].error == "ValueError('bad input')"
+
+
+def test_failing_exporter_does_not_break_the_traced_code(capsys):
+    class BrokenExporter:
+        def export(self, span):
+            raise OSError("disk full")
+
+    exporter = ListExporter()
+    with Tracer([BrokenExporter(), exporter]).span("work"):
+        pass
+
+    assert [span.name for span in exporter.spans] == ["work"]
+    assert "disk full" in capsys.readouterr().out
+
+
+def test_trace_span_uses_the_current_tracer():
+    exporter = ListExporter()
+
+    with trace_span("untraced") as span:
+        span.attributes["ok"] = True
+    with use_tracer(Tracer([exporter])):
+        with trace_span("traced", tool="grep"):
+            # None keeps the outer tracer current
+            with use_tracer(None), trace_span("inner"):
+                pass
+    with trace_span("after"):
+        pass
+
+    inner, traced = exporter.spans
+    assert [span.name for span in exporter.spans] == ["inner", "traced"]
+    assert inner.parent_id == traced.span_id
+    assert traced.attributes == {"tool": "grep"}
+
+
+def test_concurrent_tasks_parent_to_the_span_that_started_them():
+    exporter = ListExporter()
+    tracer = Tracer([exporter])
+
+    async def child(name):
+        with trace_span(name):
+            await asyncio.sleep(0)
+
+    async def main():
+        with use_tracer(tracer), trace_span("parent") as parent:
+            await asyncio.gather(child("a"), child("b"))
+        return parent
+
+    parent = asyncio.run(main())
+
+    children = [span for span in exporter.spans if span is not parent]
+    assert sorted(span.name for span in children) == ["a", "b"]
+    assert all(span.parent_id == parent.span_id for span in children)
+
+
+def test_jsonl_exporter_appends_one_line_per_span(tmp_path):
+    path = tmp_path / "spans.jsonl"
+    tracer = Tracer([JSONLExporter(str(path))])
+
+    with tracer.span("turn", usage={"input_tokens": 5}, path=tmp_path):
+        with tracer.span("tool", tool="read"):
+            pass
+
+    tool, turn = [json.loads(line) for line in path.read_text().splitlines()]
+    assert tool["name"] == "tool"
+    assert tool["parent_id"] == turn["span_id"]
+    assert turn["attributes"]["usage"] == {"input_tokens": 5}
+    # Values JSON can't represent are written as strings
+    assert turn["attributes"]["path"] == str(tmp_path)
+    assert set(turn) == {
+        "name",
+        "attributes",
+        "span_id",
+        "parent_id",
+        "start_time",
+        "duration",
+        "error",
+    }
+
+
+def test_aggregator_percentiles_use_nearest_rank():
+    aggregator = SpanAggregator()
+    for ms in range(1, 101):
+        aggregator.export(Span("agent.turn", duration=ms / 1000))
+    aggregator.export(Span("tool", {"tool": "grep"}, duration=0.5))
+    aggregator.export(
+        Span("tool", {"tool": "grep", "is_error": True}, duration=0.1)
+    )
+    aggregator.export(Span("tool", {"tool": "ls"}, duration=0.2, error="X"))
+
+    summary = aggregator.summary()
+
+    turn = summary["agent.turn"]
+    assert turn["count"] == 100
+    assert turn["p50"] == pytest.approx(0.050)
+    assert turn["p95"] == pytest.approx(0.095)
+    assert turn["mean"] == pytest.approx(0.0505)
+    assert summary["tool:grep"] == {
+        "count": 2,
+        "errors": 1,
+        "mean": pytest.approx(0.3),
+        "p50": 0.1,
+        "p95": 0.5,
+    }
+    assert summary["tool:ls"]["errors"] == 1
+    assert summary["tool:ls"]["p50"] == summary["tool:ls"]["p95"] == 0.2
+
+
+def test_aggregator_report_lists_slowest_p95_first():
+    aggregator = SpanAggregator()
+    aggregator.export(Span("fast", duration=0.001))
+    aggregator.export(Span("slow", duration=1.0))
+
+    header, first, second = aggregator.report().splitlines()
+
+    assert header.split()[:3] == ["span", "count", "errors"]
+    assert first.split() == ["slow", "1", "0", "1000.0", "1000.0"]
+    assert second.split()[0] == "fast"
+
+
+def test_agent_run_emits_run_turn_and_tool_spans():
+    exporter = ListExporter()
+    with StubMessagesServer(tool_loop_responder(turns=2)) as server:
+        agent = make_agent(server.url, tracer=Tracer([exporter]))
+        try:
+            agent.run("hello")
+        finally:
+            agent.close()
+
+    by_name = {}
+    for span in exporter.spans:
+        by_name.setdefault(span.name, []).append(span)
+    (run,) = by_name["agent.run"]
+    first_turn, last_turn = by_name["agent.turn"]
+    (tool,) = by_name["tool"]
+    assert run.attributes["turns"] == 2
+    assert first_turn.parent_id == last_turn.parent_id == run.span_id
+    assert tool.parent_id == first_turn.span_id
+    assert tool.attributes["tool"] == "think"
+    assert first_turn.attributes["input_tokens"] > 0
@@ -0,0 +1,123 @@
+"""Tests for the shared trigram search index."""
+
+import threading
+
+import pytest
+
+from .utils import trigram_index
+from .utils.trigram_index import TrigramIndex, file_changed, find_index
+
+
+@pytest.fixture(autouse=True)
+def fresh_indexes(monkeypatch):
+    monkeypatch.setattr(trigram_index, "_indexes", trigram_index.OrderedDict())
+
+
+@pytest.fixture
+def tree(tmp_path):
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "top.py").write_text("needle = 1\n")
+    (tmp_path / "pkg" / "mod.py").write_text("x = needle\n")
+    return tmp_path
+
+
+def paths(index, pattern, prefix=""):
+    return [path for path, _, _ in index.search(pattern, prefix=prefix)]
+
+
+def test_subdirectory_is_served_by_root_index(tree):
+    root_index, root_prefix = find_index(str(tree))
+    sub_index, sub_prefix = find_index(str(tree / "pkg"))
+
+    assert sub_index is root_index
+    assert (root_prefix, sub_prefix) == ("", "pkg/")
+    assert paths(root_index, "needle") == ["pkg/mod.py", "top.py"]
+    assert paths(sub_index, "needle", sub_prefix) == ["pkg/mod.py"]
+    assert len(trigram_index._indexes) == 1
+
+
+def test_parent_index_replaces_subdirectory_index(tree):
+    find_index(str(tree / "pkg"))
+    find_index(str(tree))
+
+    assert list(trigram_index._indexes) == [str(tree.resolve())]
+
+
+def test_indexes_are_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(trigram_index, "MAX_INDEXES", 2)
+    for name in ("a", "b", "c"):
+        (tmp_path / name).mkdir()
+        find_index(str(tmp_path / name))
+
+    assert len(trigram_index._indexes) == 2
+
+
+def test_search_does_not_wait_for_refresh(tree, monkeypatch):
+    index = TrigramIndex(str(tree), refresh_interval=0)
+    index.refresh()
+    release = threading.Event()
+    started = threading.Event()
+    original = TrigramIndex.refresh
+
+    def slow_refresh(self):
+        started.set()
+        release.wait(5)
+        original(self)
+
+    monkeypatch.setattr(TrigramIndex, "refresh", slow_refresh)
+    try:
+        assert paths(index, "needle") == ["pkg/mod.py", "top.py"]
+        assert started.wait(5)
+    finally:
+        release.set()
+
+
+def test_written_file_is_searchable_at_once(tree):
+    index, _ = find_index(str(tree))
+    index.refresh_interval = 3600
+    assert paths(index, "fresh_text") == []
+
+    (tree / "pkg" / "new.py").write_text("fresh_text\n")
+    file_changed(str(tree / "pkg" / "new.py"))
+
+    assert paths(index, "fresh_text") == ["pkg/new.py"]
+
+
+def test_unreadable_directory_does_not_block_search(tree, monkeypatch):
+    (tree / "locked").mkdir()
+    (tree / "locked" / "secret.py").write_text("needle\n")
+    scandir = trigram_index.os.scandir
+
+    def failing_scandir(path):
+        if path.endswith("locked"):
+            raise PermissionError(13, "Permission denied", path)
+        return scandir(path)
+
+    monkeypatch.setattr(trigram_index.os, "scandir", failing_scandir)
+    index = TrigramIndex(str(tree))
+    index.refresh_in_background()
+
+    assert paths(index, "needle") == ["pkg/mod.py", "top.py"]
+
+
+def test_failed_build_is_reported_instead_of_hanging(tree, monkeypatch):
+    def broken_walk(*args):
+        raise RuntimeError("disk on fire")
+
+    monkeypatch.setattr(trigram_index, "walk", broken_walk)
+    monkeypatch.setattr(trigram_index, "FIRST_BUILD_TIMEOUT", 5.0)
+    index = TrigramIndex(str(tree))
+    index.refresh_in_background()
+
+    with pytest.raises(RuntimeError, match="disk on fire"):
+        paths(index, "needle")
+
+
+def test_first_build_wait_is_bounded(tree, monkeypatch):
+    monkeypatch.setattr(trigram_index, "FIRST_BUILD_TIMEOUT", 0.05)
+    index = TrigramIndex(str(tree))
+
+    # Hold the refresh lock so the first build can't finish
+    with index._refresh_lock:
+        with pytest.raises(TimeoutError):
+            paths(index, "needle")
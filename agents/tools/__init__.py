@@ -2,7 +2,8 @@
 
 from .base import Tool
 from .code_execution import CodeExecutionServerTool
-from .file_tools import FileReadTool, FileWriteTool
+from .file_tools import FileReadTool, FileSearchTool, FileWriteTool
+from .read_spilled import ReadSpilledTool
 from .think import ThinkTool
 from .web_search import WebSearchServerTool
 
@@ -10,7 +11,9 @@ __all__ = [
     "Tool",
     "CodeExecutionServerTool",
     "FileReadTool",
+    "FileSearchTool",
     "FileWriteTool",
+    "ReadSpilledTool",
     "ThinkTool",
     "WebSearchServerTool",
 ]
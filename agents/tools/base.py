@@ -1,7 +1,7 @@
 """Base tool definitions for the agent framework."""
 
 from dataclasses import dataclass
-from typing import Any
+from typing import Any, ClassVar
 
 
 @dataclass
@@ -12,6 +12,29 @@ class Tool:
     description: str
     input_schema: dict[str, Any]
 
+    # Scheduling hints used by execute_tools:
+    # - "read_only": runs in parallel with anything except earlier
+    #   exclusive calls on the same resource
+    # - "exclusive": waits for earlier calls on the same resource
+    # - "serial": runs one at a time with every other serial call
+    concurrency: ClassVar[str] = "read_only"
+    # Maximum concurrent calls of this tool (None means unlimited)
+    max_parallel: ClassVar[int | None] = None
+    # Seconds before a call is cancelled (None means no deadline)
+    timeout: ClassVar[float | None] = None
+    # Results may be served from a ToolResultCache for identical input
+    cacheable: ClassVar[bool] = False
+    # Oversized results may be moved to a SpillStore
+    spillable: ClassVar[bool] = True
+
+    def is_cacheable(self, **kwargs) -> bool:
+        """Return whether this call's result may be cached."""
+        return self.cacheable
+
+    def resource_key(self, **kwargs) -> str | None:
+        """Return the resource a call touches, for conflict ordering."""
+        return None
+
     def to_dict(self) -> dict[str, Any]:
         """Convert tool to Claude API format."""
         return {
@@ -1,11 +1,19 @@
 #!/usr/bin/env python3
 
-"""Simple calculator tool for basic math operations."""
+"""Simple calculator tools for basic math operations."""
 
+import ast
 import math
+from functools import lru_cache
+from typing import Any
 
 from mcp.server import FastMCP
 
+try:
+    import numpy as np
+except ImportError:  # Vector variables fall back to a per-element loop
+    np = None
+
 mcp = FastMCP("Calculator")
 
 
@@ -42,14 +50,237 @@ def calculator(number1: float, number2: float, operator: str) -> str:
         else:
             return f"Error: Unsupported operator '{operator}'"
 
-        # Format the result
-        if isinstance(result, float) and result.is_integer():
-            result = int(result)
-
-        return f"Result: {result}"
+        return f"Result: {_format(result)}"
     except Exception as e:
         return f"Error: {str(e)}"
 
 
+MAX_BATCH_SIZE = 1000
+MAX_EXPRESSION_LENGTH = 500
+# Bound on the size of integer powers, to keep "9**9**9" from hanging
+MAX_POWER_BITS = 100_000
+
+_FUNCTIONS = frozenset(
+    "sqrt abs exp log log10 log2 sin cos tan asin acos atan floor ceil".split()
+)
+# NumPy spells the inverse trigonometric functions differently
+_NUMPY_NAMES = {"asin": "arcsin", "acos": "arccos", "atan": "arctan"}
+_CONSTANTS = {"pi": math.pi, "e": math.e}
+_ALLOWED_NODES = (
+    ast.Expression,
+    ast.BinOp,
+    ast.UnaryOp,
+    ast.Constant,
+    ast.Name,
+    ast.Call,
+    ast.Load,
+    ast.Add,
+    ast.Sub,
+    ast.Mult,
+    ast.Div,
+    ast.FloorDiv,
+    ast.Mod,
+    ast.Pow,
+    ast.UAdd,
+    ast.USub,
+)
+
+
+def _format(value: Any) -> Any:
+    """Show whole floats as integers and arrays as lists."""
+    if np is not None and isinstance(value, np.ndarray):
+        return [_format(item) for item in value.tolist()]
+    if np is not None and isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _safe_pow(base: Any, exponent: Any) -> Any:
+    if (
+        isinstance(base, int)
+        and isinstance(exponent, int)
+        and base.bit_length() * abs(exponent) > MAX_POWER_BITS
+    ):
+        raise ValueError("Result too large")
+    return base**exponent
+
+
+class _Validator(ast.NodeTransformer):
+    """Reject anything but arithmetic, and route ** through _safe_pow."""
+
+    def generic_visit(self, node: ast.AST) -> ast.AST:
+        if not isinstance(node, _ALLOWED_NODES):
+            raise ValueError(f"Unsupported syntax: {type(node).__name__}")
+        return super().generic_visit(node)
+
+    def visit_Name(self, node: ast.Name) -> ast.AST:
+        # Names like _pow are internal helpers, not variables
+        if node.id.startswith("_"):
+            raise ValueError(f"Unsupported name: {node.id}")
+        return node
+
+    def visit_Constant(self, node: ast.Constant) -> ast.AST:
+        if type(node.value) not in (int, float):
+            raise ValueError(f"Unsupported constant: {node.value!r}")
+        return node
+
+    def visit_Call(self, node: ast.Call) -> ast.AST:
+        if (
+            not isinstance(node.func, ast.Name)
+            or node.func.id not in _FUNCTIONS
+            or node.keywords
+        ):
+            raise ValueError("Only math functions may be called")
+        node.args = [self.visit(arg) for arg in node.args]
+        return node
+
+    def visit_BinOp(self, node: ast.BinOp) -> ast.AST:
+        node = self.generic_visit(node)
+        if isinstance(node.op, ast.Pow):
+            return ast.copy_location(
+                ast.Call(
+                    func=ast.Name(id="_pow", ctx=ast.Load()),
+                    args=[node.left, node.right],
+                    keywords=[],
+                ),
+                node,
+            )
+        return node
+
+
+@lru_cache(maxsize=1024)
+def compile_expression(source: str) -> tuple[Any, frozenset[str]]:
+    """Compile an arithmetic expression after checking it is safe.
+
+    "^" means power, as in the calculator tool. Returns the code object
+    and the variable names it uses. Results are cached, so repeated
+    expressions are parsed once.
+    """
+    if len(source) > MAX_EXPRESSION_LENGTH:
+        raise ValueError("Expression too long")
+    tree = ast.parse(source.replace("^", "**"), mode="eval")
+    tree = ast.fix_missing_locations(_Validator().visit(tree))
+    names = frozenset(
+        node.id
+        for node in ast.walk(tree)
+        if isinstance(node, ast.Name)
+        and node.id not in _FUNCTIONS
+        and node.id != "_pow"
+    )
+    return compile(tree, "<expression>", "eval"), names
+
+
+def _evaluate(source: str, variables: dict[str, Any]) -> Any:
+    """Evaluate one expression, vectorized over list-valued variables."""
+    code, names = compile_expression(source)
+    unknown = names - variables.keys() - _CONSTANTS.keys()
+    if unknown:
+        raise ValueError(f"Unknown name(s): {', '.join(sorted(unknown))}")
+
+    values = dict(_CONSTANTS)
+    values.update((name, variables[name]) for name in names & variables.keys())
+    vectors = {k: v for k, v in values.items() if isinstance(v, list)}
+    scalar_namespace = {
+        "__builtins__": {},
+        "_pow": _safe_pow,
+        **{name: getattr(math, name, abs) for name in _FUNCTIONS},
+    }
+    if not vectors:
+        return eval(code, scalar_namespace, values)
+
+    lengths = {len(v) for v in vectors.values()}
+    if len(lengths) > 1:
+        raise ValueError("List variables must all have the same length")
+
+    if np is not None:
+        # Everything is float64: integer NumPy math silently overflows
+        # int64 and rejects negative powers, where Python ints don't
+        namespace = {
+            "__builtins__": {},
+            "_pow": np.float_power,
+            **{
+                name: getattr(np, _NUMPY_NAMES.get(name, name))
+                for name in _FUNCTIONS
+            },
+        }
+        arrays = {
+            k: np.asarray(v, dtype=float) if k in vectors else float(v)
+            for k, v in values.items()
+        }
+        with np.errstate(all="raise"):
+            return eval(code, namespace, arrays)
+
+    return [
+        eval(
+            code,
+            scalar_namespace,
+            {k: v[i] if k in vectors else v for k, v in values.items()},
+        )
+        for i in range(lengths.pop())
+    ]
+
+
+def _error_text(error: Exception) -> str:
+    if isinstance(error, (ZeroDivisionError, FloatingPointError)):
+        return f"Error: {error}" if str(error) else "Error: Division by zero"
+    if isinstance(error, SyntaxError):
+        return "Error: Invalid expression"
+    return f"Error: {error}"
+
+
+@mcp.tool(name="calculate_batch")
+def calculate_batch(
+    expressions: list[str] | None = None,
+    operations: list[dict[str, Any]] | None = None,
+    variables: dict[str, float | list[float]] | None = None,
+) -> str:
+    """Evaluates many calculations in one call.
+
+    Use this instead of repeated calculator calls when there is more than
+    one thing to compute.
+
+    Args:
+        expressions: Arithmetic expressions such as "(3 + 4) * 2" or
+            "sqrt(x) / 2". Supports + - * / // % ^ (or **), parentheses,
+            the constants pi and e, and sqrt, abs, exp, log, log10, log2,
+            sin, cos, tan, asin, acos, atan, floor and ceil.
+        operations: Calculator-style records, each with number1, number2
+            and operator (+, -, *, /, ^, sqrt)
+        variables: Values for names used in expressions. A list value
+            evaluates the expression for every element at once.
+
+    Returns:
+        One line per expression, then per operation, in order
+    """
+    expressions = expressions or []
+    operations = operations or []
+    variables = variables or {}
+    if len(expressions) + len(operations) > MAX_BATCH_SIZE:
+        return f"Error: At most {MAX_BATCH_SIZE} calculations per batch"
+
+    lines = []
+    for i, source in enumerate(expressions):
+        try:
+            result = f"{source} = {_format(_evaluate(source, variables))}"
+        except Exception as e:
+            result = f"{source}: {_error_text(e)}"
+        lines.append(f"[{i}] {result}")
+
+    for i, record in enumerate(operations, start=len(expressions)):
+        try:
+            result = calculator(
+                float(record["number1"]),
+                float(record.get("number2", 0)),
+                str(record["operator"]),
+            )
+        except (KeyError, TypeError, ValueError) as e:
+            result = f"Error: Invalid operation record ({e})"
+        lines.append(f"[{i}] {result}")
+
+    return "\n".join(lines) if lines else "Error: Nothing to calculate"
+
+
 if __name__ == "__main__":
     mcp.run()
@@ -1,16 +1,28 @@
 """File operation tools for reading and writing files."""
 
 import asyncio
-import glob
+import itertools
 import os
+import re
+import secrets
+from fnmatch import fnmatchcase
 from pathlib import Path
 
+from ..utils.dir_listing import walk
+from ..utils.line_index import read_lines
+from ..utils.trigram_index import file_changed, find_index, get_index
 from .base import Tool
 
 
+# Entries returned per page by the list operation when no limit is given
+DEFAULT_LIST_LIMIT = 500
+
+
 class FileReadTool(Tool):
     """Tool for reading files and listing directories."""
 
+    cacheable = True
+
     def __init__(self):
         super().__init__(
             name="file_read",
@@ -18,8 +30,11 @@ class FileReadTool(Tool):
             Read files or list directory contents.
 
             Operations:
-            - read: Read the contents of a file
-            - list: List files in a directory
+            - read: Read the contents of a file, optionally a line range
+              given by offset and limit
+            - list: List files in a directory. Patterns may recurse with
+              ** (e.g. **/*.py); .gitignored paths are skipped. Long
+              listings are paged: pass the returned cursor to continue.
             """,
             input_schema={
                 "type": "object",
@@ -33,25 +48,64 @@ class FileReadTool(Tool):
                         "type": "string",
                         "description": "File path for read or directory path",
                     },
+                    "offset": {
+                        "type": "integer",
+                        "description": "Line to start reading from (0-based)",
+                    },
+                    "limit": {
+                        "type": "integer",
+                        "description": (
+                            "Maximum lines to read (0 means no limit), "
+                            "or entries per page when listing"
+                        ),
+                    },
                     "max_lines": {
                         "type": "integer",
-                        "description": "Maximum lines to read (0 means no limit)",
+                        "description": "Alias for limit",
                     },
                     "pattern": {
                         "type": "string",
                         "description": "File pattern to match",
                     },
+                    "max_depth": {
+                        "type": "integer",
+                        "description": (
+                            "Deepest directory level to list "
+                            "(0 means no limit)"
+                        ),
+                    },
+                    "cursor": {
+                        "type": "string",
+                        "description": "Cursor from a previous list page",
+                    },
                 },
                 "required": ["operation", "path"],
             },
         )
 
+    def is_cacheable(self, operation: str = "", **kwargs) -> bool:
+        """Only file reads are cached.
+
+        A listing depends on every directory it walks, but its cache entry
+        could only track the top directory's mtime, so it would go stale
+        when a subdirectory changes.
+        """
+        return operation == "read"
+
+    def resource_key(self, path: str = "", **kwargs) -> str | None:
+        """Reads wait for earlier writes to the same path."""
+        return os.path.abspath(path) if path else None
+
     async def execute(
         self,
         operation: str,
         path: str,
         max_lines: int = 0,
         pattern: str = "*",
+        offset: int = 0,
+        limit: int = 0,
+        max_depth: int = 0,
+        cursor: str = "",
     ) -> str:
         """Execute a file read operation.
 
@@ -60,23 +114,33 @@ class FileReadTool(Tool):
             path: The file or directory path
             max_lines: Maximum lines to read (for read operation, 0 means no limit)
             pattern: File pattern to match (for list operation)
+            offset: First line to read, 0-based (for read operation)
+            limit: Maximum lines to read; overrides max_lines. For list,
+                the number of entries per page
+            max_depth: Deepest directory level to list (0 means no limit)
+            cursor: Cursor returned by a previous list page
 
         Returns:
             Result of the operation as string
         """
         if operation == "read":
-            return await self._read_file(path, max_lines)
+            return await self._read_file(path, limit or max_lines, offset)
         elif operation == "list":
-            return await self._list_files(path, pattern)
+            return await self._list_files(
+                path, pattern, max_depth, cursor, limit
+            )
         else:
             return f"Error: Unsupported operation '{operation}'"
 
-    async def _read_file(self, path: str, max_lines: int = 0) -> str:
+    async def _read_file(
+        self, path: str, max_lines: int = 0, offset: int = 0
+    ) -> str:
         """Read a file from disk.
         
         Args:
             path: Path to the file to read
             max_lines: Maximum number of lines to read (0 means read entire file)
+            offset: First line to read (0-based)
         """
         try:
             file_path = Path(path)
@@ -87,22 +151,25 @@ class FileReadTool(Tool):
                 return f"Error: {path} is not a file"
 
             def read_sync():
+                if max_lines > 0 or offset > 0:
+                    # Ranged reads go through a cached line-offset index
+                    return read_lines(str(file_path), offset, max_lines)
                 with open(file_path, encoding="utf-8", errors="replace") as f:
-                    if max_lines > 0:
-                        lines = []
-                        for i, line in enumerate(f):
-                            if i >= max_lines:
-                                break
-                            lines.append(line)
-                        return "".join(lines)
                     return f.read()
 
             return await asyncio.to_thread(read_sync)
         except Exception as e:
             return f"Error reading {path}: {str(e)}"
 
-    async def _list_files(self, directory: str, pattern: str = "*") -> str:
-        """List files in a directory."""
+    async def _list_files(
+        self,
+        directory: str,
+        pattern: str = "*",
+        max_depth: int = 0,
+        cursor: str = "",
+        limit: int = 0,
+    ) -> str:
+        """List files in a directory, one page at a time."""
         try:
             dir_path = Path(directory)
 
@@ -111,23 +178,35 @@ class FileReadTool(Tool):
             if not dir_path.is_dir():
                 return f"Error: {directory} is not a directory"
 
+            page_size = limit if limit > 0 else DEFAULT_LIST_LIMIT
+            after = tuple(cursor.split("/")) if cursor else ()
+
             def list_sync():
-                search_pattern = f"{directory}/{pattern}"
-                files = glob.glob(search_pattern)
+                entries = list(
+                    itertools.islice(
+                        walk(str(dir_path), pattern, max_depth, after),
+                        page_size + 1,
+                    )
+                )
 
-                if not files:
+                if not entries:
                     return f"No files found matching {directory}/{pattern}"
 
                 file_list = []
-                for file_path in sorted(files):
-                    path_obj = Path(file_path)
-                    rel_path = str(file_path).replace(str(dir_path) + "/", "")
-
-                    if path_obj.is_dir():
+                for parts, is_dir in entries[:page_size]:
+                    rel_path = "/".join(parts)
+                    if is_dir:
                         file_list.append(f"📁 {rel_path}/")
                     else:
                         file_list.append(f"📄 {rel_path}")
 
+                if len(entries) > page_size:
+                    next_cursor = "/".join(entries[page_size - 1][0])
+                    file_list.append(
+                        f"[More entries available; continue with "
+                        f'cursor="{next_cursor}"]'
+                    )
+
                 return "\n".join(file_list)
 
             return await asyncio.to_thread(list_sync)
@@ -135,9 +214,135 @@ class FileReadTool(Tool):
             return f"Error listing files in {directory}: {str(e)}"
 
 
+class FileSearchTool(Tool):
+    """Tool for searching file contents through a trigram index."""
+
+    def __init__(self, root: str = "."):
+        """Initialize the tool and start indexing root in the background.
+
+        Args:
+            root: Directory searched when no path is given
+        """
+        super().__init__(
+            name="file_search",
+            description="""
+            Search file contents under a directory for a substring or
+            regular expression. Returns only matching lines, with line
+            numbers and surrounding context, instead of whole files.
+            .gitignored, binary and very large files are skipped.
+            """,
+            input_schema={
+                "type": "object",
+                "properties": {
+                    "pattern": {
+                        "type": "string",
+                        "description": "Substring or regex to search for",
+                    },
+                    "path": {
+                        "type": "string",
+                        "description": "Directory to search (default: root)",
+                    },
+                    "regex": {
+                        "type": "boolean",
+                        "description": "Treat pattern as a regex",
+                    },
+                    "ignore_case": {
+                        "type": "boolean",
+                        "description": "Match case-insensitively",
+                    },
+                    "include": {
+                        "type": "string",
+                        "description": "Only search files matching this "
+                        "glob, e.g. *.py",
+                    },
+                    "context": {
+                        "type": "integer",
+                        "description": "Lines of context around matches",
+                    },
+                    "max_results": {
+                        "type": "integer",
+                        "description": "Maximum matching lines to return",
+                    },
+                },
+                "required": ["pattern"],
+            },
+        )
+        self.root = root
+        get_index(root).refresh_in_background()
+
+    async def execute(
+        self,
+        pattern: str,
+        path: str = "",
+        regex: bool = False,
+        ignore_case: bool = False,
+        include: str = "",
+        context: int = 2,
+        max_results: int = 50,
+    ) -> str:
+        """Search file contents.
+
+        Args:
+            pattern: Substring, or regex if regex is set
+            path: Directory to search, defaults to the tool's root
+            regex: Treat pattern as a regular expression
+            ignore_case: Match case-insensitively
+            include: Glob that file names must match
+            context: Lines of context before and after each match
+            max_results: Maximum number of matching lines
+
+        Returns:
+            Matches as path:line:text, context lines as path-line-text
+        """
+        directory = path or self.root
+        if not os.path.isdir(directory):
+            return f"Error: Directory not found at {directory}"
+
+        def search_sync():
+            results = []
+            last_path, last_line = None, -1
+            matches = 0
+            index, prefix = find_index(directory)
+            for rel_path, lines, number in index.search(
+                pattern, regex, ignore_case, prefix
+            ):
+                rel_path = rel_path[len(prefix) :]
+                if include and not fnmatchcase(
+                    os.path.basename(rel_path), include
+                ):
+                    continue
+                if matches >= max_results:
+                    results.append(f"[Stopped after {max_results} matches]")
+                    break
+                matches += 1
+
+                start = max(number - context, 0)
+                if rel_path != last_path or start > last_line + 1:
+                    if results:
+                        results.append("--")
+                else:
+                    start = last_line + 1
+                end = min(number + context, len(lines) - 1)
+                for i in range(start, end + 1):
+                    separator = ":" if i == number else "-"
+                    results.append(
+                        f"{rel_path}{separator}{i + 1}{separator}{lines[i]}"
+                    )
+                last_path, last_line = rel_path, end
+
+            return "\n".join(results) or f"No matches found for {pattern}"
+
+        try:
+            return await asyncio.to_thread(search_sync)
+        except Exception as e:
+            return f"Error searching {directory}: {str(e)}"
+
+
 class FileWriteTool(Tool):
     """Tool for writing and editing files."""
 
+    concurrency = "exclusive"
+
     def __init__(self):
         super().__init__(
             name="file_write",
@@ -146,7 +351,11 @@ class FileWriteTool(Tool):
 
             Operations:
             - write: Create or completely replace a file
-            - edit: Make targeted changes to parts of a file
+            - edit: Make targeted changes to parts of a file, either one
+              old_text/new_text pair or many pairs at once via edits.
+              All edits apply to the original content in one pass and
+              are written atomically; if any old_text is missing,
+              nothing is written.
             """,
             input_schema={
                 "type": "object",
@@ -172,11 +381,30 @@ class FileWriteTool(Tool):
                         "type": "string",
                         "description": "Replacement text (for edit operation)",
                     },
+                    "edits": {
+                        "type": "array",
+                        "description": (
+                            "Several non-overlapping replacements to apply "
+                            "in one edit operation"
+                        ),
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "old_text": {"type": "string"},
+                                "new_text": {"type": "string"},
+                            },
+                            "required": ["old_text", "new_text"],
+                        },
+                    },
                 },
                 "required": ["operation", "path"],
             },
         )
 
+    def resource_key(self, path: str = "", **kwargs) -> str | None:
+        """Writes to the same path run one at a time, in order."""
+        return os.path.abspath(path) if path else None
+
     async def execute(
         self,
         operation: str,
@@ -184,6 +412,7 @@ class FileWriteTool(Tool):
         content: str = "",
         old_text: str = "",
         new_text: str = "",
+        edits: list[dict[str, str]] | None = None,
     ) -> str:
         """Execute a file write operation.
 
@@ -193,6 +422,7 @@ class FileWriteTool(Tool):
             content: Content to write (for write operation)
             old_text: Text to replace (for edit operation)
             new_text: Replacement text (for edit operation)
+            edits: List of {old_text, new_text} pairs (for edit operation)
 
         Returns:
             Result of the operation as string
@@ -202,12 +432,25 @@ class FileWriteTool(Tool):
                 return "Error: content parameter is required"
             return await self._write_file(path, content)
         elif operation == "edit":
+            if edits:
+                if any(
+                    not edit.get("old_text") or "new_text" not in edit
+                    for edit in edits
+                ):
+                    return (
+                        "Error: every entry in edits needs old_text "
+                        "and new_text"
+                    )
+                pairs = [
+                    (edit["old_text"], edit["new_text"]) for edit in edits
+                ]
+                return await self._edit_file(path, pairs)
             if not old_text or not new_text:
                 return (
                     "Error: both old_text and new_text parameters "
                     "are required for edit operation"
                 )
-            return await self._edit_file(path, old_text, new_text)
+            return await self._edit_file(path, [(old_text, new_text)])
         else:
             return f"Error: Unsupported operation '{operation}'"
 
@@ -218,8 +461,7 @@ class FileWriteTool(Tool):
             os.makedirs(file_path.parent, exist_ok=True)
 
             def write_sync():
-                with open(file_path, "w", encoding="utf-8") as f:
-                    f.write(content)
+                _atomic_write(file_path, content)
                 return (
                     f"Successfully wrote {len(content)} "
                     f"characters to {path}"
@@ -229,8 +471,10 @@ class FileWriteTool(Tool):
         except Exception as e:
             return f"Error writing to {path}: {str(e)}"
 
-    async def _edit_file(self, path: str, old_text: str, new_text: str) -> str:
-        """Make targeted changes to a file."""
+    async def _edit_file(
+        self, path: str, edits: list[tuple[str, str]]
+    ) -> str:
+        """Apply one or more replacements in a single read/scan/write."""
         try:
             file_path = Path(path)
 
@@ -239,6 +483,10 @@ class FileWriteTool(Tool):
             if not file_path.is_file():
                 return f"Error: {path} is not a file"
 
+            replacements = dict(edits)
+            if len(replacements) != len(edits):
+                return "Error: edits contains the same old_text twice"
+
             def edit_sync():
                 try:
                     with open(
@@ -246,32 +494,111 @@ class FileWriteTool(Tool):
                     ) as f:
                         content = f.read()
 
-                    if old_text not in content:
-                        return (
-                            f"Error: The specified text was not "
-                            f"found in {path}"
+                    # One scan for every old_text; longer texts win when
+                    # several start at the same position
+                    pattern = re.compile(
+                        "|".join(
+                            re.escape(old)
+                            for old in sorted(
+                                replacements, key=len, reverse=True
+                            )
                         )
-
-                    # Count occurrences to warn about multiple matches
-                    count = content.count(old_text)
-                    if count > 1:
-                        # Edit with warning about multiple occurrences
-                        new_content = content.replace(old_text, new_text)
-                        with open(file_path, "w", encoding="utf-8") as f:
-                            f.write(new_content)
+                    )
+                    counts = dict.fromkeys(replacements, 0)
+
+                    def substitute(match: re.Match) -> str:
+                        counts[match.group()] += 1
+                        return replacements[match.group()]
+
+                    new_content = pattern.sub(substitute, content)
+
+                    missing = [
+                        old for old, count in counts.items() if not count
+                    ]
+                    if missing:
+                        if len(edits) == 1:
+                            return (
+                                f"Error: The specified text was not "
+                                f"found in {path}"
+                            )
                         return (
-                            f"Warning: Found {count} occurrences. "
-                            f"All were replaced in {path}"
+                            f"Error: {len(missing)} of {len(edits)} edits "
+                            f"not found in {path}, no changes made: "
+                            + ", ".join(repr(old[:60]) for old in missing)
                         )
-                    else:
-                        # One occurrence, straightforward replacement
-                        new_content = content.replace(old_text, new_text)
-                        with open(file_path, "w", encoding="utf-8") as f:
-                            f.write(new_content)
+
+                    _atomic_write(file_path, new_content)
+
+                    # Warn about texts that matched more than once
+                    repeated = {
+                        old: count
+                        for old, count in counts.items()
+                        if count > 1
+                    }
+                    if len(edits) == 1:
+                        if repeated:
+                            return (
+                                f"Warning: Found {counts[edits[0][0]]} "
+                                f"occurrences. All were replaced in {path}"
+                            )
                         return f"Successfully edited {path}"
+
+                    result = (
+                        f"Successfully applied {len(edits)} edits to {path}"
+                    )
+                    if repeated:
+                        result += "\nWarning: " + ", ".join(
+                            f"{old[:60]!r} replaced {count} times"
+                            for old, count in repeated.items()
+                        )
+                    return result
                 except UnicodeDecodeError:
                     return f"Error: {path} appears to be a binary file"
 
             return await asyncio.to_thread(edit_sync)
         except Exception as e:
             return f"Error editing {path}: {str(e)}"
+
+
+def _atomic_write(file_path: Path, content: str) -> None:
+    """Write a file via a temp file and os.replace, keeping its mode.
+
+    Readers and crashes see either the old file or the new one, never a
+    partially written file. A symlink is written through to its target.
+    """
+    target = Path(os.path.realpath(file_path))
+    fd, tmp_path = _create_temp(target)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            os.chmod(tmp_path, os.stat(target).st_mode & 0o7777)
+        except FileNotFoundError:
+            pass  # A new file keeps the umask-based mode it was created with
+        os.replace(tmp_path, target)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    # Searches right after a write must see it
+    file_changed(str(target))
+
+
+def _create_temp(target: Path) -> tuple[int, str]:
+    """Create a temp file next to target with the default file mode.
+
+    Unlike mkstemp (mode 0600), the mode is 0666 less the umask, as for
+    any new file, without touching the process-wide umask.
+    """
+    while True:
+        tmp_path = str(
+            target.parent / f".{target.name}.{secrets.token_hex(6)}.tmp"
+        )
+        try:
+            fd = os.open(
+                tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666
+            )
+        except FileExistsError:
+            continue
+        return fd, tmp_path
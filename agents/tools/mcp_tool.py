@@ -1,36 +1,134 @@
 """Tools that interface with MCP servers."""
 
-from typing import Any
+import json
+from typing import TYPE_CHECKING, Any
+
+from ..utils.spill_store import is_spilling
+from ..utils.tracing import trace_span
 from .base import Tool
-from ..utils.connections import MCPConnection
+
+if TYPE_CHECKING:
+    from ..utils.connections import MCPConnection
+
+# Text beyond this many characters is cut from a tool result, unless a
+# spill store will keep the full text
+MAX_TEXT_CHARS = 100_000
+# Images and documents larger than this are left out of the history
+MAX_BINARY_BYTES = 5 * 1024 * 1024
+# Total binary content kept from one tool result
+MAX_RESULT_BYTES = 10 * 1024 * 1024
+
+IMAGE_TYPES = {"image/jpeg", "image/png", "image/gif", "image/webp"}
+DOCUMENT_TYPES = {"application/pdf"}
+
+
+def _text_block(text: str) -> dict[str, Any]:
+    if len(text) > MAX_TEXT_CHARS and not is_spilling():
+        omitted = len(text) - MAX_TEXT_CHARS
+        text = (
+            f"{text[:MAX_TEXT_CHARS]}\n"
+            f"[... {omitted} more characters truncated]"
+        )
+    return {"type": "text", "text": text}
+
+
+def _binary_block(
+    data: str, mime_type: str | None, label: str
+) -> dict[str, Any]:
+    """Wrap base64 data as an image or document block without decoding it."""
+    size = len(data) * 3 // 4
+    if mime_type in IMAGE_TYPES:
+        block_type = "image"
+    elif mime_type in DOCUMENT_TYPES:
+        block_type = "document"
+    else:
+        return _text_block(
+            f"[{label}: {mime_type or 'binary'} content, {size} bytes, "
+            "not supported in tool results]"
+        )
+    if size > MAX_BINARY_BYTES:
+        return _text_block(
+            f"[{label}: {mime_type} content of {size} bytes omitted, "
+            f"limit is {MAX_BINARY_BYTES} bytes]"
+        )
+    return {
+        "type": block_type,
+        "source": {"type": "base64", "media_type": mime_type, "data": data},
+    }
+
+
+def content_to_block(item: Any) -> dict[str, Any] | None:
+    """Convert one MCP content item to a tool_result content block."""
+    item_type = getattr(item, "type", None)
+    if item_type == "text":
+        return _text_block(item.text)
+    if item_type in ("image", "audio"):
+        return _binary_block(item.data, item.mimeType, item_type)
+    if item_type == "resource":
+        resource = item.resource
+        if getattr(resource, "text", None) is not None:
+            return _text_block(f"[resource {resource.uri}]\n{resource.text}")
+        return _binary_block(
+            resource.blob, resource.mimeType, f"resource {resource.uri}"
+        )
+    if item_type == "resource_link":
+        return _text_block(f"[resource link: {item.uri}]")
+    return None
 
 
 class MCPTool(Tool):
+    # Remote calls can hang; cancel them rather than stall the turn
+    timeout = 60.0
+
     def __init__(
         self,
         name: str,
         description: str,
         input_schema: dict[str, Any],
         connection: "MCPConnection",
+        cacheable: bool = False,
     ):
         super().__init__(
             name=name, description=description, input_schema=input_schema
         )
         self.connection = connection
+        self.cacheable = cacheable
 
-    async def execute(self, **kwargs) -> str:
+    async def execute(self, **kwargs) -> str | list[dict[str, Any]]:
         """Execute the MCP tool with the given input_schema.
-        Note: Currently only supports text results from MCP tools."""
+
+        A result that is a single text item comes back as a string; images,
+        documents and embedded resources are forwarded as tool_result
+        content blocks, with their base64 data passed through untouched.
+        """
         try:
-            result = await self.connection.call_tool(
-                self.name, arguments=kwargs
-            )
+            with trace_span("mcp.call", tool=self.name):
+                result = await self.connection.call_tool(
+                    self.name, arguments=kwargs
+                )
 
-            if hasattr(result, "content") and result.content:
-                for item in result.content:
-                    if getattr(item, "type", None) == "text":
-                        return item.text
+            blocks = []
+            binary_bytes = 0
+            for item in getattr(result, "content", None) or []:
+                block = content_to_block(item)
+                if block is None:
+                    continue
+                if "source" in block:
+                    size = len(block["source"]["data"]) * 3 // 4
+                    binary_bytes += size
+                    if binary_bytes > MAX_RESULT_BYTES:
+                        block = _text_block(
+                            f"[{block['type']} of {size} bytes omitted, "
+                            "tool result is over its size limit]"
+                        )
+                blocks.append(block)
 
-            return "No text content in tool response"
+            if not blocks and getattr(result, "structuredContent", None):
+                blocks = [_text_block(json.dumps(result.structuredContent))]
+            if not blocks:
+                return "No content in tool response"
+            if len(blocks) == 1 and blocks[0]["type"] == "text":
+                return blocks[0]["text"]
+            return blocks
         except Exception as e:
             return f"Error executing {self.name}: {e}"
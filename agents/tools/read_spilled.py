@@ -0,0 +1,73 @@
+"""Tool for paging through tool outputs moved to the spill store."""
+
+import asyncio
+
+from ..utils.spill_store import SpillStore
+from .base import Tool
+
+DEFAULT_PAGE_BYTES = 10_000
+
+
+class ReadSpilledTool(Tool):
+    """Reads pages of a large tool output by its spill handle."""
+
+    cacheable = True
+    # Pages are already bounded; spilling them again would loop
+    spillable = False
+
+    def __init__(self, store: SpillStore):
+        super().__init__(
+            name="read_spilled",
+            description="""
+            Read part of a large tool output that was truncated in the
+            conversation. Pass the handle and offset from the truncation
+            notice; continue with the offset given at the end of each
+            page. Pages end at a line break where possible.
+            """,
+            input_schema={
+                "type": "object",
+                "properties": {
+                    "handle": {
+                        "type": "string",
+                        "description": "Handle from the truncation notice",
+                    },
+                    "offset": {
+                        "type": "integer",
+                        "description": "Byte offset to start reading from",
+                    },
+                    "limit": {
+                        "type": "integer",
+                        "description": (
+                            f"Maximum bytes to read (default "
+                            f"{DEFAULT_PAGE_BYTES}, at most "
+                            f"{store.threshold})"
+                        ),
+                    },
+                },
+                "required": ["handle"],
+            },
+        )
+        self.store = store
+
+    async def execute(
+        self, handle: str, offset: int = 0, limit: int = DEFAULT_PAGE_BYTES
+    ) -> str:
+        """Return the requested page and where to continue."""
+        if offset < 0 or limit < 1:
+            return "Error: offset must be >= 0 and limit >= 1"
+        # A page must stay under the size that would have been spilled
+        limit = min(limit, self.store.threshold)
+        try:
+            page, end, size = await asyncio.to_thread(
+                self.store.read, handle, offset, limit
+            )
+        except (ValueError, FileNotFoundError) as e:
+            return f"Error: {e}"
+
+        if not page:
+            return f"[Nothing at offset {offset}; the output is {size} bytes]"
+        if end < size:
+            status = f"continue with offset={end}"
+        else:
+            status = "end of output"
+        return f"{page}\n[Bytes {offset}-{end - 1} of {size}; {status}]"
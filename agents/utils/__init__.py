@@ -1,6 +1,24 @@
 """Agent utility modules."""
 
+from .cache_policy import CachePolicy
 from .history_util import MessageHistory
-from .tool_util import execute_tools
+from .rate_limit import RateLimitGovernor
+from .result_cache import ToolResultCache
+from .spill_store import SpillStore
+from .tool_selection import ToolSelector
+from .tool_util import ToolScheduler, execute_tools
+from .tracing import JSONLExporter, SpanAggregator, Tracer
 
-__all__ = ["MessageHistory", "execute_tools"]
+__all__ = [
+    "CachePolicy",
+    "JSONLExporter",
+    "MessageHistory",
+    "RateLimitGovernor",
+    "SpanAggregator",
+    "SpillStore",
+    "ToolResultCache",
+    "ToolScheduler",
+    "ToolSelector",
+    "Tracer",
+    "execute_tools",
+]
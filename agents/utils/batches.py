@@ -0,0 +1,48 @@
+"""Submit Messages API requests as a Message Batch and wait for results."""
+
+import asyncio
+from typing import Any
+
+from .client_util import call_client
+
+
+async def run_batch(
+    client: Any,
+    requests: list[dict[str, Any]],
+    headers: dict[str, str] | None = None,
+    poll_interval: float = 5.0,
+    max_poll_interval: float = 60.0,
+) -> dict[str, Any]:
+    """Create a Message Batch, wait for it to end and collect its results.
+
+    The batch is polled starting at poll_interval seconds, backing off by
+    half again each time up to max_poll_interval.
+
+    Args:
+        client: Anthropic or AsyncAnthropic client
+        requests: Batch requests, each {"custom_id": ..., "params": ...}
+        headers: Extra headers sent when creating the batch
+        poll_interval: Initial delay between status checks
+        max_poll_interval: Upper bound on the delay between status checks
+
+    Returns:
+        Mapping of custom_id to its result (result.type is one of
+        succeeded, errored, canceled or expired)
+    """
+    batches = client.messages.batches
+    batch = await call_client(
+        batches.create, requests=requests, extra_headers=headers
+    )
+
+    delay = poll_interval
+    while batch.processing_status != "ended":
+        await asyncio.sleep(delay)
+        delay = min(delay * 1.5, max_poll_interval)
+        batch = await call_client(batches.retrieve, batch.id)
+
+    results = await call_client(batches.results, batch.id)
+    if hasattr(results, "__aiter__"):
+        return {entry.custom_id: entry.result async for entry in results}
+    return await asyncio.to_thread(
+        lambda: {entry.custom_id: entry.result for entry in results}
+    )
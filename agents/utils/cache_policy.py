@@ -0,0 +1,116 @@
+"""Prompt caching policy using every available cache breakpoint."""
+
+from dataclasses import dataclass
+from typing import Any
+
+# The API accepts at most this many cache_control markers per request
+MAX_BREAKPOINTS = 4
+
+
+@dataclass
+class CacheTurn:
+    """Cache usage of one request."""
+
+    cache_read: int
+    cache_write: int
+    uncached: int
+
+    @property
+    def read_ratio(self) -> float:
+        """Share of input tokens served from the cache."""
+        total = self.cache_read + self.cache_write + self.uncached
+        return self.cache_read / total if total else 0.0
+
+
+class CachePolicy:
+    """Places cache breakpoints on tools, system prompt and message body.
+
+    The tool definitions and the system prompt each get a breakpoint, so
+    the stable prefix stays cached however the conversation changes.
+    The remaining breakpoints form a ladder on the message body: the
+    newest block plus the tails of the previous requests, so every
+    request can read what the one before it wrote. The stable prefix may
+    use the 1-hour TTL, which outlives pauses between sessions; the body
+    always uses the default 5 minutes.
+    """
+
+    def __init__(
+        self,
+        cache_tools: bool = True,
+        cache_system: bool = True,
+        prefix_ttl: str | None = None,
+    ):
+        """Initialize a CachePolicy.
+
+        Args:
+            cache_tools: Put a breakpoint after the tool definitions
+            cache_system: Put a breakpoint after the system prompt
+            prefix_ttl: TTL for the tools and system breakpoints, "5m" or
+                "1h" (None uses the API default of 5 minutes)
+        """
+        if prefix_ttl not in (None, "5m", "1h"):
+            raise ValueError("prefix_ttl must be None, '5m' or '1h'")
+        self.cache_tools = cache_tools
+        self.cache_system = cache_system
+        self.prefix_ttl = prefix_ttl
+        self.turns: list[CacheTurn] = []
+
+    def fork(self) -> "CachePolicy":
+        """Return a policy with the same settings and no recorded turns."""
+        return CachePolicy(
+            self.cache_tools, self.cache_system, self.prefix_ttl
+        )
+
+    def _marker(self) -> dict[str, str]:
+        marker = {"type": "ephemeral"}
+        if self.prefix_ttl:
+            marker["ttl"] = self.prefix_ttl
+        return marker
+
+    def mark_prefix(
+        self, tools: list[dict[str, Any]], system: str
+    ) -> tuple[list[dict[str, Any]], str | list[dict[str, Any]], int]:
+        """Mark tools and system for caching.
+
+        Returns (tools, system, breakpoints left for the message body).
+        """
+        used = 0
+        if self.cache_tools and tools:
+            last = {**tools[-1], "cache_control": self._marker()}
+            tools = tools[:-1] + [last]
+            used += 1
+        if self.cache_system and system:
+            system = [
+                {
+                    "type": "text",
+                    "text": system,
+                    "cache_control": self._marker(),
+                }
+            ]
+            used += 1
+        return tools, system, MAX_BREAKPOINTS - used
+
+    def record(self, usage: Any) -> CacheTurn:
+        """Record a response's cache usage."""
+        turn = CacheTurn(
+            cache_read=getattr(usage, "cache_read_input_tokens", 0) or 0,
+            cache_write=getattr(usage, "cache_creation_input_tokens", 0) or 0,
+            uncached=usage.input_tokens or 0,
+        )
+        self.turns.append(turn)
+        return turn
+
+    def summary(self) -> dict[str, float]:
+        """Return token totals and the overall cache read ratio."""
+        total = CacheTurn(
+            cache_read=sum(turn.cache_read for turn in self.turns),
+            cache_write=sum(turn.cache_write for turn in self.turns),
+            uncached=sum(turn.uncached for turn in self.turns),
+        )
+        return {
+            "turns": len(self.turns),
+            "cache_read": total.cache_read,
+            "cache_write": total.cache_write,
+            "uncached": total.uncached,
+            "read_ratio": total.read_ratio,
+        }
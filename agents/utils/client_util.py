@@ -0,0 +1,16 @@
+"""Helpers for code that accepts both sync and async Anthropic clients."""
+
+import asyncio
+import inspect
+from typing import Any, Callable
+
+
+async def call_client(function: Callable, *args: Any, **kwargs: Any) -> Any:
+    """Call a sync or async client method from async code.
+
+    Async methods are awaited; sync ones run in a worker thread so a
+    blocking request doesn't stall the event loop.
+    """
+    if inspect.iscoroutinefunction(inspect.unwrap(function)):
+        return await function(*args, **kwargs)
+    return await asyncio.to_thread(function, *args, **kwargs)
@@ -1,12 +1,23 @@
 """Connection handling for MCP servers."""
 
+import asyncio
+import weakref
 from abc import ABC, abstractmethod
 from contextlib import AsyncExitStack
-from typing import Any
+from typing import Any, Callable
 
-from mcp import ClientSession, StdioServerParameters
+import httpx
+from mcp import ClientSession, StdioServerParameters, types
 from mcp.client.sse import sse_client
 from mcp.client.stdio import stdio_client
+from mcp.client.streamable_http import streamablehttp_client
+
+try:
+    import h2  # noqa: F401  (needed by httpx for HTTP/2)
+except ImportError:
+    HTTP2_AVAILABLE = False
+else:
+    HTTP2_AVAILABLE = True
 
 from ..tools.mcp_tool import MCPTool
 
@@ -16,6 +27,38 @@ class MCPConnection(ABC):
 
     def __init__(self):
         self.session = None
+        # Called when the server reports that its tool list changed
+        self.on_tools_changed: Callable[[], None] | None = None
+
+    @abstractmethod
+    async def __aenter__(self):
+        """Open the connection and its session."""
+
+    @abstractmethod
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Close the connection and its session."""
+
+    async def list_tools(self) -> Any:
+        """Retrieve available tools from the MCP server."""
+        response = await self.session.list_tools()
+        return response.tools
+
+    async def ping(self) -> None:
+        """Check that the MCP server is still responding."""
+        await self.session.send_ping()
+
+    async def call_tool(
+        self, tool_name: str, arguments: dict[str, Any]
+    ) -> Any:
+        """Call a tool on the MCP server with provided arguments."""
+        return await self.session.call_tool(tool_name, arguments=arguments)
+
+
+class MCPTransportConnection(MCPConnection):
+    """Connection to one MCP server over a stdio, SSE or HTTP transport."""
+
+    def __init__(self):
+        super().__init__()
         self._rw_ctx = None
         self._session_ctx = None
 
@@ -25,21 +68,37 @@ class MCPConnection(ABC):
 
     async def __aenter__(self):
         """Initialize MCP server connection."""
-        self._rw_ctx = await self._create_rw_context()
-        read_write = await self._rw_ctx.__aenter__()
-        read, write = read_write
-        self._session_ctx = ClientSession(read, write)
-        self.session = await self._session_ctx.__aenter__()
-        await self.session.initialize()
+        try:
+            rw_ctx = await self._create_rw_context()
+            read_write = await rw_ctx.__aenter__()
+            self._rw_ctx = rw_ctx
+            # Streamable HTTP also yields a session ID getter, unused here
+            read, write = read_write[:2]
+            session_ctx = ClientSession(
+                read, write, message_handler=self._handle_message
+            )
+            self.session = await session_ctx.__aenter__()
+            self._session_ctx = session_ctx
+            await self.session.initialize()
+        except BaseException as e:
+            # A server that fails or hangs while starting is still shut down
+            await self.__aexit__(type(e), e, e.__traceback__)
+            raise
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Clean up MCP server connection resources."""
         try:
-            if self._session_ctx:
-                await self._session_ctx.__aexit__(exc_type, exc_val, exc_tb)
-            if self._rw_ctx:
-                await self._rw_ctx.__aexit__(exc_type, exc_val, exc_tb)
+            try:
+                if self._session_ctx:
+                    await self._session_ctx.__aexit__(
+                        exc_type, exc_val, exc_tb
+                    )
+            finally:
+                # Runs even if the session re-raises a cancellation, so
+                # the server process is always shut down
+                if self._rw_ctx:
+                    await self._rw_ctx.__aexit__(exc_type, exc_val, exc_tb)
         except Exception as e:
             print(f"Error during cleanup: {e}")
         finally:
@@ -47,19 +106,71 @@ class MCPConnection(ABC):
             self._session_ctx = None
             self._rw_ctx = None
 
-    async def list_tools(self) -> Any:
-        """Retrieve available tools from the MCP server."""
-        response = await self.session.list_tools()
-        return response.tools
+    async def _handle_message(self, message: Any) -> None:
+        """Watch incoming messages for tool list change notifications."""
+        if (
+            isinstance(message, types.ServerNotification)
+            and isinstance(message.root, types.ToolListChangedNotification)
+            and self.on_tools_changed
+        ):
+            self.on_tools_changed()
 
-    async def call_tool(
-        self, tool_name: str, arguments: dict[str, Any]
-    ) -> Any:
-        """Call a tool on the MCP server with provided arguments."""
-        return await self.session.call_tool(tool_name, arguments=arguments)
 
+class ConnectionOwner:
+    """Holds a connection open in a task of its own until it is closed.
+
+    Entering and exiting a connection's context must happen in the same
+    task, so a connection shared by many callers is opened and closed by
+    an owner task. Callers wait on ready for the open connection.
+    """
+
+    def __init__(self, connection: MCPConnection):
+        self.connection = connection
+        self.ready: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.closing = asyncio.Event()
+        self.task = asyncio.create_task(self._own())
 
-class MCPConnectionStdio(MCPConnection):
+    @property
+    def is_open(self) -> bool:
+        """Whether the connection has started and isn't closing."""
+        return (
+            self.ready.done()
+            and not self.task.done()
+            and not self.closing.is_set()
+        )
+
+    async def wait_ready(self) -> MCPConnection:
+        """Wait for the connection to open; raises if it failed to start."""
+        return await asyncio.shield(self.ready)
+
+    async def _own(self) -> None:
+        try:
+            async with self.connection:
+                self.ready.set_result(self.connection)
+                await self.closing.wait()
+        except Exception as e:
+            if not self.ready.done():
+                self.ready.set_exception(e)
+        finally:
+            if not self.ready.done():
+                # Cancelled while starting; release anyone waiting on it
+                self.ready.set_exception(
+                    ConnectionError("MCP server closed during startup")
+                )
+            if not self.ready.cancelled():
+                # Mark any error retrieved, since there may be no waiter
+                self.ready.exception()
+
+    async def close(self) -> None:
+        """Close the connection and wait for its owner task to finish."""
+        self.closing.set()
+        if not self.ready.done():
+            # Still starting up, possibly hung; cancel rather than wait
+            self.task.cancel()
+        await asyncio.gather(self.task, return_exceptions=True)
+
+
+class MCPConnectionStdio(MCPTransportConnection):
     """MCP connection using standard input/output."""
 
     def __init__(
@@ -78,7 +189,7 @@ class MCPConnectionStdio(MCPConnection):
         )
 
 
-class MCPConnectionSSE(MCPConnection):
+class MCPConnectionSSE(MCPTransportConnection):
     """MCP connection using Server-Sent Events."""
 
     def __init__(self, url: str, headers: dict[str, str] = None):
@@ -90,17 +201,288 @@ class MCPConnectionSSE(MCPConnection):
         return sse_client(url=self.url, headers=self.headers)
 
 
+# Bounds on reading the rest of a response the MCP client stopped reading
+DRAIN_TIMEOUT = 1.0
+DRAIN_BYTES = 64 * 1024
+
+
+class _DrainingStream(httpx.AsyncByteStream):
+    """Response body that is read to the end before it is closed.
+
+    The MCP client closes an SSE response as soon as the JSON-RPC reply
+    arrives, just before the server ends the stream. Closing an HTTP/1.1
+    response early discards its connection, so the few bytes left are
+    read first and the connection goes back to the pool.
+    """
+
+    def __init__(self, stream: httpx.AsyncByteStream):
+        self._stream = stream
+        self._chunks: Any = None
+        self._done = False
+
+    async def __aiter__(self):
+        self._chunks = self._stream.__aiter__()
+        async for chunk in self._chunks:
+            yield chunk
+        self._done = True
+
+    async def _drain(self) -> None:
+        received = 0
+        async for chunk in self._chunks:
+            received += len(chunk)
+            if received > DRAIN_BYTES:
+                return
+
+    async def aclose(self) -> None:
+        if self._chunks is not None and not self._done:
+            try:
+                await asyncio.wait_for(self._drain(), DRAIN_TIMEOUT)
+            except (asyncio.TimeoutError, httpx.HTTPError):
+                pass
+        await self._stream.aclose()
+
+
+class _SharedTransport(httpx.AsyncBaseTransport):
+    """A session's view of a shared connection pool.
+
+    Every MCP session gets its own httpx.AsyncClient, and closing a client
+    closes its transport, so clients get this wrapper instead of the pool:
+    requests go to the pool and closing it is left to its last user. The
+    GET stream a session keeps open for server notifications would hold a
+    pooled connection for its whole life, so it gets its own connection.
+    """
+
+    def __init__(self, pool: httpx.AsyncHTTPTransport):
+        self.pool = pool
+        self._stream: httpx.AsyncHTTPTransport | None = None
+
+    async def handle_async_request(
+        self, request: httpx.Request
+    ) -> httpx.Response:
+        if request.method == "GET":
+            if self._stream is None:
+                self._stream = httpx.AsyncHTTPTransport()
+            return await self._stream.handle_async_request(request)
+        response = await self.pool.handle_async_request(request)
+        response.stream = _DrainingStream(response.stream)
+        return response
+
+    async def aclose(self) -> None:
+        if self._stream is not None:
+            await self._stream.aclose()
+
+
+# Keep-alive pools by event loop and settings, with their user counts.
+# Pools can't move between loops, so each loop gets its own.
+_http_pools: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop,
+    dict[tuple[bool, int], list[Any]],
+] = weakref.WeakKeyDictionary()
+
+
+class MCPConnectionHTTP(MCPTransportConnection):
+    """MCP connection using streamable HTTP.
+
+    Sessions on the same event loop share one keep-alive connection pool
+    (HTTP/2 when the h2 package is installed), so many concurrent tool
+    calls, across servers on the same host, reuse a few connections
+    instead of each holding a stream open.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        headers: dict[str, str] = None,
+        timeout: float = 30.0,
+        http2: bool = True,
+        max_connections: int = 10,
+    ):
+        """Initialize an MCPConnectionHTTP.
+
+        Args:
+            url: Streamable HTTP endpoint of the server
+            headers: Headers sent with every request
+            timeout: Seconds to wait for a response to start
+            http2: Use HTTP/2 if the server and the h2 package support it
+            max_connections: Size of the shared connection pool
+        """
+        super().__init__()
+        self.url = url
+        self.headers = headers or {}
+        self.timeout = timeout
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self.max_connections = max_connections
+        self._pool_key: tuple[bool, int] | None = None
+
+    def _acquire_pool(self) -> httpx.AsyncHTTPTransport:
+        pools = _http_pools.setdefault(asyncio.get_running_loop(), {})
+        self._pool_key = (self.http2, self.max_connections)
+        if self._pool_key not in pools:
+            transport = httpx.AsyncHTTPTransport(
+                http2=self.http2,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+            pools[self._pool_key] = [transport, 0]
+        pools[self._pool_key][1] += 1
+        return pools[self._pool_key][0]
+
+    async def _release_pool(self) -> None:
+        if self._pool_key is None:
+            return
+        pools = _http_pools.get(asyncio.get_running_loop(), {})
+        key, self._pool_key = self._pool_key, None
+        if key in pools:
+            pools[key][1] -= 1
+            if pools[key][1] <= 0:
+                transport = pools.pop(key)[0]
+                await transport.aclose()
+
+    async def _create_rw_context(self):
+        transport = _SharedTransport(self._acquire_pool())
+
+        def client_factory(
+            headers: dict[str, str] | None = None,
+            timeout: httpx.Timeout | None = None,
+            auth: httpx.Auth | None = None,
+        ) -> httpx.AsyncClient:
+            return httpx.AsyncClient(
+                transport=transport,
+                headers=headers,
+                timeout=timeout,
+                auth=auth,
+                follow_redirects=True,
+            )
+
+        return streamablehttp_client(
+            url=self.url,
+            headers=self.headers,
+            timeout=self.timeout,
+            httpx_client_factory=client_factory,
+        )
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        try:
+            await super().__aexit__(exc_type, exc_val, exc_tb)
+        finally:
+            await self._release_pool()
+
+
+class MCPConnectionReplicas(MCPConnection):
+    """Several copies of one MCP server, used as a single connection.
+
+    A stdio server is one process handling one session, so a CPU-bound
+    server serializes every call made to it. This starts each replica in
+    its own process and sends each call to the replica with the fewest
+    calls in flight, waiting when all are at max_in_flight.
+    """
+
+    def __init__(
+        self, replicas: list[MCPConnection], max_in_flight: int = 1
+    ):
+        """Initialize an MCPConnectionReplicas.
+
+        Args:
+            replicas: Unopened connections to identical servers
+            max_in_flight: Calls each replica may run at once
+        """
+        super().__init__()
+        if not replicas:
+            raise ValueError("At least one replica is required")
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+        self.replicas = replicas
+        self.max_in_flight = max_in_flight
+        self.in_flight = [0] * len(replicas)
+        self._available: asyncio.Condition | None = None
+        self._owners: list[ConnectionOwner] = []
+        for replica in replicas:
+            replica.on_tools_changed = self._tools_changed
+
+    def _tools_changed(self) -> None:
+        if self.on_tools_changed:
+            self.on_tools_changed()
+
+    async def __aenter__(self):
+        """Start every replica concurrently."""
+        self._available = asyncio.Condition()
+        self._owners = [ConnectionOwner(replica) for replica in self.replicas]
+        try:
+            await asyncio.gather(
+                *(owner.wait_ready() for owner in self._owners)
+            )
+        except BaseException:
+            await self.__aexit__(None, None, None)
+            raise
+        self.session = self.replicas[0].session
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Close every replica."""
+        await asyncio.gather(*(owner.close() for owner in self._owners))
+        self._owners = []
+        self.session = None
+
+    async def list_tools(self) -> Any:
+        """Retrieve available tools from the first replica."""
+        return await self.replicas[0].list_tools()
+
+    async def ping(self) -> None:
+        """Check that every replica is still responding."""
+        await asyncio.gather(*(replica.ping() for replica in self.replicas))
+
+    async def call_tool(
+        self, tool_name: str, arguments: dict[str, Any]
+    ) -> Any:
+        """Call a tool on the least busy replica."""
+        async with self._available:
+            await self._available.wait_for(
+                lambda: min(self.in_flight) < self.max_in_flight
+            )
+            index = min(
+                range(len(self.replicas)), key=self.in_flight.__getitem__
+            )
+            self.in_flight[index] += 1
+        try:
+            return await self.replicas[index].call_tool(tool_name, arguments)
+        finally:
+            async with self._available:
+                self.in_flight[index] -= 1
+                self._available.notify()
+
+
 def create_mcp_connection(config: dict[str, Any]) -> MCPConnection:
     """Factory function to create the appropriate MCP connection."""
     conn_type = config.get("type", "stdio").lower()
+    replicas = config.get("replicas", 1)
+    if (
+        not isinstance(replicas, int)
+        or isinstance(replicas, bool)
+        or replicas < 1
+    ):
+        raise ValueError(
+            f"replicas must be a positive integer, got {replicas!r}"
+        )
+    if replicas > 1 and conn_type != "stdio":
+        raise ValueError("Replicas are only supported for STDIO connections")
 
     if conn_type == "stdio":
         if not config.get("command"):
             raise ValueError("Command is required for STDIO connections")
-        return MCPConnectionStdio(
-            command=config["command"],
-            args=config.get("args"),
-            env=config.get("env"),
+        connections = [
+            MCPConnectionStdio(
+                command=config["command"],
+                args=config.get("args", []),
+                env=config.get("env"),
+            )
+            for _ in range(replicas)
+        ]
+        if len(connections) == 1:
+            return connections[0]
+        return MCPConnectionReplicas(
+            connections, max_in_flight=config.get("max_in_flight", 1)
         )
 
     elif conn_type == "sse":
@@ -110,6 +492,17 @@ def create_mcp_connection(config: dict[str, Any]) -> MCPConnection:
             url=config["url"], headers=config.get("headers")
         )
 
+    elif conn_type in ("http", "streamable_http", "streamable-http"):
+        if not config.get("url"):
+            raise ValueError("URL is required for HTTP connections")
+        return MCPConnectionHTTP(
+            url=config["url"],
+            headers=config.get("headers"),
+            timeout=config.get("timeout", 30.0),
+            http2=config.get("http2", True),
+            max_connections=config.get("max_connections", 10),
+        )
+
     else:
         raise ValueError(f"Unsupported connection type: {conn_type}")
 
@@ -118,33 +511,16 @@ async def setup_mcp_connections(
     mcp_servers: list[dict[str, Any]] | None,
     stack: AsyncExitStack,
 ) -> list[MCPTool]:
-    """Set up MCP server connections and create tool interfaces."""
-    if not mcp_servers:
-        return []
-
-    mcp_tools = []
+    """Set up MCP server connections and create tool interfaces.
 
-    for config in mcp_servers:
-        try:
-            connection = create_mcp_connection(config)
-            await stack.enter_async_context(connection)
-            tool_definitions = await connection.list_tools()
-
-            for tool_info in tool_definitions:
-                mcp_tools.append(
-                    MCPTool(
-                        name=tool_info.name,
-                        description=tool_info.description
-                        or f"MCP tool: {tool_info.name}",
-                        input_schema=tool_info.inputSchema,
-                        connection=connection,
-                    )
-                )
+    Servers are started concurrently in a private connection pool that is
+    closed when the stack exits.
+    """
+    from .mcp_pool import MCPConnectionPool
 
-        except Exception as e:
-            print(f"Error setting up MCP server {config}: {e}")
+    if not mcp_servers:
+        return []
 
-    print(
-        f"Loaded {len(mcp_tools)} MCP tools from {len(mcp_servers)} servers."
-    )
-    return mcp_tools
+    pool = MCPConnectionPool(idle_timeout=None)
+    stack.push_async_callback(asyncio.to_thread, pool.close)
+    return await pool.get_tools(mcp_servers)
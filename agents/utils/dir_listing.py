@@ -0,0 +1,174 @@
+"""Directory listing with glob patterns, .gitignore pruning and paging."""
+
+import os
+import threading
+from collections import OrderedDict
+from fnmatch import fnmatchcase
+from typing import Iterator
+
+MAX_CACHED_SNAPSHOTS = 4096
+
+# Directory path -> (mtime_ns, sorted [(name, is_dir, is_symlink)])
+_snapshots: OrderedDict[str, tuple[int, list]] = OrderedDict()
+# .gitignore path -> (mtime_ns, [(pattern, negate, dir_only, anchored)])
+_gitignores: dict[str, tuple[int, list]] = {}
+# Listings run in worker threads; both caches are only touched under this
+_cache_lock = threading.Lock()
+
+
+def _snapshot(directory: str) -> list[tuple[str, bool, bool]]:
+    """Return a directory's entries, rescanning only if its mtime changed."""
+    mtime = os.stat(directory).st_mtime_ns
+    with _cache_lock:
+        cached = _snapshots.get(directory)
+        if cached is not None and cached[0] == mtime:
+            _snapshots.move_to_end(directory)
+            return cached[1]
+
+    with os.scandir(directory) as it:
+        entries = sorted(
+            (entry.name, _is_dir(entry), entry.is_symlink()) for entry in it
+        )
+    with _cache_lock:
+        _snapshots[directory] = (mtime, entries)
+        _snapshots.move_to_end(directory)
+        while len(_snapshots) > MAX_CACHED_SNAPSHOTS:
+            _snapshots.popitem(last=False)
+    return entries
+
+
+def _is_dir(entry: os.DirEntry) -> bool:
+    try:
+        return entry.is_dir()
+    except OSError:
+        return False
+
+
+def _gitignore_rules(path: str) -> list[tuple[str, bool, bool, bool]]:
+    """Parse a .gitignore file into (pattern, negate, dir_only, anchored)."""
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return []
+    with _cache_lock:
+        cached = _gitignores.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    try:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return []
+
+    rules = []
+    for line in lines:
+        line = line.rstrip()
+        if not line or line.startswith("#"):
+            continue
+        negate = line.startswith("!")
+        line = line.lstrip("!")
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        anchored = "/" in line
+        rules.append((line.lstrip("/"), negate, dir_only, anchored))
+    with _cache_lock:
+        _gitignores[path] = (mtime, rules)
+    return rules
+
+
+def _ignored(
+    parts: tuple[str, ...],
+    is_dir: bool,
+    rules: list[tuple[tuple[str, ...], str, bool, bool, bool]],
+) -> bool:
+    """Apply .gitignore rules in order; the last matching rule wins."""
+    ignored = False
+    for base, pattern, negate, dir_only, anchored in rules:
+        if dir_only and not is_dir:
+            continue
+        rel = parts[len(base) :]
+        target = "/".join(rel) if anchored else rel[-1]
+        if fnmatchcase(target, pattern):
+            ignored = not negate
+    return ignored
+
+
+def _segment_matches(name: str, segment: str) -> bool:
+    # Like glob, wildcards don't match hidden names
+    if name.startswith(".") and not segment.startswith("."):
+        return False
+    return fnmatchcase(name, segment)
+
+
+def _match(
+    parts: tuple[str, ...], segments: tuple[str, ...], partial: bool
+) -> bool:
+    """Match path parts against pattern segments.
+
+    With partial=True, returns whether some descendant of parts could
+    still match, which is used to prune the walk.
+    """
+    if not parts:
+        if partial:
+            return bool(segments)
+        return all(segment == "**" for segment in segments)
+    if not segments:
+        return False
+    if segments[0] == "**":
+        return _match(parts, segments[1:], partial) or (
+            not parts[0].startswith(".")
+            and _match(parts[1:], segments, partial)
+        )
+    return _segment_matches(parts[0], segments[0]) and _match(
+        parts[1:], segments[1:], partial
+    )
+
+
+def walk(
+    root: str,
+    pattern: str = "*",
+    max_depth: int = 0,
+    after: tuple[str, ...] = (),
+) -> Iterator[tuple[tuple[str, ...], bool]]:
+    """Yield (relative parts, is_dir) for entries matching a pattern.
+
+    Entries come in sorted depth-first order, which is the order of their
+    part tuples, so paging can resume strictly after a previous entry by
+    skipping whole subtrees that sort before it. Directories that can't
+    contain a match, are ignored by a .gitignore, or are deeper than
+    max_depth (0 means unlimited) are never scanned; ones that can't be
+    read are skipped.
+    """
+    segments = tuple(s for s in pattern.split("/") if s)
+
+    def visit(directory: str, parts: tuple[str, ...], rules: list):
+        try:
+            entries = _snapshot(directory)
+        except OSError:
+            # Unreadable, or removed mid-walk: skip it, as glob does
+            return
+        if any(name == ".gitignore" for name, _, _ in entries):
+            ignore_path = os.path.join(directory, ".gitignore")
+            rules = rules + [
+                (parts, *rule) for rule in _gitignore_rules(ignore_path)
+            ]
+
+        for name, is_dir, is_symlink in entries:
+            child = parts + (name,)
+            if name == ".git" or _ignored(child, is_dir, rules):
+                continue
+            cursor_prefix = after[: len(child)]
+            if child < cursor_prefix:
+                continue
+            if child > cursor_prefix and _match(child, segments, False):
+                yield child, is_dir
+            if (
+                is_dir
+                and not is_symlink
+                and (not max_depth or len(child) < max_depth)
+                and _match(child, segments, True)
+            ):
+                yield from visit(os.path.join(directory, name), child, rules)
+
+    yield from visit(root, (), [])
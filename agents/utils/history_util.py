@@ -1,7 +1,25 @@
 """Message history with token tracking and prompt caching."""
 
+import asyncio
+import json
+from bisect import bisect_left
+from collections import deque
 from typing import Any
 
+from .client_util import call_client
+from .token_count import count_system_tokens
+
+
+TRUNCATION_NOTICE_TOKENS = 25
+TRUNCATION_NOTICE = "[Earlier history has been truncated.]"
+
+SUMMARY_PROMPT = (
+    "Summarize the conversation transcript below so it can replace the "
+    "original in an assistant's context. Keep the user's goals, decisions "
+    "made, key facts and results of tool calls (file paths, values, "
+    "errors) so they don't need to be repeated. Be concise."
+)
+
 
 class MessageHistory:
     """Manages chat history with token tracking and context management."""
@@ -13,33 +31,53 @@ class MessageHistory:
         context_window_tokens: int,
         client: Any,
         enable_caching: bool = True,
+        cache_breakpoints: int = 1,
+        compaction_threshold: float | None = None,
+        compaction_model: str = "claude-haiku-4-5-20251001",
     ):
+        """Initialize a MessageHistory.
+
+        Args:
+            model: Model used for the conversation
+            system: System prompt
+            context_window_tokens: Hard limit enforced by truncate()
+            client: Anthropic client used for token counting and summaries
+            enable_caching: Mark the last block with cache_control
+            cache_breakpoints: Number of recent request tails kept marked
+                with cache_control, newest first (see format_for_api)
+            compaction_threshold: Fraction of the context window above which
+                the oldest history is summarized in the background. None
+                disables compaction so only truncation applies.
+            compaction_model: Model used to write compaction summaries
+        """
         self.model = model
         self.system = system
         self.context_window_tokens = context_window_tokens
         self.messages: list[dict[str, Any]] = []
         self.total_tokens = 0
         self.enable_caching = enable_caching
-        self.message_tokens: list[tuple[int, int]] = (
-            []
-        )  # List of (input_tokens, output_tokens) tuples
+        self.cache_breakpoints = cache_breakpoints
+        self.message_tokens: deque[tuple[int, int]] = (
+            deque()
+        )  # (input_tokens, output_tokens) per user/assistant pair
+        # Prefix-sum index over message_tokens: entry k is the running
+        # total up to and including pair k's input tokens. Entries are
+        # absolute; subtract _prefix_base to get sums over the live pairs.
+        self._token_prefix: list[int] = []
+        self._prefix_base = 0
+        self._prefix_end = 0
         self.client = client
+        # Blocks carrying cache_control markers, oldest first
+        self._cached_blocks: deque[dict[str, Any]] = deque()
+        # System prompt tokens, counted lazily on first use
+        self.system_tokens: int | None = None
 
-        # set initial total tokens to system prompt
-        try:
-            system_token = (
-                self.client.messages.count_tokens(
-                    model=self.model,
-                    system=self.system,
-                    messages=[{"role": "user", "content": "test"}],
-                ).input_tokens
-                - 1
-            )
-
-        except Exception:
-            system_token = len(self.system) / 4
-
-        self.total_tokens = system_token
+        self.compaction_threshold = compaction_threshold
+        self.compaction_model = compaction_model
+        # Pending summary as (task, pairs covered, generation started at)
+        self._compaction: tuple[asyncio.Task, int, int] | None = None
+        # Bumped whenever pairs are dropped, to discard stale summaries
+        self._generation = 0
 
     async def add_message(
         self,
@@ -47,78 +85,230 @@ class MessageHistory:
         content: str | list[dict[str, Any]],
         usage: Any | None = None,
     ):
-        """Add a message to the history and track token usage."""
+        """Add a message to the history and track token usage.
+
+        Content is stored in API format once, here, so format_for_api can
+        return the log as-is instead of rebuilding it every turn.
+        """
         if isinstance(content, str):
             content = [{"type": "text", "text": content}]
+        else:
+            content = [_block_to_dict(block) for block in content]
 
         message = {"role": role, "content": content}
         self.messages.append(message)
 
         if role == "assistant" and usage:
+            if self.system_tokens is None:
+                self.system_tokens = await count_system_tokens(
+                    self.client, self.model, self.system
+                )
+                self.total_tokens += self.system_tokens
+
             total_input = (
                 usage.input_tokens
-                + getattr(usage, "cache_read_input_tokens", 0)
-                + getattr(usage, "cache_creation_input_tokens", 0)
+                + (getattr(usage, "cache_read_input_tokens", 0) or 0)
+                + (getattr(usage, "cache_creation_input_tokens", 0) or 0)
             )
             output_tokens = usage.output_tokens
 
             current_turn_input = total_input - self.total_tokens
             self.message_tokens.append((current_turn_input, output_tokens))
+            self._token_prefix.append(self._prefix_end + current_turn_input)
+            self._prefix_end += current_turn_input + output_tokens
             self.total_tokens += current_turn_input + output_tokens
+            self._maybe_start_compaction()
 
-    def truncate(self) -> None:
-        """Remove oldest messages when context window limit is exceeded."""
-        if self.total_tokens <= self.context_window_tokens:
+    def _maybe_start_compaction(self) -> None:
+        """Start summarizing the oldest history once past the threshold."""
+        if (
+            self.compaction_threshold is None
+            or self._compaction is not None
+            or self.total_tokens
+            <= self.context_window_tokens * self.compaction_threshold
+        ):
+            return
+
+        # Summarize enough of the oldest pairs to get back to half the
+        # threshold, always keeping the most recent pair intact
+        pairs = min(len(self.message_tokens), len(self.messages) // 2) - 1
+        if pairs < 1:
             return
+        target = self.total_tokens - (
+            self.context_window_tokens * self.compaction_threshold / 2
+        )
+        cut = bisect_left(
+            self._token_prefix, target + self._prefix_base, 0, pairs
+        )
+        cut = min(max(cut, 1), pairs)
+
+        task = asyncio.create_task(
+            self._summarize(self.messages[: 2 * cut + 1])
+        )
+        self._compaction = (task, cut, self._generation)
 
-        TRUNCATION_NOTICE_TOKENS = 25
-        TRUNCATION_MESSAGE = {
-            "role": "user",
-            "content": [
-                {
-                    "type": "text",
-                    "text": "[Earlier history has been truncated.]",
-                }
+    async def _summarize(
+        self, messages: list[dict[str, Any]]
+    ) -> tuple[str, int]:
+        """Summarize messages with the compaction model."""
+        params = {
+            "model": self.compaction_model,
+            "max_tokens": 2048,
+            "system": SUMMARY_PROMPT,
+            "messages": [
+                {"role": "user", "content": _render_transcript(messages)}
             ],
         }
+        response = await call_client(self.client.messages.create, **params)
 
-        def remove_message_pair():
-            self.messages.pop(0)
-            self.messages.pop(0)
+        summary = "".join(
+            block.text for block in response.content if block.type == "text"
+        )
+        return summary, response.usage.output_tokens
 
-            if self.message_tokens:
-                input_tokens, output_tokens = self.message_tokens.pop(0)
-                self.total_tokens -= input_tokens + output_tokens
+    def _apply_compaction(self) -> None:
+        """Swap a finished summary in for the history it covers."""
+        if self._compaction is None or not self._compaction[0].done():
+            return
+        task, pairs, generation = self._compaction
+        self._compaction = None
+        if task.cancelled() or generation != self._generation:
+            return
+        if task.exception():
+            print(f"Error compacting history: {task.exception()}")
+            return
 
-        while (
-            self.message_tokens
-            and len(self.messages) >= 2
-            and self.total_tokens > self.context_window_tokens
-        ):
-            remove_message_pair()
+        summary, summary_tokens = task.result()
+        self._drop_pairs(
+            pairs,
+            f"[Summary of earlier conversation]\n{summary}",
+            summary_tokens,
+        )
 
-            if self.messages and self.message_tokens:
-                original_input_tokens, original_output_tokens = (
-                    self.message_tokens[0]
-                )
-                self.messages[0] = TRUNCATION_MESSAGE
-                self.message_tokens[0] = (
-                    TRUNCATION_NOTICE_TOKENS,
-                    original_output_tokens,
-                )
-                self.total_tokens += (
-                    TRUNCATION_NOTICE_TOKENS - original_input_tokens
-                )
+    def truncate(self) -> None:
+        """Remove oldest messages when context window limit is exceeded.
+
+        The oldest pairs are dropped and the new first message is replaced
+        with a truncation notice. The cut point is found with one bisect
+        over the prefix-sum index and removed in one slice, so truncating
+        far past the limit costs the same as truncating a single pair.
+
+        A finished background summary is swapped in first, so with
+        compaction enabled the hard limit is rarely reached.
+        """
+        self._apply_compaction()
+        if self.total_tokens <= self.context_window_tokens:
+            return
+
+        pairs = min(len(self.message_tokens), len(self.messages) // 2)
+        if not pairs:
+            return
+
+        # Dropping pairs [0, cut) and replacing pair cut's input with the
+        # notice leaves total - (prefix[cut] - base) + notice tokens
+        excess = self.total_tokens - self.context_window_tokens
+        cut = bisect_left(
+            self._token_prefix,
+            excess + TRUNCATION_NOTICE_TOKENS + self._prefix_base,
+            0,
+            pairs,
+        )
+        self._drop_pairs(
+            max(cut, 1), TRUNCATION_NOTICE, TRUNCATION_NOTICE_TOKENS
+        )
+
+    def _drop_pairs(
+        self, count: int, notice: str, notice_tokens: int
+    ) -> None:
+        """Drop the oldest message pairs and put a notice in their place."""
+        self._generation += 1
+        if self._cached_blocks:
+            # Markers on dropped (or about to be replaced) blocks are gone
+            removed = {
+                id(block)
+                for message in self.messages[: 2 * count + 1]
+                for block in message["content"]
+            }
+            kept = deque()
+            for block in self._cached_blocks:
+                if id(block) in removed:
+                    block.pop("cache_control", None)
+                else:
+                    kept.append(block)
+            self._cached_blocks = kept
+        del self.messages[: 2 * count]
+        del self._token_prefix[:count]
+        for _ in range(count):
+            self.message_tokens.popleft()
+
+        if self.message_tokens:
+            dropped_end = self._token_prefix[0] - self.message_tokens[0][0]
+        else:
+            dropped_end = self._prefix_end
+        self.total_tokens -= dropped_end - self._prefix_base
+        self._prefix_base = dropped_end
+
+        if self.messages and self.message_tokens:
+            input_tokens, output_tokens = self.message_tokens[0]
+            self.messages[0] = {
+                "role": "user",
+                "content": [{"type": "text", "text": notice}],
+            }
+            self.message_tokens[0] = (notice_tokens, output_tokens)
+            self.total_tokens += notice_tokens - input_tokens
+            # Shift the base so the index reflects the notice's size
+            self._prefix_base += input_tokens - notice_tokens
 
     def format_for_api(self) -> list[dict[str, Any]]:
-        """Format messages for Claude API with optional caching."""
-        result = [
-            {"role": m["role"], "content": m["content"]} for m in self.messages
-        ]
+        """Format messages for Claude API with optional caching.
 
+        Returns the stored message list itself, not a copy; callers must
+        treat it as read-only. The newest block is marked with
+        cache_control and the markers of the previous cache_breakpoints - 1
+        requests are kept as a ladder, so each request reads the prefix the
+        one before it wrote even when a turn adds many blocks. Moving the
+        markers is a constant-time patch rather than a rebuild.
+        """
         if self.enable_caching and self.messages:
-            result[-1]["content"] = [
-                {**block, "cache_control": {"type": "ephemeral"}}
-                for block in self.messages[-1]["content"]
-            ]
-        return result
+            content = self.messages[-1]["content"]
+            if content and (
+                not self._cached_blocks
+                or content[-1] is not self._cached_blocks[-1]
+            ):
+                content[-1]["cache_control"] = {"type": "ephemeral"}
+                self._cached_blocks.append(content[-1])
+            while len(self._cached_blocks) > max(self.cache_breakpoints, 1):
+                self._cached_blocks.popleft().pop("cache_control", None)
+        return self.messages
+
+
+def _render_transcript(messages: list[dict[str, Any]]) -> str:
+    """Render messages as plain text for the summarizer."""
+    lines = []
+    for message in messages:
+        for block in message["content"]:
+            if block["type"] == "text":
+                text = block["text"]
+            elif block["type"] == "tool_use":
+                arguments = json.dumps(block["input"])
+                text = f"[tool call] {block['name']}({arguments})"
+            elif block["type"] == "tool_result":
+                content = block.get("content")
+                if isinstance(content, list):
+                    content = " ".join(
+                        part["text"] if part["type"] == "text"
+                        else f"[{part['type']}]"
+                        for part in content
+                    )
+                text = f"[tool result] {content}"
+            else:
+                continue
+            lines.append(f"{message['role']}: {text}")
+    return "\n\n".join(lines)
+
+
+def _block_to_dict(block: Any) -> dict[str, Any]:
+    """Convert an SDK content block (or block dict) to a plain dict."""
+    if hasattr(block, "model_dump"):
+        return block.model_dump(exclude_none=True)
+    return dict(block)
@@ -0,0 +1,87 @@
+"""Line-offset index for ranged reads of large files."""
+
+import mmap
+import os
+import threading
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+
+# Bytes per index entry; bounds the scan needed to locate any line
+CHUNK_SIZE = 64 * 1024
+MAX_CACHED_INDEXES = 32
+
+_indexes: OrderedDict[tuple[str, int, int], "LineIndex"] = OrderedDict()
+# Reads run in worker threads, so the cache is only touched under this
+_indexes_lock = threading.Lock()
+
+
+class LineIndex:
+    """Newline counts at fixed byte intervals of a file.
+
+    Entry i holds the number of newlines before byte i * CHUNK_SIZE, so
+    memory grows with file size / 64 KiB rather than with line count, and
+    any line is found by one bisect plus a scan of at most one chunk.
+    """
+
+    def __init__(self, mm: mmap.mmap):
+        self.newlines_before = array("q")
+        count = 0
+        for start in range(0, len(mm), CHUNK_SIZE):
+            self.newlines_before.append(count)
+            count += mm[start : start + CHUNK_SIZE].count(b"\n")
+        self.newline_count = count
+
+    def line_start(self, mm: mmap.mmap, line: int) -> int:
+        """Return the byte offset where a 0-based line starts."""
+        if line <= 0:
+            return 0
+        if line > self.newline_count:
+            return len(mm)
+        # Last chunk starting before the line's preceding newline
+        chunk = bisect_left(self.newlines_before, line) - 1
+        pos = chunk * CHUNK_SIZE - 1
+        for _ in range(line - self.newlines_before[chunk]):
+            pos = mm.find(b"\n", pos + 1)
+        return pos + 1
+
+
+def _get_index(path: str, mm: mmap.mmap, stat: os.stat_result) -> LineIndex:
+    """Return the index for a file version, building it on first use."""
+    key = (os.path.realpath(path), stat.st_mtime_ns, stat.st_size)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is not None:
+            _indexes.move_to_end(key)
+            return index
+
+    # Built outside the lock so other files' reads aren't held up
+    index = LineIndex(mm)
+    with _indexes_lock:
+        index = _indexes.setdefault(key, index)
+        _indexes.move_to_end(key)
+        while len(_indexes) > MAX_CACHED_INDEXES:
+            _indexes.popitem(last=False)
+    return index
+
+
+def read_lines(path: str, offset: int = 0, limit: int = 0) -> str:
+    """Read up to limit lines starting at a 0-based line offset.
+
+    The file is memory-mapped and only the requested window is decoded,
+    so reads stay O(window) after the first pass even on very large files.
+    A limit of 0 reads to the end of the file.
+    """
+    with open(path, "rb") as f:
+        stat = os.fstat(f.fileno())
+        if stat.st_size == 0:
+            return ""
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            index = _get_index(path, mm, stat)
+            start = index.line_start(mm, offset)
+            if limit > 0:
+                end = index.line_start(mm, offset + limit)
+            else:
+                end = len(mm)
+            text = mm[start:end].decode("utf-8", errors="replace")
+    return text.replace("\r\n", "\n")
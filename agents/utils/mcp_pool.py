@@ -0,0 +1,297 @@
+"""Process-wide pool of warm MCP server connections."""
+
+import asyncio
+import atexit
+import json
+import threading
+import time
+from typing import Any, Awaitable, Callable, Coroutine
+
+from ..tools.mcp_tool import MCPTool
+from .connections import (
+    ConnectionOwner,
+    MCPConnection,
+    create_mcp_connection,
+)
+
+
+# Tool catalogs by server identity, shared by every pool in the process.
+# An entry is dropped only when its server sends tools/list_changed.
+_tool_catalogs: dict[str, Any] = {}
+
+
+class _PoolEntry(ConnectionOwner):
+    """One pooled server connection, owned by a task on the pool loop."""
+
+    def __init__(self, config: dict[str, Any], connection: MCPConnection):
+        super().__init__(connection)
+        self.config = config
+        self.in_flight = 0
+        self.last_used = time.monotonic()
+
+
+class PooledMCPConnection:
+    """Handle to a pooled server that MCPTool can use from any event loop."""
+
+    def __init__(self, pool: "MCPConnectionPool", config: dict[str, Any]):
+        self.pool = pool
+        self.config = config
+        self.key = pool.key_for(config)
+
+    async def list_tools(self) -> Any:
+        """Retrieve available tools from the pooled server."""
+        return await self.pool._submit(self.pool._list_tools(self.key))
+
+    async def call_tool(
+        self, tool_name: str, arguments: dict[str, Any]
+    ) -> Any:
+        """Call a tool on the pooled server, reconnecting if it died."""
+        return await self.pool._submit(
+            self.pool._call_tool(self.key, tool_name, arguments)
+        )
+
+
+class MCPConnectionPool:
+    """Keeps MCP sessions warm across Agent.run calls.
+
+    Connections are keyed by server config and live on a dedicated event
+    loop thread, so they outlive the short-lived loops created by
+    asyncio.run(). Idle connections are health-checked with pings, dead
+    ones are reconnected on next use and unused ones are evicted.
+    """
+
+    def __init__(
+        self,
+        idle_timeout: float | None = 300.0,
+        health_check_interval: float = 30.0,
+        startup_timeout: float = 30.0,
+    ):
+        """Initialize a pool.
+
+        Args:
+            idle_timeout: Seconds a connection may sit unused before it is
+                closed (None keeps connections open until the pool closes)
+            health_check_interval: Seconds between ping/eviction sweeps
+            startup_timeout: Seconds to wait for a server to connect and
+                list its tools; a config's "startup_timeout" key overrides it
+        """
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.startup_timeout = startup_timeout
+        self._entries: dict[str, _PoolEntry] = {}
+        # Owner tasks of discarded entries that are still shutting down
+        self._shutting_down: set[asyncio.Task] = set()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._maintenance: Any = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_for(config: dict[str, Any]) -> str:
+        """Return the pool key identifying a server config."""
+        return json.dumps(config, sort_keys=True, default=str)
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """Start the pool's event loop thread on first use."""
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever,
+                    name="mcp-pool",
+                    daemon=True,
+                )
+                self._thread.start()
+                self._maintenance = asyncio.run_coroutine_threadsafe(
+                    self._maintain(), self._loop
+                )
+            return self._loop
+
+    async def _submit(self, coro: Coroutine) -> Any:
+        """Run a coroutine on the pool loop and await it from any loop."""
+        future = asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+        return await asyncio.wrap_future(future)
+
+    async def get_tools(
+        self, mcp_servers: list[dict[str, Any]] | None
+    ) -> list[MCPTool]:
+        """Return tool interfaces for servers, connecting only if needed.
+
+        All servers are started concurrently, each with its own timeout,
+        so one slow or broken server doesn't delay the others.
+        """
+        if not mcp_servers:
+            return []
+
+        results = await asyncio.gather(
+            *[self._load_server(config) for config in mcp_servers],
+            return_exceptions=True,
+        )
+
+        mcp_tools = []
+        for config, result in zip(mcp_servers, results):
+            if isinstance(result, BaseException):
+                print(f"Error setting up MCP server {config}: {result!r}")
+            else:
+                mcp_tools.extend(result)
+
+        print(
+            f"Loaded {len(mcp_tools)} MCP tools "
+            f"from {len(mcp_servers)} servers."
+        )
+        return mcp_tools
+
+    async def _load_server(self, config: dict[str, Any]) -> list[MCPTool]:
+        """Connect to one server and wrap its tools."""
+        connection = PooledMCPConnection(self, config)
+        try:
+            tool_definitions = await asyncio.wait_for(
+                connection.list_tools(),
+                timeout=config.get("startup_timeout", self.startup_timeout),
+            )
+        except asyncio.TimeoutError:
+            # Don't leave a hung server for the next caller to wait on;
+            # shutting it down can take a while, so don't wait for that
+            asyncio.run_coroutine_threadsafe(
+                self._abandon_startup(connection.key), self._ensure_loop()
+            )
+            raise
+        return [
+            MCPTool(
+                name=tool_info.name,
+                description=tool_info.description
+                or f"MCP tool: {tool_info.name}",
+                input_schema=tool_info.inputSchema,
+                connection=connection,
+                cacheable=bool(
+                    tool_info.annotations
+                    and tool_info.annotations.readOnlyHint
+                ),
+            )
+            for tool_info in tool_definitions
+        ]
+
+    async def _acquire(self, key: str) -> _PoolEntry:
+        """Return a live entry for key, starting a connection if needed."""
+        entry = self._entries.get(key)
+        if entry is None or entry.task.done():
+            config = json.loads(key)
+            connection = create_mcp_connection(config)
+            connection.on_tools_changed = lambda: _tool_catalogs.pop(
+                key, None
+            )
+            entry = _PoolEntry(config, connection)
+            self._entries[key] = entry
+        await entry.wait_ready()
+        entry.last_used = time.monotonic()
+        return entry
+
+    async def _discard(self, entry: _PoolEntry) -> None:
+        """Close an entry and forget it."""
+        key = self.key_for(entry.config)
+        if self._entries.get(key) is entry:
+            del self._entries[key]
+        self._shutting_down.add(entry.task)
+        try:
+            await entry.close()
+        finally:
+            self._shutting_down.discard(entry.task)
+
+    async def _abandon_startup(self, key: str) -> None:
+        """Discard an entry whose server never finished starting."""
+        entry = self._entries.get(key)
+        if entry is not None and not entry.ready.done():
+            await self._discard(entry)
+
+    async def _is_alive(self, entry: _PoolEntry) -> bool:
+        """Ping an entry's server."""
+        if not entry.is_open:
+            return False
+        try:
+            await asyncio.wait_for(entry.connection.ping(), timeout=5)
+            return True
+        except Exception:
+            return False
+
+    async def _list_tools(self, key: str) -> Any:
+        async def cached_list_tools(connection: MCPConnection) -> Any:
+            if key not in _tool_catalogs:
+                _tool_catalogs[key] = await connection.list_tools()
+            return _tool_catalogs[key]
+
+        return await self._run(key, cached_list_tools)
+
+    async def _call_tool(
+        self, key: str, tool_name: str, arguments: dict[str, Any]
+    ) -> Any:
+        return await self._run(
+            key, lambda conn: conn.call_tool(tool_name, arguments)
+        )
+
+    async def _run(
+        self, key: str, operation: Callable[[MCPConnection], Awaitable]
+    ) -> Any:
+        """Run an operation on a pooled connection, reconnecting once."""
+        for attempt in range(2):
+            entry = await self._acquire(key)
+            entry.in_flight += 1
+            try:
+                return await operation(entry.connection)
+            except Exception:
+                # Only retry when the server itself is gone, never a
+                # call that merely failed
+                if attempt or await self._is_alive(entry):
+                    raise
+            finally:
+                entry.in_flight -= 1
+                entry.last_used = time.monotonic()
+            await self._discard(entry)
+
+    async def _maintain(self) -> None:
+        """Periodically ping idle connections and evict unused ones."""
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            now = time.monotonic()
+            for entry in list(self._entries.values()):
+                if entry.in_flight or not entry.ready.done():
+                    continue
+                idle = now - entry.last_used
+                if (
+                    self.idle_timeout is not None
+                    and idle > self.idle_timeout
+                ) or not await self._is_alive(entry):
+                    await self._discard(entry)
+
+    async def _close_all(self) -> None:
+        for entry in list(self._entries.values()):
+            await self._discard(entry)
+        # Let abandoned startups finish shutting their servers down
+        await asyncio.gather(*self._shutting_down, return_exceptions=True)
+
+    def close(self) -> None:
+        """Close every pooled connection and stop the pool loop."""
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        self._maintenance.cancel()
+        try:
+            asyncio.run_coroutine_threadsafe(self._close_all(), loop).result(
+                timeout=10
+            )
+        except Exception as e:
+            print(f"Error closing MCP connection pool: {e!r}")
+        loop.call_soon_threadsafe(loop.stop)
+        self._thread.join(timeout=5)
+
+
+_default_pool: MCPConnectionPool | None = None
+
+
+def get_default_pool() -> MCPConnectionPool:
+    """Return the process-wide pool shared by all agents."""
+    global _default_pool
+    if _default_pool is None:
+        _default_pool = MCPConnectionPool()
+        atexit.register(_default_pool.close)
+    return _default_pool
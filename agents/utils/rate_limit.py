@@ -0,0 +1,187 @@
+"""Process-wide rate-limit governor driven by the API's rate-limit headers."""
+
+import asyncio
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Mapping
+
+HEADER_PREFIX = "anthropic-ratelimit-"
+
+
+class TokenBucket:
+    """A token bucket that callers reserve from in arrival order.
+
+    Reservations may drive the level below zero; each caller then waits
+    until the refill covers its share of the deficit. Because the deficit
+    only grows in the order reservations are made, callers are served
+    first come, first served, on any thread or event loop.
+    """
+
+    def __init__(self, limit: float | None = None):
+        self.limit = limit
+        self.level = limit or 0.0
+        self.updated = time.monotonic()
+
+    @property
+    def rate(self) -> float:
+        """Refill per second; limits are per minute."""
+        return self.limit / 60.0
+
+    def _refill(self, now: float) -> None:
+        if self.limit is not None:
+            self.level = min(
+                self.limit, self.level + (now - self.updated) * self.rate
+            )
+        self.updated = now
+
+    def reserve(self, amount: float, now: float) -> float:
+        """Take amount from the bucket and return seconds to wait first."""
+        self._refill(now)
+        if self.limit is None:
+            return 0.0
+        self.level -= min(amount, self.limit)
+        return max(0.0, -self.level / self.rate)
+
+    def refund(self, amount: float, now: float) -> None:
+        """Return (or, if negative, take) tokens after the fact."""
+        self._refill(now)
+        if self.limit is not None:
+            self.level = min(self.limit, self.level + amount)
+
+    def observe(self, limit: float, remaining: float, now: float) -> None:
+        """Adopt the server's limit and, if lower, its remaining count."""
+        self._refill(now)
+        if self.limit is None:
+            self.level = remaining
+        self.limit = limit
+        self.level = min(self.level, remaining)
+
+
+def _retry_after(headers: Mapping[str, str]) -> float | None:
+    value = headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+def _parse_reset(value: str | None) -> float | None:
+    """Seconds until an RFC 3339 reset time, or None."""
+    if not value:
+        return None
+    try:
+        reset = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return max(0.0, (reset - datetime.now(timezone.utc)).total_seconds())
+
+
+class RateLimitGovernor:
+    """Paces Messages API calls for every agent in the process.
+
+    Two token buckets, for requests and for input tokens per minute, are
+    shared by all callers. Limits can be given up front; otherwise they
+    are learned from the anthropic-ratelimit-* response headers, and the
+    remaining counts in those headers keep the buckets in step with the
+    server. A 429 pauses every caller until its retry-after has passed,
+    instead of letting all of them fail and retry at the same moment.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float | None = None,
+        input_tokens_per_minute: float | None = None,
+        max_retries: int = 5,
+    ):
+        """Initialize a RateLimitGovernor.
+
+        Args:
+            requests_per_minute: Request limit (None learns it from headers)
+            input_tokens_per_minute: Input token limit (None learns it)
+            max_retries: Times a rate-limited call is retried before the
+                error is raised
+        """
+        self.requests = TokenBucket(requests_per_minute)
+        self.input_tokens = TokenBucket(input_tokens_per_minute)
+        self.max_retries = max_retries
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    async def acquire(self, input_tokens: int) -> None:
+        """Wait for this caller's turn to send a request."""
+        with self._lock:
+            now = time.monotonic()
+            wait = max(
+                self.requests.reserve(1, now),
+                self.input_tokens.reserve(input_tokens, now),
+                self._paused_until - now,
+            )
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def settle(self, estimated_tokens: int, actual_tokens: int) -> None:
+        """Correct the input token bucket once a request's usage is known."""
+        with self._lock:
+            self.input_tokens.refund(
+                estimated_tokens - actual_tokens, time.monotonic()
+            )
+
+    def update(self, headers: Mapping[str, str]) -> None:
+        """Sync the buckets with rate-limit headers from a response."""
+        with self._lock:
+            now = time.monotonic()
+            for bucket, name in (
+                (self.requests, "requests"),
+                (self.input_tokens, "input-tokens"),
+            ):
+                limit = headers.get(f"{HEADER_PREFIX}{name}-limit")
+                remaining = headers.get(f"{HEADER_PREFIX}{name}-remaining")
+                if limit is None or remaining is None:
+                    continue
+                try:
+                    bucket.observe(float(limit), float(remaining), now)
+                except ValueError:
+                    continue
+
+    def rate_limited(self, headers: Mapping[str, str]) -> None:
+        """Pause all callers after a 429 response."""
+        self.update(headers)
+        delay = _retry_after(headers)
+        if delay is None:
+            delay = _parse_reset(
+                headers.get(f"{HEADER_PREFIX}requests-reset")
+            )
+        with self._lock:
+            self._paused_until = max(
+                self._paused_until, time.monotonic() + (delay or 1.0)
+            )
+
+    def stats(self) -> dict[str, Any]:
+        """Return the current limits and bucket levels."""
+        with self._lock:
+            now = time.monotonic()
+            self.requests.refund(0, now)
+            self.input_tokens.refund(0, now)
+            return {
+                "requests_per_minute": self.requests.limit,
+                "requests_available": self.requests.level,
+                "input_tokens_per_minute": self.input_tokens.limit,
+                "input_tokens_available": self.input_tokens.level,
+                "paused_for": max(0.0, self._paused_until - now),
+            }
+
+
+_default_governor: RateLimitGovernor | None = None
+_default_lock = threading.Lock()
+
+
+def get_default_governor() -> RateLimitGovernor:
+    """Return the process-wide governor shared by all agents."""
+    global _default_governor
+    with _default_lock:
+        if _default_governor is None:
+            _default_governor = RateLimitGovernor()
+        return _default_governor
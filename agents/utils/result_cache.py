@@ -0,0 +1,116 @@
+"""Memoizing cache for results of idempotent tool calls."""
+
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any
+
+
+class ToolResultCache:
+    """LRU cache of tool results keyed by tool name and canonical input.
+
+    Only tools marked cacheable are cached. Entries expire after ttl
+    seconds, are dropped when a non-read-only call touches the same
+    resource, and, when the resource is a file or directory, are also
+    dropped once its mtime changes.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: float | None = 300.0):
+        """Initialize a cache.
+
+        Args:
+            max_entries: Entries kept before the least recently used is
+                evicted
+            ttl: Seconds an entry stays valid (None means until evicted or
+                invalidated)
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # key -> (content, stored_at, resource, resource mtime)
+        self._entries: OrderedDict[str, tuple] = OrderedDict()
+        self._by_resource: dict[str, set[str]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(tool_name: str, tool_input: dict[str, Any]) -> str:
+        """Build a cache key from a tool name and canonicalized input."""
+        canonical = json.dumps(
+            tool_input, sort_keys=True, separators=(",", ":"), default=str
+        )
+        return f"{tool_name}:{canonical}"
+
+    def get(
+        self, tool_name: str, tool_input: dict[str, Any]
+    ) -> tuple[bool, Any]:
+        """Return (found, content) for a call."""
+        key = self.make_key(tool_name, tool_input)
+        entry = self._entries.get(key)
+        if entry is not None:
+            content, stored_at, resource, mtime = entry
+            age = time.monotonic() - stored_at
+            expired = self.ttl is not None and age > self.ttl
+            if expired or _mtime(resource) != mtime:
+                self._remove(key)
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, content
+        self.misses += 1
+        return False, None
+
+    def put(
+        self,
+        tool_name: str,
+        tool_input: dict[str, Any],
+        content: Any,
+        resource: str | None = None,
+    ) -> None:
+        """Store the result of a call on an optional resource."""
+        key = self.make_key(tool_name, tool_input)
+        self._remove(key)
+        self._entries[key] = (
+            content,
+            time.monotonic(),
+            resource,
+            _mtime(resource),
+        )
+        if resource is not None:
+            self._by_resource.setdefault(resource, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def invalidate(self, resource: str) -> None:
+        """Drop every entry recorded against a resource."""
+        for key in self._by_resource.pop(resource, set()):
+            self._entries.pop(key, None)
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None and entry[2] is not None:
+            keys = self._by_resource.get(entry[2])
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_resource[entry[2]]
+
+    def stats(self) -> dict[str, Any]:
+        """Return hit/miss counters and the current size."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+        }
+
+
+def _mtime(resource: str | None) -> int | None:
+    """Return the mtime of a filesystem resource, if it is one."""
+    if resource is None or not os.path.isabs(resource):
+        return None
+    try:
+        return os.stat(resource).st_mtime_ns
+    except OSError:
+        return None
@@ -0,0 +1,180 @@
+"""Content-addressed store for tool outputs too large to keep in history."""
+
+import hashlib
+import os
+import tempfile
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Iterator
+
+from .token_count import CACHE_DIR
+
+SPILL_DIR = CACHE_DIR / "spill"
+HANDLE_PREFIX = "spill-"
+
+_spilling: ContextVar[bool] = ContextVar("spilling", default=False)
+
+
+@contextmanager
+def spilling() -> Iterator[None]:
+    """Mark the enclosed block's tool output as going to a spill store."""
+    token = _spilling.set(True)
+    try:
+        yield
+    finally:
+        _spilling.reset(token)
+
+
+def is_spilling() -> bool:
+    """Whether the running tool's output will pass through a spill store.
+
+    Tools that cap their own output can skip the cap then, so the full
+    text is stored and can be paged through with read_spilled.
+    """
+    return _spilling.get()
+
+
+class SpillStore:
+    """Keeps large tool outputs on disk and hands the model a preview.
+
+    Outputs are stored under the SHA-256 of their text, so repeated reads
+    of the same large file are stored once. The history gets the first
+    preview_chars characters and a handle that read_spilled pages through.
+    Pages are bounded in bytes, so a single huge line (such as a JSON
+    result) is paged too. Once the store is over max_store_bytes, the
+    least recently used outputs are deleted.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path = SPILL_DIR,
+        threshold: int = 20_000,
+        preview_chars: int = 2_000,
+        max_store_bytes: int = 512 * 1024 * 1024,
+    ):
+        """Initialize a SpillStore.
+
+        Args:
+            directory: Where spilled outputs are written
+            threshold: Outputs longer than this many characters are spilled
+            preview_chars: Characters of a spilled output kept in history
+            max_store_bytes: Size the store is trimmed to after each write
+        """
+        self.directory = Path(directory)
+        self.threshold = threshold
+        self.preview_chars = preview_chars
+        self.max_store_bytes = max_store_bytes
+
+    def _path(self, handle: str) -> Path:
+        digest = handle.removeprefix(HANDLE_PREFIX)
+        if not digest or not all(c in "0123456789abcdef" for c in digest):
+            raise ValueError(f"Invalid spill handle: {handle}")
+        return self.directory / digest[:2] / f"{digest}.txt"
+
+    def put(self, text: str) -> str:
+        """Store text and return its handle."""
+        data = text.encode("utf-8")
+        handle = HANDLE_PREFIX + hashlib.sha256(data).hexdigest()
+        path = self._path(handle)
+        if path.exists():
+            # Mark it recently used so eviction keeps it
+            os.utime(path)
+            return handle
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self._evict(keep=path)
+        return handle
+
+    def _evict(self, keep: Path) -> None:
+        """Delete least recently used outputs until under max_store_bytes."""
+        entries = []
+        for path in self.directory.glob("*/*.txt"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if total <= self.max_store_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+
+    def read(
+        self, handle: str, offset: int = 0, max_bytes: int = 0
+    ) -> tuple[str, int, int]:
+        """Read a page of a spilled output.
+
+        A page ends after its last newline when it holds one, and never
+        inside a UTF-8 character, so pages join back to the full text.
+
+        Args:
+            handle: Handle returned by put()
+            offset: Byte offset to start at
+            max_bytes: Page size bound (0 reads to the end)
+
+        Returns:
+            (text, byte offset after the page, total size in bytes)
+        """
+        path = self._path(handle)
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            raise FileNotFoundError(f"No spilled output for {handle}")
+        with f:
+            size = os.fstat(f.fileno()).st_size
+            f.seek(offset)
+            # A few bytes past the page show where a character ends
+            data = f.read(max_bytes + 3 if max_bytes else -1)
+        os.utime(path)
+
+        if max_bytes and len(data) > max_bytes:
+            cut = data.rfind(b"\n", 0, max_bytes) + 1
+            if not cut:
+                cut = max_bytes
+                while cut and data[cut] & 0xC0 == 0x80:
+                    cut -= 1
+            # Not UTF-8 at this offset; cut anywhere rather than stall
+            data = data[: cut or max_bytes]
+        text = data.decode("utf-8", errors="replace")
+        return text, offset + len(data), size
+
+    def spill_text(self, text: str) -> str:
+        """Return text unchanged, or a preview and handle if it's too long."""
+        if len(text) <= self.threshold:
+            return text
+        handle = self.put(text)
+        preview = text[: self.preview_chars]
+        size = len(text.encode("utf-8"))
+        resume = len(preview.encode("utf-8"))
+        return (
+            f"{preview}\n\n"
+            f"[Output truncated: {len(text)} characters ({size} bytes). "
+            f'The full output is stored as handle="{handle}"; use '
+            f"read_spilled with offset={resume} to continue after this "
+            "preview.]"
+        )
+
+    def spill(self, content: Any) -> Any:
+        """Spill oversized text in tool_result content (string or blocks)."""
+        if isinstance(content, str):
+            return self.spill_text(content)
+        if isinstance(content, list):
+            return [
+                {**block, "text": self.spill_text(block["text"])}
+                if block.get("type") == "text"
+                and len(block["text"]) > self.threshold
+                else block
+                for block in content
+            ]
+        return content
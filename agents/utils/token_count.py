@@ -0,0 +1,77 @@
+"""System prompt token counting with an on-disk cache."""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any
+
+from .client_util import call_client
+
+CACHE_DIR = Path(
+    os.environ.get("AGENTS_CACHE_DIR", Path.home() / ".cache" / "agents")
+)
+TOKEN_CACHE_FILE = CACHE_DIR / "token_counts.json"
+
+_counts: dict[str, int] | None = None
+
+
+def estimate_tokens(text: str) -> int:
+    """Fast local estimate of roughly four characters per token."""
+    return len(text) // 4
+
+
+def _load_counts() -> dict[str, int]:
+    """Load memoized counts from disk once per process."""
+    global _counts
+    if _counts is None:
+        try:
+            _counts = json.loads(TOKEN_CACHE_FILE.read_text())
+        except (OSError, ValueError):
+            _counts = {}
+    return _counts
+
+
+def _save_counts(counts: dict[str, int]) -> None:
+    """Write the count cache atomically, ignoring filesystem errors."""
+    try:
+        TOKEN_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = TOKEN_CACHE_FILE.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(counts))
+        os.replace(tmp_path, TOKEN_CACHE_FILE)
+    except OSError:
+        pass
+
+
+async def count_system_tokens(client: Any, model: str, system: str) -> int:
+    """Return the token count of a system prompt for a model.
+
+    Counts are memoized by (model, system prompt hash) in memory and on
+    disk, so only the first agent ever built with a given prompt pays for
+    the count_tokens round trip. If the API can't be reached the local
+    estimate is returned and nothing is cached.
+    """
+    digest = hashlib.sha256(system.encode("utf-8")).hexdigest()
+    key = f"{model}:{digest}"
+    counts = _load_counts()
+    if key in counts:
+        return counts[key]
+
+    try:
+        messages = client.messages
+        if hasattr(client, "with_options"):
+            # Fail fast when offline instead of waiting out retries
+            messages = client.with_options(max_retries=0, timeout=10).messages
+        result = await call_client(
+            messages.count_tokens,
+            model=model,
+            system=system,
+            messages=[{"role": "user", "content": "test"}],
+        )
+        tokens = result.input_tokens - 1
+    except Exception:
+        return estimate_tokens(system)
+
+    counts[key] = tokens
+    _save_counts(counts)
+    return tokens
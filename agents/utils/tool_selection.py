@@ -0,0 +1,212 @@
+"""Send only the tools relevant to the conversation instead of all of them."""
+
+import math
+import re
+from collections import Counter
+from typing import Any
+
+from ..tools.base import Tool
+
+_STOPWORDS = frozenset(
+    "a an and are as at be by can do for from has have how i in is it its "
+    "me my of on or our should that the this to use used using was we what "
+    "when which will with you your".split()
+)
+
+
+def _terms(text: str) -> list[str]:
+    """Split text into lowercase search terms, breaking up identifiers."""
+    text = re.sub(r"([a-z0-9])([A-Z])", r"\1 \2", text)
+    terms = []
+    for word in re.findall(r"[a-z0-9]+", text.lower()):
+        if word in _STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        terms.append(word)
+    return terms
+
+
+def _schema_text(schema: Any) -> str:
+    """Collect property names and descriptions from a JSON schema."""
+    parts = []
+    if isinstance(schema, dict):
+        for name, value in schema.get("properties", {}).items():
+            parts.append(name)
+            parts.append(_schema_text(value))
+        if isinstance(schema.get("description"), str):
+            parts.append(schema["description"])
+        if "items" in schema:
+            parts.append(_schema_text(schema["items"]))
+    return " ".join(parts)
+
+
+class ToolIndex:
+    """BM25 index over tool names, descriptions and input schemas.
+
+    Name terms are counted several times so a tool whose name matches the
+    conversation outranks one that only mentions the term in passing.
+    """
+
+    NAME_WEIGHT = 3
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self, tools: list[Tool]):
+        self.names = [tool.name for tool in tools]
+        self._docs: list[Counter] = []
+        for tool in tools:
+            terms = _terms(tool.name) * self.NAME_WEIGHT
+            terms += _terms(tool.description or "")
+            terms += _terms(_schema_text(tool.input_schema))
+            self._docs.append(Counter(terms))
+        self._lengths = [sum(doc.values()) for doc in self._docs]
+        self._avg_length = sum(self._lengths) / len(self._docs) if tools else 0
+        document_frequency = Counter(
+            term for doc in self._docs for term in doc
+        )
+        count = len(self._docs)
+        self._idf = {
+            term: math.log(1 + (count - freq + 0.5) / (freq + 0.5))
+            for term, freq in document_frequency.items()
+        }
+
+    def rank(self, query: str, limit: int) -> list[str]:
+        """Return the names of up to limit tools matching query, best first."""
+        query_terms = Counter(_terms(query))
+        scored = []
+        for i, doc in enumerate(self._docs):
+            norm = self.K1 * (
+                1 - self.B + self.B * self._lengths[i] / self._avg_length
+            )
+            score = 0.0
+            for term, query_count in query_terms.items():
+                freq = doc.get(term)
+                if freq:
+                    score += (
+                        self._idf[term]
+                        * freq
+                        * (self.K1 + 1)
+                        / (freq + norm)
+                        * query_count
+                    )
+            if score > 0:
+                scored.append((-score, i))
+        scored.sort()
+        return [self.names[i] for _, i in scored[:limit]]
+
+
+def _recent_text(messages: list[dict[str, Any]], window: int) -> str:
+    """Text of the last few messages: prose, tool calls and tool results."""
+    parts = []
+    for message in messages[-window:]:
+        for block in message["content"]:
+            if block["type"] == "text":
+                parts.append(block["text"])
+            elif block["type"] == "tool_use":
+                parts.append(f"{block['name']} {block['input']}")
+            elif block["type"] == "tool_result":
+                content = block.get("content")
+                if isinstance(content, str):
+                    parts.append(content[:2000])
+    return "\n".join(parts)
+
+
+def _has_tool_blocks(messages: list[dict[str, Any]]) -> bool:
+    return any(
+        block["type"] in ("tool_use", "tool_result")
+        for message in messages
+        for block in message["content"]
+    )
+
+
+class ToolSelector:
+    """Picks the subset of tools sent with each request.
+
+    Each turn the top_k tools most relevant to the last few messages are
+    added to a sticky selection, and pinned tools are always included.
+    Tools stay selected once chosen, in the order they were first chosen,
+    so the tool definitions at the head of the prompt only change when a
+    new tool becomes relevant and the prompt cache keeps hitting. When
+    the selection grows past max_tools it is rebuilt from the current
+    top_k. Before any tool matches, only pinned tools are sent; if that
+    leaves nothing while the conversation holds tool calls, the tools it
+    called are selected, or every tool if none of them still exist.
+
+    A selector holds per-conversation state; use fork() for a new
+    conversation, which shares the index but starts with no selection.
+    """
+
+    def __init__(
+        self,
+        top_k: int = 10,
+        pinned: list[str] | None = None,
+        max_tools: int | None = None,
+        window: int = 4,
+    ):
+        """Initialize a ToolSelector.
+
+        Args:
+            top_k: Number of relevant tools added per turn
+            pinned: Names of tools that are always sent
+            max_tools: Cap on the sticky selection (defaults to 3 * top_k)
+            window: Number of recent messages used as the query
+        """
+        self.top_k = top_k
+        self.pinned = list(pinned or [])
+        self.max_tools = max_tools or 3 * top_k
+        self.window = window
+        self._selected: dict[str, None] = {}
+        self._index: ToolIndex | None = None
+        self._index_key: tuple | None = None
+
+    def fork(self) -> "ToolSelector":
+        """Return a selector with the same settings and index, no selection."""
+        forked = ToolSelector(
+            self.top_k, self.pinned, self.max_tools, self.window
+        )
+        forked._index, forked._index_key = self._index, self._index_key
+        return forked
+
+    def _index_for(self, tools: list[Tool]) -> ToolIndex:
+        key = tuple((tool.name, tool.description) for tool in tools)
+        if key != self._index_key:
+            self._index, self._index_key = ToolIndex(tools), key
+        return self._index
+
+    def select(
+        self, tools: list[Tool], messages: list[dict[str, Any]]
+    ) -> list[Tool]:
+        """Return the tools to send for the next request."""
+        if len(tools) <= self.top_k + len(self.pinned):
+            return tools
+
+        ranked = self._index_for(tools).rank(
+            _recent_text(messages, self.window), self.top_k
+        )
+        for name in ranked:
+            self._selected.setdefault(name)
+        if len(self._selected) > self.max_tools:
+            # Keep tools the model just called alongside the new top_k
+            recent_calls = [
+                block["name"]
+                for message in messages[-self.window :]
+                for block in message["content"]
+                if block["type"] == "tool_use"
+            ]
+            self._selected = dict.fromkeys(recent_calls + ranked)
+
+        by_name = {tool.name: tool for tool in tools}
+        names = dict.fromkeys(self.pinned)
+        names.update(self._selected)
+        selected = [by_name[name] for name in names if name in by_name]
+        if selected or not _has_tool_blocks(messages):
+            return selected
+
+        # The API rejects tool_use and tool_result blocks in a request
+        # without tools, so keep the tools the conversation already called
+        for message in messages:
+            for block in message["content"]:
+                if block["type"] == "tool_use" and block["name"] in by_name:
+                    self._selected.setdefault(block["name"])
+        return [by_name[name] for name in self._selected] or tools
@@ -1,22 +1,71 @@
 """Tool execution utility with parallel execution support."""
 
 import asyncio
+import json
+import threading
+import time
+import weakref
 from typing import Any
 
+from .result_cache import ToolResultCache
+from .spill_store import SpillStore, spilling
+from .tracing import trace_span
+
+# Resource key shared by every "serial" tool call
+SERIAL_RESOURCE = "__serial__"
+
+
+def _result_content(result: Any) -> str | list[dict[str, Any]]:
+    """Turn a tool's return value into tool_result content.
+
+    Strings and lists of content blocks (text, image, document) are
+    passed through as-is; other structured values are sent as JSON rather
+    than as their Python repr.
+    """
+    if isinstance(result, str):
+        return result
+    if isinstance(result, list) and all(
+        isinstance(block, dict) and "type" in block for block in result
+    ):
+        return result
+    if isinstance(result, (dict, list)):
+        return json.dumps(result, default=str)
+    return str(result)
+
+
+def _is_cacheable(tool: Any, call: Any) -> bool:
+    """Return whether a call's result may be served from the cache."""
+    if not getattr(tool, "cacheable", False):
+        return False
+    is_cacheable = getattr(tool, "is_cacheable", None)
+    if is_cacheable is None:
+        return True
+    try:
+        return is_cacheable(**call.input)
+    except Exception:
+        return False
+
 
 async def _execute_single_tool(
-    call: Any, tool_dict: dict[str, Any]
+    call: Any, tool_dict: dict[str, Any], timeout: float | None = None
 ) -> dict[str, Any]:
     """Execute a single tool and handle errors."""
     response = {"type": "tool_result", "tool_use_id": call.id}
 
-    try:
-        # Execute the tool directly
-        result = await tool_dict[call.name].execute(**call.input)
-        response["content"] = str(result)
-    except KeyError:
+    tool = tool_dict.get(call.name)
+    if tool is None:
         response["content"] = f"Tool '{call.name}' not found"
         response["is_error"] = True
+        return response
+
+    try:
+        result = await asyncio.wait_for(tool.execute(**call.input), timeout)
+        response["content"] = _result_content(result)
+    except asyncio.TimeoutError:
+        response["content"] = (
+            f"Error executing tool: {call.name} timed out after {timeout}s"
+        )
+        response["is_error"] = True
     except Exception as e:
         response["content"] = f"Error executing tool: {str(e)}"
         response["is_error"] = True
@@ -24,16 +73,207 @@ async def _execute_single_tool(
     return response
 
 
+class _LoopState:
+    """Call ordering and limits shared by every scheduler on one loop.
+
+    Schedulers live for one turn, but forks run by run_many and batch
+    waves share a loop, so serial tools, max_parallel and the ordering
+    of calls on a resource are enforced across all of them.
+    """
+
+    def __init__(self):
+        # Per resource: the last exclusive call and reads submitted since
+        self.last_write: dict[str, asyncio.Task] = {}
+        self.reads: dict[str, set[asyncio.Task]] = {}
+        # Per tool instance: the tool, kept alive with its semaphore
+        self.limits: dict[int, tuple[Any, asyncio.Semaphore]] = {}
+
+    def limit_for(self, tool: Any, max_parallel: int) -> asyncio.Semaphore:
+        if id(tool) not in self.limits:
+            self.limits[id(tool)] = (tool, asyncio.Semaphore(max_parallel))
+        return self.limits[id(tool)][1]
+
+    def track(self, task: asyncio.Task, resource: str, writes: bool) -> None:
+        """Record a call on a resource and forget it once it finishes."""
+        if writes:
+            self.last_write[resource] = task
+        else:
+            self.reads.setdefault(resource, set()).add(task)
+
+        def forget(task: asyncio.Task) -> None:
+            if self.last_write.get(resource) is task:
+                del self.last_write[resource]
+            reads = self.reads.get(resource)
+            if reads is not None:
+                reads.discard(task)
+                if not reads:
+                    del self.reads[resource]
+
+        task.add_done_callback(forget)
+
+
+_loop_states: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, _LoopState
+] = weakref.WeakKeyDictionary()
+_loop_states_lock = threading.Lock()
+
+
+def _loop_state() -> _LoopState:
+    loop = asyncio.get_running_loop()
+    with _loop_states_lock:
+        if loop not in _loop_states:
+            _loop_states[loop] = _LoopState()
+        return _loop_states[loop]
+
+
+class ToolScheduler:
+    """Runs tool calls concurrently while honoring each tool's hints.
+
+    Calls that touch the same resource are ordered by submission: an
+    exclusive call waits for every earlier call on its resource and a
+    read-only call waits for earlier exclusive ones. Everything else runs
+    in parallel, limited by each tool's max_parallel, and a call that
+    exceeds its tool's timeout is cancelled and reported as an error.
+
+    With a result cache, calls to cacheable tools are answered from it
+    when possible, and any call that isn't read-only invalidates the
+    cached results for its resource. With a spill store, oversized
+    results are replaced by a preview and a handle; the cache keeps the
+    full result.
+
+    A scheduler is meant to live for one turn, but ordering, serial tools
+    and max_parallel apply across every scheduler on the same event loop,
+    so concurrent agents on one loop don't overlap conflicting calls.
+    """
+
+    def __init__(
+        self,
+        tool_dict: dict[str, Any],
+        default_timeout: float | None = None,
+        cache: ToolResultCache | None = None,
+        spill_store: SpillStore | None = None,
+    ):
+        self.tool_dict = tool_dict
+        self.default_timeout = default_timeout
+        self.cache = cache
+        self.spill_store = spill_store
+
+    def submit(self, call: Any) -> asyncio.Task:
+        """Schedule a tool call and return the task producing its result."""
+        tool = self.tool_dict.get(call.name)
+        concurrency = getattr(tool, "concurrency", "read_only")
+
+        if concurrency == "serial":
+            resource = SERIAL_RESOURCE
+        elif tool is not None:
+            try:
+                resource = tool.resource_key(**call.input)
+            except Exception:
+                resource = None
+            if resource is None and concurrency == "exclusive":
+                resource = call.name
+        else:
+            resource = None
+
+        state = _loop_state()
+        writes = concurrency != "read_only"
+        waits_for = []
+        if resource is not None:
+            if resource in state.last_write:
+                waits_for.append(state.last_write[resource])
+            if writes:
+                waits_for.extend(state.reads.pop(resource, ()))
+
+        task = asyncio.create_task(
+            self._run(call, tool, resource, waits_for)
+        )
+        if resource is not None:
+            state.track(task, resource, writes)
+        return task
+
+    async def _run(
+        self,
+        call: Any,
+        tool: Any,
+        resource: str | None,
+        waits_for: list[asyncio.Task],
+    ) -> dict[str, Any]:
+        spills = self.spill_store is not None and getattr(
+            tool, "spillable", True
+        )
+        if not spills:
+            return await self._run_cached(call, tool, resource, waits_for)
+        with spilling():
+            response = await self._run_cached(
+                call, tool, resource, waits_for
+            )
+        content = await asyncio.to_thread(
+            self.spill_store.spill, response["content"]
+        )
+        return {**response, "content": content}
+
+    async def _run_cached(
+        self,
+        call: Any,
+        tool: Any,
+        resource: str | None,
+        waits_for: list[asyncio.Task],
+    ) -> dict[str, Any]:
+        with trace_span("tool", tool=call.name) as span:
+            if waits_for:
+                start = time.perf_counter()
+                await asyncio.wait(waits_for)
+                span.attributes["queued"] = time.perf_counter() - start
+
+            cacheable = self.cache is not None and _is_cacheable(tool, call)
+            if cacheable:
+                found, content = self.cache.get(call.name, call.input)
+                span.attributes["cached"] = found
+                if found:
+                    return {
+                        "type": "tool_result",
+                        "tool_use_id": call.id,
+                        "content": content,
+                    }
+
+            response = await self._execute(call, tool)
+            span.attributes["is_error"] = bool(response.get("is_error"))
+
+        if self.cache is not None:
+            writes = getattr(tool, "concurrency", "read_only") != "read_only"
+            if writes and resource is not None:
+                self.cache.invalidate(resource)
+            elif cacheable and not response.get("is_error"):
+                self.cache.put(
+                    call.name, call.input, response["content"], resource
+                )
+        return response
+
+    async def _execute(self, call: Any, tool: Any) -> dict[str, Any]:
+        timeout = getattr(tool, "timeout", None) or self.default_timeout
+        max_parallel = getattr(tool, "max_parallel", None)
+        if not max_parallel:
+            return await _execute_single_tool(call, self.tool_dict, timeout)
+
+        async with _loop_state().limit_for(tool, max_parallel):
+            return await _execute_single_tool(call, self.tool_dict, timeout)
+
+
 async def execute_tools(
-    tool_calls: list[Any], tool_dict: dict[str, Any], parallel: bool = True
+    tool_calls: list[Any],
+    tool_dict: dict[str, Any],
+    parallel: bool = True,
+    cache: ToolResultCache | None = None,
+    spill_store: SpillStore | None = None,
 ) -> list[dict[str, Any]]:
     """Execute multiple tools sequentially or in parallel."""
+    scheduler = ToolScheduler(
+        tool_dict, cache=cache, spill_store=spill_store
+    )
 
     if parallel:
         return await asyncio.gather(
-            *[_execute_single_tool(call, tool_dict) for call in tool_calls]
+            *[scheduler.submit(call) for call in tool_calls]
         )
     else:
-        return [
-            await _execute_single_tool(call, tool_dict) for call in tool_calls
-        ]
+        return [await scheduler.submit(call) for call in tool_calls]
@@ -0,0 +1,197 @@
+"""Structured tracing spans for agent turns, tool calls and MCP calls."""
+
+import itertools
+import json
+import math
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from typing import Any, Iterator, Protocol
+
+_span_ids = itertools.count(1)
+_current_tracer: ContextVar["Tracer | None"] = ContextVar(
+    "current_tracer", default=None
+)
+_current_span: ContextVar["Span | None"] = ContextVar(
+    "current_span", default=None
+)
+
+
+@dataclass
+class Span:
+    """A timed operation with attributes such as token usage or tool name."""
+
+    name: str
+    attributes: dict[str, Any] = field(default_factory=dict)
+    span_id: int = 0
+    parent_id: int | None = None
+    start_time: float = 0.0
+    duration: float = 0.0
+    error: str | None = None
+
+
+class SpanExporter(Protocol):
+    """Receives every finished span of a tracer."""
+
+    def export(self, span: Span) -> None: ...
+
+
+class Tracer:
+    """Creates spans and hands finished ones to its exporters.
+
+    A tracer is made current with use_tracer(); code deeper in the call
+    stack, such as tool execution, records spans with trace_span() without
+    needing a reference to it. Spans opened inside another span are linked
+    to it through parent_id.
+    """
+
+    def __init__(self, exporters: list[SpanExporter] | None = None):
+        self.exporters = list(exporters or [])
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Span]:
+        """Time the enclosed block as a span and export it on exit."""
+        parent = _current_span.get()
+        span = Span(
+            name=name,
+            attributes=attributes,
+            span_id=next(_span_ids),
+            parent_id=parent.span_id if parent else None,
+            start_time=time.time(),
+        )
+        token = _current_span.set(span)
+        start = time.perf_counter()
+        try:
+            yield span
+        except BaseException as e:
+            span.error = repr(e)
+            raise
+        finally:
+            span.duration = time.perf_counter() - start
+            _current_span.reset(token)
+            for exporter in self.exporters:
+                try:
+                    exporter.export(span)
+                except Exception as e:
+                    print(f"Error exporting span {span.name}: {e}")
+
+
+@contextmanager
+def use_tracer(tracer: Tracer | None) -> Iterator[None]:
+    """Make a tracer current for the enclosed block (None keeps the outer)."""
+    if tracer is None:
+        yield
+        return
+    token = _current_tracer.set(tracer)
+    try:
+        yield
+    finally:
+        _current_tracer.reset(token)
+
+
+@contextmanager
+def trace_span(name: str, **attributes: Any) -> Iterator[Span]:
+    """Record a span with the current tracer, if there is one.
+
+    Without a tracer the span is still yielded, so callers can set
+    attributes unconditionally, but it is never exported.
+    """
+    tracer = _current_tracer.get()
+    if tracer is None:
+        yield Span(name=name, attributes=attributes)
+        return
+    with tracer.span(name, **attributes) as span:
+        yield span
+
+
+def usage_attributes(usage: Any) -> dict[str, Any]:
+    """Return token usage and the cache-read ratio as span attributes."""
+    input_tokens = usage.input_tokens or 0
+    cache_read = getattr(usage, "cache_read_input_tokens", 0) or 0
+    cache_creation = getattr(usage, "cache_creation_input_tokens", 0) or 0
+    total_input = input_tokens + cache_read + cache_creation
+    return {
+        "input_tokens": input_tokens,
+        "output_tokens": usage.output_tokens or 0,
+        "cache_read_input_tokens": cache_read,
+        "cache_creation_input_tokens": cache_creation,
+        "cache_read_ratio": cache_read / total_input if total_input else 0.0,
+    }
+
+
+class JSONLExporter:
+    """Appends each span as one JSON line to a file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(asdict(span), default=str)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+def _percentile(ordered: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of a sorted, non-empty list."""
+    rank = max(1, math.ceil(fraction * len(ordered)))
+    return ordered[rank - 1]
+
+
+class SpanAggregator:
+    """Collects span durations in memory and summarizes them.
+
+    Spans are grouped by name, and by tool for tool and MCP spans, so the
+    summary shows which tools and turns dominate latency.
+    """
+
+    def __init__(self):
+        self.durations: dict[str, list[float]] = {}
+        self.errors: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def group_for(span: Span) -> str:
+        tool = span.attributes.get("tool")
+        return f"{span.name}:{tool}" if tool else span.name
+
+    def export(self, span: Span) -> None:
+        group = self.group_for(span)
+        with self._lock:
+            self.durations.setdefault(group, []).append(span.duration)
+            if span.error or span.attributes.get("is_error"):
+                self.errors[group] = self.errors.get(group, 0) + 1
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """Return count, errors, mean, p50 and p95 seconds per group."""
+        with self._lock:
+            groups = {name: sorted(d) for name, d in self.durations.items()}
+            errors = dict(self.errors)
+        return {
+            name: {
+                "count": len(ordered),
+                "errors": errors.get(name, 0),
+                "mean": sum(ordered) / len(ordered),
+                "p50": _percentile(ordered, 0.50),
+                "p95": _percentile(ordered, 0.95),
+            }
+            for name, ordered in groups.items()
+        }
+
+    def report(self) -> str:
+        """Format the summary as a table, slowest p95 first."""
+        rows = sorted(
+            self.summary().items(), key=lambda item: -item[1]["p95"]
+        )
+        lines = [
+            f"{'span':<40} {'count':>6} {'errors':>6} "
+            f"{'p50 ms':>9} {'p95 ms':>9}"
+        ]
+        for name, stats in rows:
+            lines.append(
+                f"{name:<40} {stats['count']:>6} {stats['errors']:>6} "
+                f"{stats['p50'] * 1000:>9.1f} {stats['p95'] * 1000:>9.1f}"
+            )
+        return "\n".join(lines)
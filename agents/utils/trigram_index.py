@@ -0,0 +1,324 @@
+"""Incremental trigram index for fast substring and regex search."""
+
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator
+
+from .dir_listing import walk
+
+try:
+    from re import _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
+
+# Files larger than this, or that look binary, are not indexed
+MAX_FILE_BYTES = 2 * 1024 * 1024
+
+# Directory trees indexed at once, least recently used evicted first
+MAX_INDEXES = 8
+
+# Seconds a search waits for an index's first build before giving up
+FIRST_BUILD_TIMEOUT = 30.0
+
+_indexes: OrderedDict[str, "TrigramIndex"] = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def _trigrams(text: str) -> set[str]:
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+def _read_text(path: str) -> str | None:
+    """Read a text file, or return None for binary or oversized files."""
+    try:
+        if os.path.getsize(path) > MAX_FILE_BYTES:
+            return None
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    if b"\0" in data[:8192]:
+        return None
+    return data.decode("utf-8", errors="replace")
+
+
+def required_literals(pattern: str, regex: bool) -> list[str]:
+    """Return literal strings every match of a pattern must contain.
+
+    Only runs of plain characters at the top level of a regex are used;
+    alternation at the top level means nothing is required.
+    """
+    if not regex:
+        return [pattern]
+    try:
+        parsed = sre_parse.parse(pattern)
+    except re.error:
+        return []
+
+    literals, run = [], []
+    for op, arg in parsed:
+        if op is sre_parse.LITERAL:
+            run.append(chr(arg))
+            continue
+        if op is sre_parse.BRANCH:
+            return []
+        if run:
+            literals.append("".join(run))
+            run = []
+    if run:
+        literals.append("".join(run))
+    return literals
+
+
+class TrigramIndex:
+    """Trigram postings for the text files under a directory.
+
+    Trigrams are indexed lowercased so one index serves case-sensitive and
+    case-insensitive queries; candidates are always verified against the
+    real pattern. refresh() re-reads only files whose mtime or size
+    changed, spread over a thread pool. Searches never wait for it: once
+    the index is built, a stale index is refreshed in the background while
+    queries use the current postings. Writes made through the file tools
+    are indexed at once with file_changed().
+    """
+
+    def __init__(self, root: str, refresh_interval: float = 1.0):
+        self.root = root
+        self.refresh_interval = refresh_interval
+        self._files: dict[str, tuple[int, int, frozenset[str]]] = {}
+        self._postings: dict[str, set[str]] = {}
+        # Guards the postings; held only while applying changes
+        self._lock = threading.Lock()
+        # Serializes refreshes
+        self._refresh_lock = threading.Lock()
+        self._state_lock = threading.Lock()
+        self._refreshing = False
+        self._built = threading.Event()
+        self._last_refresh = 0.0
+        # Error of the last refresh, reported to searches until one succeeds
+        self._error: Exception | None = None
+
+    def refresh(self) -> None:
+        """Bring the index up to date with the files on disk."""
+        try:
+            self._refresh()
+            self._error = None
+        except Exception as e:
+            self._error = e
+            raise
+        finally:
+            # Set even on failure, so searches never wait on a dead build
+            self._last_refresh = time.monotonic()
+            self._built.set()
+
+    def _refresh(self) -> None:
+        with self._refresh_lock:
+            current = {}
+            for parts, is_dir in walk(self.root, "**"):
+                if is_dir:
+                    continue
+                rel_path = "/".join(parts)
+                try:
+                    stat = os.stat(os.path.join(self.root, rel_path))
+                except OSError:
+                    continue
+                current[rel_path] = (stat.st_mtime_ns, stat.st_size)
+
+            with self._lock:
+                versions = {
+                    rel_path: entry[:2]
+                    for rel_path, entry in self._files.items()
+                }
+            removed = set(versions) - set(current)
+            changed = [
+                rel_path
+                for rel_path, version in current.items()
+                if versions.get(rel_path) != version
+            ]
+            results = []
+            if changed:
+                with ThreadPoolExecutor(
+                    max_workers=min(8, os.cpu_count() or 1)
+                ) as pool:
+                    results = list(pool.map(self._index_file, changed))
+
+            with self._lock:
+                for rel_path in removed:
+                    self._remove(rel_path)
+                for rel_path, trigrams in zip(changed, results):
+                    self._remove(rel_path)
+                    if trigrams is not None:
+                        self._add(rel_path, current[rel_path], trigrams)
+
+    def refresh_in_background(self) -> None:
+        """Start a refresh on a daemon thread unless one is running."""
+        with self._state_lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run() -> None:
+            try:
+                self.refresh()
+            except Exception:
+                pass  # Recorded in _error for the next search
+            finally:
+                with self._state_lock:
+                    self._refreshing = False
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def file_changed(self, rel_path: str) -> None:
+        """Re-index one file right away, e.g. after a write."""
+        try:
+            stat = os.stat(os.path.join(self.root, rel_path))
+        except OSError:
+            trigrams = None
+        else:
+            trigrams = self._index_file(rel_path)
+        with self._lock:
+            self._remove(rel_path)
+            if trigrams is not None:
+                version = (stat.st_mtime_ns, stat.st_size)
+                self._add(rel_path, version, trigrams)
+
+    def _index_file(self, rel_path: str) -> frozenset[str] | None:
+        text = _read_text(os.path.join(self.root, rel_path))
+        if text is None:
+            return None
+        return frozenset(_trigrams(text.lower()))
+
+    def _add(
+        self, rel_path: str, version: tuple[int, int], trigrams: frozenset
+    ) -> None:
+        self._files[rel_path] = (*version, trigrams)
+        for trigram in trigrams:
+            self._postings.setdefault(trigram, set()).add(rel_path)
+
+    def _remove(self, rel_path: str) -> None:
+        entry = self._files.pop(rel_path, None)
+        if entry is None:
+            return
+        for trigram in entry[2]:
+            paths = self._postings.get(trigram)
+            if paths is not None:
+                paths.discard(rel_path)
+                if not paths:
+                    del self._postings[trigram]
+
+    def candidates(self, literals: list[str], prefix: str = "") -> list[str]:
+        """Return indexed files that contain every trigram of the literals.
+
+        With a prefix, only files under that relative directory are
+        returned.
+        """
+        with self._lock:
+            result: set[str] | None = None
+            for literal in literals:
+                for trigram in _trigrams(literal.lower()):
+                    paths = self._postings.get(trigram, set())
+                    result = set(paths) if result is None else result & paths
+                    if not result:
+                        return []
+            if result is None:
+                result = set(self._files)
+        if prefix:
+            result = {path for path in result if path.startswith(prefix)}
+        return sorted(result)
+
+    def search(
+        self,
+        pattern: str,
+        regex: bool = False,
+        ignore_case: bool = False,
+        prefix: str = "",
+    ) -> Iterator[tuple[str, list[str], int]]:
+        """Yield (path, lines, matching line number) for each match.
+
+        Args:
+            pattern: Substring, or regex if regex is set
+            regex: Treat pattern as a regular expression
+            ignore_case: Match case-insensitively
+            prefix: Relative directory, ending in "/", to search within
+        """
+        flags = re.IGNORECASE if ignore_case else 0
+        compiled = re.compile(pattern if regex else re.escape(pattern), flags)
+
+        if time.monotonic() - self._last_refresh >= self.refresh_interval:
+            self.refresh_in_background()
+        # Only the first build is waited for
+        if not self._built.wait(FIRST_BUILD_TIMEOUT):
+            raise TimeoutError(
+                f"Search index for {self.root} is still being built"
+            )
+        if self._error is not None:
+            raise RuntimeError(
+                f"Search index for {self.root} failed to build: "
+                f"{self._error}"
+            )
+        for rel_path in self.candidates(
+            required_literals(pattern, regex), prefix
+        ):
+            text = _read_text(os.path.join(self.root, rel_path))
+            if text is None or not compiled.search(text):
+                continue
+            lines = text.splitlines()
+            for number, line in enumerate(lines):
+                if compiled.search(line):
+                    yield rel_path, lines, number
+
+
+def _relative_to(path: str, root: str) -> str | None:
+    """Return path relative to root, or None if it isn't inside root."""
+    if path == root:
+        return ""
+    if path.startswith(root.rstrip(os.sep) + os.sep):
+        return path[len(root.rstrip(os.sep)) + 1 :].replace(os.sep, "/")
+    return None
+
+
+def find_index(directory: str) -> tuple[TrigramIndex, str]:
+    """Return the index covering a directory and the directory's prefix.
+
+    A directory inside an already indexed tree is served by that tree's
+    index, filtered by the prefix, instead of getting an index of its
+    own. Only the MAX_INDEXES most recently used trees are kept.
+    """
+    directory = os.path.realpath(directory)
+    with _indexes_lock:
+        for root, index in _indexes.items():
+            rel = _relative_to(directory, root)
+            if rel is not None:
+                _indexes.move_to_end(root)
+                return index, f"{rel}/" if rel else ""
+
+        # A new tree replaces indexes of its own subdirectories
+        for root in list(_indexes):
+            if _relative_to(root, directory) is not None:
+                del _indexes[root]
+        index = _indexes[directory] = TrigramIndex(directory)
+        while len(_indexes) > MAX_INDEXES:
+            _indexes.popitem(last=False)
+        return index, ""
+
+
+def get_index(root: str) -> TrigramIndex:
+    """Return the shared index covering a directory."""
+    return find_index(root)[0]
+
+
+def file_changed(path: str) -> None:
+    """Update every index whose tree contains a file that was written."""
+    path = os.path.realpath(path)
+    with _indexes_lock:
+        covering = [
+            (index, rel)
+            for root, index in _indexes.items()
+            if (rel := _relative_to(path, root))
+        ]
+    for index, rel in covering:
+        index.file_changed(rel)